@@ -0,0 +1,183 @@
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Optional dependency, only gzip is offered without it
+    brotli = None
+
+# Defaults, can be overridden in app.config
+DEFAULT_COMPRESSION_MIN_SIZE = 1024  # Bytes; smaller bodies are sent as they are
+DEFAULT_COMPRESSION_LEVEL = 6  # gzip level 1-9
+DEFAULT_BROTLI_QUALITY = 5  # brotli quality 0-11
+DEFAULT_COMPRESSION_CACHE_SIZE = 32 * 1024 * 1024  # Bytes of compressed bodies kept per worker
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript'}
+
+
+class CompressedBodyCache:
+    """Size-bounded LRU cache of compressed bodies keyed by (ETag, encoding)"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            body = self.entries.get(key)
+            if body is not None:
+                self.entries.move_to_end(key)
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.max_size:
+            return
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_size:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+def choose_encoding():
+    """Pick the best content coding the client accepts: br, then gzip"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br'] > 0:
+        return 'br'
+    if accepted['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['quality'])
+    return gzip.compress(data, compresslevel=config['level'])
+
+
+def read_head(chunks, min_size):
+    """
+    Read chunks of a streamed body until at least min_size bytes are buffered.
+
+    Returns the buffered chunks (as bytes) and whether the body ended before.
+    """
+    head, size = [], 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        head.append(chunk)
+        size += len(chunk)
+        if size >= min_size:
+            return head, False
+    return head, True
+
+
+def resume_stream(head, chunks):
+    """The rest of a streamed body after read_head, starting with the buffered chunks"""
+    try:
+        yield from head
+        yield from chunks
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def compress_stream(chunks, encoding, config, cache, cache_key):
+    """Compress an iterable body incrementally; the full result is cached once complete"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=config['quality'])
+        finish = compressor.finish
+    else:
+        # wbits=31 produces a gzip container
+        compressor = zlib.compressobj(config['level'], zlib.DEFLATED, 31)
+        finish = compressor.flush
+    parts = [] if cache_key else None
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            out = compressor.process(chunk) if encoding == 'br' else compressor.compress(chunk)
+            if out:
+                if parts is not None:
+                    parts.append(out)
+                yield out
+        out = finish()
+        if parts is not None:
+            parts.append(out)
+            cache.put(cache_key, b''.join(parts))
+        yield out
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def init_compression(app):
+    """
+    Compress API responses with gzip or brotli, negotiated via Accept-Encoding.
+
+    Bodies below COMPRESSION_MIN_SIZE are sent uncompressed; streamed bodies
+    are buffered up to that size to decide, then compressed incrementally.
+    Responses with an ETag (see api/etag.py) are kept precompressed per worker,
+    so an unchanged body is neither serialized nor compressed again. The ETag
+    of a compressed response is marked weak.
+    """
+    config = {
+        'min_size': app.config.get('COMPRESSION_MIN_SIZE', DEFAULT_COMPRESSION_MIN_SIZE),
+        'level': app.config.get('COMPRESSION_LEVEL', DEFAULT_COMPRESSION_LEVEL),
+        'quality': app.config.get('COMPRESSION_BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY),
+    }
+    cache = CompressedBodyCache(app.config.get('COMPRESSION_CACHE_SIZE', DEFAULT_COMPRESSION_CACHE_SIZE))
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding()
+        if encoding is None:
+            return response
+
+        etag, _ = response.get_etag()
+        cache_key = (etag, encoding) if etag else None
+
+        cached = cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            # Skip the (possibly not yet started) streamed body entirely
+            response.close()
+            response.response = [cached]
+            response.content_length = len(cached)
+        elif response.is_streamed:
+            chunks = iter(response.response)
+            head, ended = read_head(chunks, config['min_size'])
+            if ended:
+                response.close()
+                response.response = head
+                response.content_length = sum(len(chunk) for chunk in head)
+                return response
+            response.response = compress_stream(resume_stream(head, chunks), encoding, config, cache, cache_key)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < config['min_size']:
+                return response
+            body = compress(data, encoding, config)
+            if cache_key:
+                cache.put(cache_key, body)
+            response.set_data(body)
+
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            response.set_etag(etag, weak=True)
+        return response
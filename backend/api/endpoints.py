@@ -8,7 +8,9 @@ from db.models import db, Player, User, Tag, Note
 from .state import state_bp
 from .players import players_bp
 from .tournaments import tournaments_bp
+from .jobs import jobs_bp
 from .auth import login_required, admin_required
+from .etag import versioned
 
 api = Blueprint('api', __name__)
 
@@ -18,6 +20,7 @@ def register_blueprints(app):
     app.register_blueprint(api, url_prefix='/api')
     app.register_blueprint(players_bp, url_prefix='/api')
     app.register_blueprint(tournaments_bp, url_prefix='/api')
+    app.register_blueprint(jobs_bp, url_prefix='/api')
 
 
 ######
@@ -174,6 +177,7 @@ def get_session():
 
 @api.route('/tags', methods=['GET'])
 @login_required
+@versioned('tags')
 def list_tags():
     tags = Tag.query.all()
     return jsonify([{'id': t.id, 'name': t.name, 'color': t.color} for t in tags])
@@ -0,0 +1,49 @@
+import hashlib
+from functools import wraps
+from flask import request, Response
+from db.models import db, TableVersion
+
+# Bump when the format of versioned responses changes, so clients don't keep stale bodies
+ETAG_FORMAT_VERSION = 2
+
+def compute_etag(tables):
+    """ETag value for the current request derived from the write counters of the given tables"""
+    versions = dict(
+        db.session.query(TableVersion.table_name, TableVersion.version)
+        .filter(TableVersion.table_name.in_(tables))
+        .all()
+    )
+    key = '|'.join([
+        str(ETAG_FORMAT_VERSION),
+        request.path,
+        request.query_string.decode('utf-8', 'replace'),
+        *[f'{table}={versions.get(table, 0)}' for table in sorted(tables)]
+    ])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def versioned(*tables):
+    """
+    Answer conditional GET requests from per-table version counters.
+
+    The ETag is computed with a single small query before the view runs; if the
+    client already has it, a 304 is returned without serializing anything.
+    The tables are those whose contents end up in the response body.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            etag = compute_etag(tables)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = f(*args, **kwargs)
+                if not isinstance(response, Response) or response.status_code != 200:
+                    return response
+            # Always weak: the same ETag is sent whether or not the body gets
+            # compressed (api/compression.py), and with the 304
+            response.set_etag(etag, weak=True)
+            # Clients may store the body but must revalidate it on every use
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return decorated_function
+    return decorator
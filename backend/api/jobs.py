@@ -0,0 +1,38 @@
+from flask import Blueprint, jsonify, request
+from db.models import db, Job
+from jobs import request_cancel
+from .auth import admin_required
+
+jobs_bp = Blueprint('jobs', __name__)
+
+# List recent jobs, newest first
+@jobs_bp.route('/jobs', methods=['GET'])
+@admin_required
+def list_jobs():
+    query = Job.query
+    status = request.args.get('status')
+    if status:
+        query = query.filter_by(status=status)
+    jobs = query.order_by(Job.id.desc()).limit(50).all()
+    return jsonify([job.to_dict() for job in jobs])
+
+# Get status, progress and result of a job
+@jobs_bp.route('/jobs/<int:job_id>', methods=['GET'])
+@admin_required
+def get_job(job_id):
+    job = db.session.get(Job, job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    response = jsonify(job.to_dict())
+    # Progress changes constantly; never serve it from a cache
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+# Cancel a queued or running job
+@jobs_bp.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+@admin_required
+def cancel_job(job_id):
+    job = db.session.get(Job, job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(request_cancel(job).to_dict())
@@ -0,0 +1,66 @@
+import json
+from datetime import date, datetime
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional dependency, fall back to the standard library
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that encodes dates and datetimes natively as ISO 8601.
+
+    Uses orjson when it is installed and the standard library otherwise, so
+    views and format helpers can hand date/datetime values straight to the
+    encoder. Dates become "YYYY-MM-DD", datetimes "YYYY-MM-DDTHH:MM:SS".
+    Keys are not sorted, which saves time on the large list responses.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        option = self._orjson_option(kwargs) if orjson is not None else None
+        if option is not None:
+            return orjson.dumps(obj, default=self._fallback_default, option=option).decode('utf-8')
+        kwargs.setdefault('default', self._stdlib_default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    @staticmethod
+    def _orjson_option(kwargs):
+        """
+        orjson options equivalent to the json.dumps arguments, or None if
+        orjson cannot produce that output. Flask's response() (jsonify)
+        always passes compact separators, or indent=2 in debug mode.
+        """
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_OMIT_MICROSECONDS
+        for key, value in kwargs.items():
+            if key == 'separators' and tuple(value) == (',', ':'):
+                continue
+            if key == 'indent' and value in (None, 2):
+                option |= orjson.OPT_INDENT_2 if value else 0
+                continue
+            return None
+        return option
+
+    @staticmethod
+    def _fallback_default(o):
+        # orjson handles dates itself; everything else goes through Flask's defaults
+        return DefaultJSONProvider.default(o)
+
+    @staticmethod
+    def _stdlib_default(o):
+        if isinstance(o, datetime):
+            return o.isoformat(timespec='seconds')
+        if isinstance(o, date):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
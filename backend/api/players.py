@@ -1,48 +1,38 @@
+import base64
+import codecs
 import csv
 import io
-from flask import Blueprint, request, jsonify, abort, session
-from db.models import db, Player, Note, TournamentPlayer, Tournament, Game
-from datetime import datetime, date, timedelta
+import json
+import os
+import shutil
+import tempfile
+from flask import Blueprint, Response, current_app, request, jsonify, abort, session, stream_with_context
+from db.models import db, Player, Note, TournamentPlayer, Tournament, ChangeLog
+from datetime import datetime, date
 from .auth import login_required, admin_required
 from .tournaments import format_tournament
+from .streaming import stream_json_array
+from .etag import versioned
+from db.search import build_match_query, RANK_EXPRESSION
+from player_importer import (
+    KEY_TRANSLATIONS, DEFAULT_IMPORT_CHUNK_SIZE, missing_headers,
+    import_player_rows, import_player_csv_chunks, import_player_csv_job
+)
+from jobs import submit_job
+from note_compaction import JOB_KIND as NOTE_COMPACTION_JOB, compact_notes
+from change_log_retention import oldest_valid_cursor
+from participant_relinking import submit_relink_job
 
 players_bp = Blueprint('players', __name__)
 
-# Key translations for notes
-KEY_TRANSLATIONS = {
-    'first_name': 'Vorname',
-    'last_name': 'Nachname',
-    'elo': 'ELO',
-    'fide_number': 'FIDE-Nr.',
-    'fide_elo': 'FIDE-ELO',
-    'birthday': 'Geburtsdatum',
-    'kat': 'Kategorie',
-    'zip': 'PLZ',
-    'town': 'Ort',
-    'country': 'Land',
-    'phone': 'Telefon',
-    'email': 'E-Mail',
-    'email_alternate': 'E-Mail (alternativ)',
-    'club': 'Verein',
-    'is_active': 'Aktiv',
-    'female': 'Weiblich',
-    'p_number': 'PNr',
-    'tags': 'Tags',
-    'rating': 'Wertung',
-    'username': 'Benutzername',
-    'citizen': 'Staatsbuerger',
-    'address': 'Adresse',
-    'fide_title': 'FIDE-Titel'
-}
-
 def format_note(note):
     """Format a note for JSON response."""
     return {
         'id': note.id,
         'content': note.content,
         'manual': note.manual,
-        'created_at': note.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-        'updated_at': note.updated_at.strftime('%Y-%m-%d %H:%M:%S')
+        'created_at': note.created_at,
+        'updated_at': note.updated_at
     }
 
 def format_tournament_data(tp, tournament):
@@ -56,13 +46,150 @@ def format_tournament_data(tp, tournament):
         'points': tp.points,
         'tiebreak1': tp.tiebreak1,
         'tiebreak2': tp.tiebreak2,
-        'games_played': len([g for g in tournament.games if g.player_id == tp.id]),
-        'total_players': len(tournament.tournament_players),
+        'games_played': tp.games_played or 0,
+        'total_players': tournament.total_players or 0,
         'tournament': format_tournament(tournament)
     }
 
+def apply_active_filter(query, active):
+    """Restrict a Player query to the ?active= request argument, if given."""
+    if active is not None:
+        if active.lower() == 'true':
+            query = query.filter_by(is_active=True)
+        elif active.lower() == 'false':
+            query = query.filter_by(is_active=False)
+    return query
+
+EMPTY_TOURNAMENT_STATS = {
+    'total_points': 0,
+    'total_games': 0,
+    'total_points_rated': 0,
+    'total_games_rated': 0
+}
+
+def format_tournament_stats(player):
+    """Materialized tournament stats of the last 360 days (see player_stats.py)."""
+    return player.stats.to_dict() if player.stats else dict(EMPTY_TOURNAMENT_STATS)
+
+def format_tags(player):
+    return [{'id': t.id, 'name': t.name, 'color': t.color} for t in player.tags]
+
+# Optional parts of a player response, selectable with ?fields= and ?embed=
+PLAYER_EXTRA_FIELDS = ('tags', 'tournament_stats')
+PLAYER_EMBEDS = ('notes', 'tournaments')
+
+def parse_player_projection(args, default_embed=PLAYER_EMBEDS):
+    """
+    Parse the ?fields= and ?embed= request arguments.
+
+    fields: comma separated player columns plus 'tags' and 'tournament_stats'
+            (default: all). The id is always included.
+    embed:  comma separated relations to embed, 'notes' and/or 'tournaments'
+            (default: default_embed; pass an empty value to embed nothing).
+
+    Raises ValueError for unknown names.
+    """
+    column_names = [c.name for c in Player.__table__.columns if c.name not in Player.INTERNAL_COLUMNS]
+
+    fields = args.get('fields')
+    if fields is None:
+        columns = column_names
+        extras = set(PLAYER_EXTRA_FIELDS)
+    else:
+        requested = {f.strip() for f in fields.split(',') if f.strip()}
+        unknown = requested - set(column_names) - set(PLAYER_EXTRA_FIELDS)
+        if unknown:
+            raise ValueError(f'Unknown fields: {", ".join(sorted(unknown))}')
+        columns = [c for c in column_names if c in requested or c == 'id']
+        extras = requested & set(PLAYER_EXTRA_FIELDS)
+
+    embed = args.get('embed')
+    if embed is None:
+        embeds = set(default_embed)
+    else:
+        embeds = {e.strip() for e in embed.split(',') if e.strip()}
+        unknown = embeds - set(PLAYER_EMBEDS)
+        if unknown:
+            raise ValueError(f'Unknown embeds: {", ".join(sorted(unknown))}')
+
+    return {'columns': columns, 'fields': extras, 'embed': embeds}
+
+def player_load_options(projection):
+    """Loader options that only fetch the columns and relations of a projection."""
+    options = [db.load_only(*[getattr(Player, c) for c in projection['columns']])]
+    if 'tournament_stats' in projection['fields']:
+        options.append(db.joinedload(Player.stats))
+    if 'tags' in projection['fields']:
+        options.append(db.selectinload(Player.tags))
+    if 'notes' in projection['embed']:
+        options.append(db.selectinload(Player.notes))
+    if 'tournaments' in projection['embed']:
+        options.append(db.selectinload(Player.tournament_players).selectinload(TournamentPlayer.tournament))
+    return options
+
+def format_player(p, projection=None):
+    """Format a player with tags, notes, tournaments and stats for JSON response.
+
+    Only the parts selected by the projection (see parse_player_projection)
+    are included; without a projection the full player is returned.
+    """
+    if projection is None:
+        data = p.to_dict()
+        fields = PLAYER_EXTRA_FIELDS
+        embeds = PLAYER_EMBEDS
+    else:
+        data = {c: getattr(p, c) for c in projection['columns']}
+        fields = projection['fields']
+        embeds = projection['embed']
+
+    if 'tags' in fields:
+        data['tags'] = format_tags(p)
+    if 'notes' in embeds:
+        data['notes'] = [format_note(note) for note in p.notes]
+    if 'tournaments' in embeds:
+        data['tournaments'] = [
+            format_tournament_data(tp, tp.tournament)
+            for tp in sorted(p.tournament_players, 
+                           key=lambda tp: tp.tournament.date if tp.tournament else datetime.min.date(), 
+                           reverse=True)
+        ]
+    if 'tournament_stats' in fields:
+        data['tournament_stats'] = format_tournament_stats(p)
+    return data
+
+# Page size limits for keyset pagination of /players
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+def encode_page_cursor(player):
+    """Opaque cursor pointing behind the given player in (last_name, first_name, id) order."""
+    key = json.dumps([player.last_name, player.first_name, player.id])
+    return base64.urlsafe_b64encode(key.encode('utf-8')).decode('ascii')
+
+def decode_page_cursor(cursor):
+    """Decode a cursor from encode_page_cursor; raises ValueError if it is malformed."""
+    try:
+        last_name, first_name, player_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid page cursor')
+    if not isinstance(player_id, int):
+        raise ValueError('Invalid page cursor')
+    return last_name, first_name, player_id
+
+def player_order():
+    """Stable player ordering, backed by the ix_players_name_order index."""
+    return (Player.last_name.asc(), Player.first_name.asc(), Player.id.asc())
+
+def current_change_cursor():
+    """Return the id of the latest change_log entry, used as delta-sync cursor."""
+    return db.session.query(db.func.max(ChangeLog.id)).scalar() or 0
+
 @players_bp.route('/players', methods=['GET'])
 @login_required
+@versioned('players', 'notes', 'tags', 'player_tags', 'player_stats', 'tournaments', 'tournament_players')
 def list_players():
     """
     List all players with embedded notes and tournament data for offline support.
@@ -72,119 +199,166 @@ def list_players():
     - Notes (for offline access in PlayerDetails)
     - Tournaments (for offline access in PlayerDetails) 
     - Tournament stats
+
+    ?limit=<n> switches to keyset pagination: the response is an object with
+    'players' and 'next_cursor', which is passed as ?after=<cursor> to fetch
+    the next page (see list_players_page).
+
+    ?fields= and ?embed= restrict the response to the given player fields and
+    embedded relations (see parse_player_projection); relations that are not
+    requested are not queried at all.
+
+    The X-Sync-Cursor response header can be passed back as ?since=<cursor>
+    to only fetch what changed in the meantime (see list_player_changes).
     """
     active = request.args.get('active')
-    query = Player.query
-    
-    # Filter by active status if specified
-    if active is not None:
-        if active.lower() == 'true':
-            query = query.filter_by(is_active=True)
-        elif active.lower() == 'false':
-            query = query.filter_by(is_active=False)
-    
-    # Eager load related data to avoid N+1 queries
-    players = query.options(
-        db.selectinload(Player.tags),
-        db.selectinload(Player.notes),
-        db.selectinload(Player.tournament_players).selectinload(TournamentPlayer.tournament)
-    ).order_by(Player.last_name.asc()).all()
-    
-    # Calculate tournament stats in batch to avoid N+1 queries
-    cutoff_date = datetime.now().date() - timedelta(days=360)
+    try:
+        projection = parse_player_projection(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    since = request.args.get('since')
+    if since is not None:
+        return list_player_changes(since, active, projection)
+
+    if request.args.get('limit') is not None or request.args.get('after') is not None:
+        return list_players_page(active, projection)
+
+    # Read the cursor first so changes made while we serialize are sent again next time
+    cursor = current_change_cursor()
+    query = apply_active_filter(Player.query, active)
     
-    # Get all tournament players for active players in one query
-    player_ids = [p.id for p in players]
-    if player_ids:
-        # Calculate points separately (no join to games to avoid duplication)
-        points_query = db.session.query(
-            TournamentPlayer.player_id,
-            db.func.sum(db.func.coalesce(TournamentPlayer.points, 0)).label('total_points')
-        ).join(
-            Tournament, TournamentPlayer.tournament_id == Tournament.id
-        ).filter(
-            TournamentPlayer.player_id.in_(player_ids),
-            Tournament.elo_rating.is_(None),
-            Tournament.date >= cutoff_date
-        ).group_by(TournamentPlayer.player_id).all()
-        
-        # Calculate games count
-        games_query = db.session.query(
-            TournamentPlayer.player_id,
-            db.func.count(Game.id).label('total_games')
-        ).select_from(TournamentPlayer).outerjoin(
-            Tournament, TournamentPlayer.tournament_id == Tournament.id
-        ).outerjoin(
-            Game, db.and_(
-                Game.tournament_id == Tournament.id,
-                Game.player_id == TournamentPlayer.id
-            )
-        ).filter(
-            TournamentPlayer.player_id.in_(player_ids),
-            Tournament.elo_rating.is_(None),
-            Tournament.date >= cutoff_date
-        ).group_by(TournamentPlayer.player_id).all()
-
-        # total games_rated and total_points_rated
-        rated_points_query = db.session.query(
-            TournamentPlayer.player_id,
-            db.func.sum(db.func.coalesce(TournamentPlayer.points, 0)).label('total_points_rated')
-        ).join(
-            Tournament, TournamentPlayer.tournament_id == Tournament.id
-        ).filter(
-            TournamentPlayer.player_id.in_(player_ids),
-            Tournament.elo_rating.isnot(None),
-            Tournament.date >= cutoff_date
-        ).group_by(TournamentPlayer.player_id).all()
-
-        rated_games_query = db.session.query(
-            TournamentPlayer.player_id,
-            db.func.count(Game.id).label('total_games_rated')
-        ).select_from(TournamentPlayer).outerjoin(
-            Tournament, TournamentPlayer.tournament_id == Tournament.id
-        ).outerjoin(
-            Game, db.and_(
-                Game.tournament_id == Tournament.id,
-                Game.player_id == TournamentPlayer.id
-            )
-        ).filter(
-            TournamentPlayer.player_id.in_(player_ids),
-            Tournament.elo_rating.isnot(None),
-            Tournament.date >= cutoff_date
-        ).group_by(TournamentPlayer.player_id).all()
-
-        # Convert to dict for easy lookup
-        points_dict = {stat.player_id: stat.total_points or 0 for stat in points_query}
-        games_dict = {stat.player_id: stat.total_games or 0 for stat in games_query}
-        rated_points_dict = {stat.player_id: stat.total_points_rated or 0 for stat in rated_points_query}
-        rated_games_dict = {stat.player_id: stat.total_games_rated or 0 for stat in rated_games_query}
-
-        tournament_stats = {}
-        for player_id in player_ids:
-            tournament_stats[player_id] = {
-                'total_points': points_dict.get(player_id, 0),
-                'total_games': games_dict.get(player_id, 0),
-                'total_points_rated': rated_points_dict.get(player_id, 0),
-                'total_games_rated': rated_games_dict.get(player_id, 0)
-            }
-    else:
-        tournament_stats = {}
+    # Eager load requested related data to avoid N+1 queries; stats come from the materialized table
+    query = query.options(*player_load_options(projection)).order_by(*player_order())
     
-    return jsonify([
-        {
-            **p.to_dict(),
-            'tags': [{'id': t.id, 'name': t.name, 'color': t.color} for t in p.tags],
-            'notes': [format_note(note) for note in p.notes],
-            'tournaments': [
-                format_tournament_data(tp, tp.tournament)
-                for tp in sorted(p.tournament_players, 
-                               key=lambda tp: tp.tournament.date if tp.tournament else datetime.min.date(), 
-                               reverse=True)
-            ],
-            'tournament_stats': tournament_stats.get(p.id, {'total_points': 0, 'total_games': 0})
-        }
-        for p in players
-    ])
+    response = stream_json_array(query, lambda p: format_player(p, projection))
+    response.headers['X-Sync-Cursor'] = str(cursor)
+    return response
+
+def list_players_page(active, projection):
+    """
+    Keyset-paginated mode of list_players.
+
+    Pages are ordered by (last_name, first_name, id) and continue strictly
+    after the ?after= cursor, so each page is a single index range scan no
+    matter how deep the client has paged. next_cursor is null on the last page.
+    """
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    query = apply_active_filter(Player.query, active)
+    after = request.args.get('after')
+    if after:
+        try:
+            last_name, first_name, player_id = decode_page_cursor(after)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        query = query.filter(
+            db.tuple_(Player.last_name, Player.first_name, Player.id) > (last_name, first_name, player_id)
+        )
+
+    # Fetch one extra row to know whether there is a next page
+    players = query.options(*player_load_options(projection)).order_by(*player_order()).limit(limit + 1).all()
+    has_more = len(players) > limit
+    players = players[:limit]
+
+    return jsonify({
+        'players': [format_player(p, projection) for p in players],
+        'limit': limit,
+        'next_cursor': encode_page_cursor(players[-1]) if has_more else None
+    })
+
+def list_player_changes(since, active, projection):
+    """
+    Delta-sync mode of list_players: everything that changed after the cursor.
+
+    - players: player rows (with tags and stats) whose data, tags or
+      tournament participations changed
+    - deleted_players: ids of deleted players, or players no longer matching
+      the ?active= filter
+    - notes / deleted_notes: created or changed notes, and removed notes
+    - tournaments / deleted_tournaments: changed participations, and
+      participations that were deleted or moved to another player
+    - cursor: pass as ?since= on the next poll
+
+    Notes and tournaments are only reported when embedded by the projection.
+    Cursors older than the pruned part of change_log (see
+    change_log_retention.py) get 410 Gone; the client has to fetch the full
+    list again and continue with its X-Sync-Cursor.
+    """
+    try:
+        since = int(since)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    if since < oldest_valid_cursor():
+        return jsonify({'error': 'Cursor too old, do a full resync', 'full_resync': True}), 410
+
+    changes = ChangeLog.query.filter(ChangeLog.id > since).order_by(ChangeLog.id.asc()).all()
+    cursor = changes[-1].id if changes else since
+
+    changed_player_ids = set()
+    changed_note_ids = {}
+    changed_tp_ids = set()
+    removed_tps = set()
+    for change in changes:
+        if change.table_name == 'notes':
+            if 'notes' in projection['embed']:
+                changed_note_ids[change.row_id] = change.player_id
+            continue
+        if change.player_id is None:
+            continue
+        changed_player_ids.add(change.player_id)
+        if change.table_name == 'tournament_players' and 'tournaments' in projection['embed']:
+            if change.operation == 'delete':
+                removed_tps.add((change.row_id, change.player_id))
+            changed_tp_ids.add(change.row_id)
+
+    # Players
+    # Notes and tournaments are reported separately below, not embedded per player
+    player_projection = {**projection, 'embed': set()}
+    players = []
+    deleted_players = set(changed_player_ids)
+    if changed_player_ids:
+        players = apply_active_filter(
+            Player.query.filter(Player.id.in_(changed_player_ids)), active
+        ).options(*player_load_options(player_projection)).all()
+        deleted_players -= {p.id for p in players}
+
+    # Notes
+    notes = []
+    deleted_notes = []
+    if changed_note_ids:
+        current_notes = {n.id: n for n in Note.query.filter(Note.id.in_(changed_note_ids.keys())).all()}
+        for note_id, player_id in changed_note_ids.items():
+            note = current_notes.get(note_id)
+            if note:
+                notes.append({**format_note(note), 'player_id': note.player_id})
+            else:
+                deleted_notes.append({'id': note_id, 'player_id': player_id})
+
+    # Tournament participations
+    tournaments = []
+    if changed_tp_ids:
+        current_tps = TournamentPlayer.query.filter(
+            TournamentPlayer.id.in_(changed_tp_ids)
+        ).options(db.selectinload(TournamentPlayer.tournament)).all()
+        for tp in current_tps:
+            removed_tps.discard((tp.id, tp.player_id))
+            if tp.player_id is not None:
+                tournaments.append({**format_tournament_data(tp, tp.tournament), 'player_id': tp.player_id})
+
+    return jsonify({
+        'cursor': cursor,
+        'players': [format_player(p, player_projection) for p in players],
+        'deleted_players': sorted(deleted_players),
+        'notes': notes,
+        'deleted_notes': deleted_notes,
+        'tournaments': tournaments,
+        'deleted_tournaments': [{'id': tp_id, 'player_id': player_id} for tp_id, player_id in sorted(removed_tps)]
+    })
 
 @players_bp.route('/players', methods=['POST'])
 @login_required
@@ -201,65 +375,70 @@ def create_player():
     db.session.commit()
     return jsonify({'id': player.id, 'username': player.username, 'rating': player.rating}), 201
 
+# Search players by name, club, town and tags
+@players_bp.route('/players/search', methods=['GET'])
+@login_required
+def search_players():
+    """
+    Full-text search over the player_search FTS5 index (see db/search.py).
+
+    Every word of ?q= is matched as a prefix, umlauts and their
+    transliterations are folded, and results are ranked with name matches
+    first. Accepts ?active=, ?limit= (default 20, max 100) and the projection
+    arguments of list_players; nothing is embedded by default.
+    """
+    try:
+        projection = parse_player_projection(request.args, default_embed=())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        limit = int(request.args.get('limit', DEFAULT_SEARCH_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+
+    match = build_match_query(request.args.get('q', ''))
+    if match is None:
+        return jsonify([])
+
+    # Rank and limit inside SQLite so only the returned players are loaded
+    conditions = ['player_search MATCH :match']
+    active = request.args.get('active')
+    if active is not None and active.lower() in ('true', 'false'):
+        conditions.append('players.is_active = :active')
+    ranked_ids = [row.id for row in db.session.execute(
+        db.text(
+            "SELECT players.id FROM player_search JOIN players ON players.id = player_search.rowid "
+            f"WHERE {' AND '.join(conditions)} ORDER BY {RANK_EXPRESSION} LIMIT :limit"
+        ),
+        {'match': match, 'active': active is not None and active.lower() == 'true', 'limit': limit}
+    )]
+    if not ranked_ids:
+        return jsonify([])
+
+    rank = {player_id: i for i, player_id in enumerate(ranked_ids)}
+    players = Player.query.options(*player_load_options(projection)).filter(Player.id.in_(ranked_ids)).all()
+    players.sort(key=lambda p: rank[p.id])
+
+    return jsonify([format_player(p, projection) for p in players])
+
 # Get a single player by ID (including tags, notes, and tournaments)
 @players_bp.route('/players/<int:player_id>', methods=['GET'])
 @login_required
 def get_player(player_id):
+    try:
+        projection = parse_player_projection(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     # Use eager loading to avoid N+1 queries
-    player = Player.query.options(
-        db.selectinload(Player.tags),
-        db.selectinload(Player.notes),
-        db.selectinload(Player.tournament_players).selectinload(TournamentPlayer.tournament)
-    ).get(player_id)
+    player = Player.query.options(*player_load_options(projection)).filter_by(id=player_id).first()
     
     if not player:
         return jsonify({'error': 'Player not found'}), 404
     
-    # Calculate tournament stats using separate queries to avoid duplication
-    cutoff_date = datetime.now().date() - timedelta(days=360)
-    
-    # Calculate points
-    points_query = db.session.query(
-        db.func.sum(db.func.coalesce(TournamentPlayer.points, 0)).label('total_points')
-    ).join(
-        Tournament, TournamentPlayer.tournament_id == Tournament.id
-    ).filter(
-        TournamentPlayer.player_id == player_id,
-        Tournament.date >= cutoff_date
-    ).first()
-    
-    # Calculate games
-    games_query = db.session.query(
-        db.func.count(Game.id).label('total_games')
-    ).select_from(TournamentPlayer).outerjoin(
-        Tournament, TournamentPlayer.tournament_id == Tournament.id
-    ).outerjoin(
-        Game, db.and_(
-            Game.tournament_id == Tournament.id,
-            Game.player_id == TournamentPlayer.id
-        )
-    ).filter(
-        TournamentPlayer.player_id == player_id,
-        Tournament.date >= cutoff_date
-    ).first()
-    
-    tournament_stats = {
-        'total_points': points_query.total_points or 0,
-        'total_games': games_query.total_games or 0
-    }
-    
-    return jsonify({
-        **player.to_dict(),
-        'tags': [{'id': t.id, 'name': t.name, 'color': t.color} for t in player.tags],
-        'notes': [format_note(note) for note in player.notes],
-        'tournaments': [
-            format_tournament_data(tp, tp.tournament)
-            for tp in sorted(player.tournament_players, 
-                           key=lambda tp: tp.tournament.date if tp.tournament else datetime.min.date(), 
-                           reverse=True)
-        ],
-        'tournament_stats': tournament_stats
-    })
+    return jsonify(format_player(player, projection))
 
 @players_bp.route('/players/<int:player_id>', methods=['PUT', 'PATCH'])
 @login_required
@@ -285,31 +464,9 @@ def update_player(player_id):
 
     db.session.commit()
     
-    # Calculate tournament stats using optimized query
-    cutoff_date = datetime.now().date() - timedelta(days=360)
-    tournament_stats_query = db.session.query(
-        db.func.sum(db.func.coalesce(TournamentPlayer.points, 0)).label('total_points'),
-        db.func.count(Game.id).label('total_games')
-    ).outerjoin(
-        Tournament, TournamentPlayer.tournament_id == Tournament.id
-    ).outerjoin(
-        Game, db.and_(
-            Game.tournament_id == Tournament.id,
-            Game.player_id == TournamentPlayer.id
-        )
-    ).filter(
-        TournamentPlayer.player_id == player_id,
-        Tournament.date >= cutoff_date
-    ).first()
-    
-    tournament_stats = {
-        'total_points': tournament_stats_query.total_points or 0,
-        'total_games': tournament_stats_query.total_games or 0
-    }
-    
     return jsonify({
         **player.to_dict(),
-        'tournament_stats': tournament_stats
+        'tournament_stats': format_tournament_stats(player)
     })
 
 @players_bp.route('/players/<int:player_id>', methods=['DELETE'])
@@ -322,129 +479,128 @@ def delete_player(player_id):
     db.session.commit()
     return jsonify({'status': 'deleted'})
 
-def parse_birthday(s):
-    s = s.strip()
-    if not s:
-        return None
-    # Accept formats: YYYYMMDD or YYYY-MM-DD
-    try:
-        if '-' in s:
-            return date.fromisoformat(s)
-        elif len(s) == 8:
-            return date(int(s[:4]), int(s[4:6]), int(s[6:8]))
-    except Exception:
-        return None
-    return None
-
 @players_bp.route('/players-import-csv', methods=['POST'])
 @admin_required
 def import_players_csv():
+    """
+    Import the federation member CSV.
+
+    By default the file (max 2 MB) is imported in a single transaction. With
+    ?stream=true the upload is parsed incrementally without a size limit and
+    committed in chunks of ?chunk_size= rows (default CSV_IMPORT_CHUNK_SIZE);
+    the response is NDJSON with one progress line per committed chunk and a
+    final line with "done": true, or "error" if a chunk failed. With
+    ?background=true the chunked import runs as a background job; the
+    response is the job (202), to be polled at /api/jobs/<id>.
+
+    Imports that create players start a relinking job for unlinked
+    tournament participants; its id is returned as relink_job_id.
+    """
     if 'file' not in request.files:
         print("No file uploaded")
         return jsonify({'error': 'No file uploaded'}), 400
     file = request.files['file']
     if not file.filename.endswith('.csv'):
         return jsonify({'error': 'Invalid file type'}), 400
+
+    if request.args.get('stream', '').lower() == 'true':
+        return import_players_csv_stream(file)
+    if request.args.get('background', '').lower() == 'true':
+        return import_players_csv_background(file)
+
     file.seek(0, 2)  # Move to end of file
     size = file.tell()
     file.seek(0)  # Reset to start
     if size > 2 * 1024 * 1024:
-        return jsonify({'error': 'File too large (max 2MB)'}), 400
+        return jsonify({'error': 'File too large (max 2MB), use ?stream=true for larger files'}), 400
     
     stream = io.StringIO(file.stream.read().decode('utf-8'))
     reader = csv.DictReader(stream, delimiter=';')
-    required_headers = [
-        'PNr', 'Vorname', 'Nachname', 'elo', 'Funktion', 'Verein', 'Staat', 'Gebdat', 'Sex'
-    ]
-    missing = [h for h in required_headers if h not in reader.fieldnames]
+    missing = missing_headers(reader.fieldnames)
     if missing:
         return jsonify({'error': f'Missing required headers: {", ".join(missing)}'}), 400
-    imported = 0
-   
-    # Define mapping from CSV to Player fields
-    field_map = [
-        ('first_name', 'Vorname', str),
-        ('last_name', 'Nachname', str),
-        ('elo', 'elo', int),
-        ('fide_number', 'FideNr', lambda v: int(v) if v else None),
-        ('fide_elo', 'FideElo', lambda v: int(v) if v else None),
-        ('birthday', 'Gebdat', parse_birthday),
-        ('kat', 'Kategorie', str),
-        ('zip', 'Plz', str),
-        ('town', 'Ort', str),
-        ('country', 'Staat', str),
-        ('citizen', 'Staatsbuerger', str),
-        ('phone', 'Telefon', str),
-        ('email', 'Email', str),
-        ('club', 'Verein', str),
-        ('address', 'Adresse', str),
-        ('fide_title', 'fidetitel', str)
-    ]
-
-    for row in reader:
-        # Only import Stamm-Spieler
-        if row.get('Funktion', '').strip() != 'Stamm-Spieler':
-            continue
-        
-        # Determine is_active from bis column
-        bis_str = row.get('bis', '').strip()
-        is_active = None
-        if bis_str:
-            try:
-                bis_date = datetime.strptime(bis_str, '%d.%m.%Y').date()
-                if bis_date < date.today():
-                    is_active = False
-            except Exception:
-                pass
-        
-        p_number = int(row.get('PNr', 0))
-        player = Player.query.filter_by(p_number=p_number).first()
-
-        # Determine female from Sex column
-        sex_value = row.get('Sex', '').strip().lower()
-        is_female = sex_value in ('w', 'f')
-
-        # Normalize names: some names are entered in all UPPERCASE.
-        for key in ['Vorname', 'Nachname', 'Verein', 'Ort', 'Staat', 'Adresse']:
-            if key in row:
-                row[key] = row[key].strip().title()
-
-        if player:
-            # Update existing player and track changes
-            changes = []
-
-            if is_active is not None and player.is_active != is_active:
-                changes.append(f"Aktiv: '{player.is_active}' → '{is_active}'")
-                player.is_active = is_active
-            
-            for attr, csv_key, cast in field_map:
-                new_value = cast(row.get(csv_key, ''))
-                old_value = getattr(player, attr)
-                if old_value != new_value:
-                    key_label = KEY_TRANSLATIONS.get(attr, attr)
-                    changes.append(f"{key_label}: '{old_value}' → '{new_value}'")
-                    setattr(player, attr, new_value)
-            note_text = "Importiert"
-            if changes:
-                note_text += ": " + "; ".join(changes)
-            note = Note(player=player, content=note_text, created_at=datetime.now())
-            db.session.add(note)
-            
-        else:
-            # Create new player
-            player = Player(
-                p_number=p_number,
-                **{attr: cast(row.get(csv_key, '')) for attr, csv_key, cast in field_map},
-                is_active=False,
-                female=is_female
-            )
-            db.session.add(player)
-            note = Note(player=player, content="Importiert", created_at=datetime.now())
-            db.session.add(note)
-            imported += 1
-    
+
+    # Existing players are looked up and written in bulk, see player_importer.py
+    result = import_player_rows(reader)
     db.session.commit()
-    return jsonify({'imported': imported}), 201
+    if result['imported']:
+        # Earlier tournaments may have participants that are these new players
+        result['relink_job_id'] = submit_relink_job(user_id=session.get('user_id')).id
+    return jsonify(result), 201
+
+def get_import_chunk_size():
+    """The ?chunk_size= argument or the configured default; raises ValueError"""
+    chunk_size = int(request.args.get('chunk_size', current_app.config.get('CSV_IMPORT_CHUNK_SIZE', DEFAULT_IMPORT_CHUNK_SIZE)))
+    return max(1, chunk_size)
+
+def check_csv_headers(upload):
+    """Error message if the CSV in upload (binary, at the start) cannot be imported, else None"""
+    try:
+        reader = csv.DictReader(codecs.iterdecode(upload, 'utf-8'), delimiter=';')
+        missing = missing_headers(reader.fieldnames)
+    except UnicodeDecodeError:
+        return 'File is not UTF-8 encoded'
+    if missing:
+        return f'Missing required headers: {", ".join(missing)}'
+    return None
+
+def import_players_csv_background(file):
+    """Background job mode of import_players_csv"""
+    try:
+        chunk_size = get_import_chunk_size()
+    except ValueError:
+        return jsonify({'error': 'Invalid chunk_size'}), 400
+
+    # The job outlives the request, so it gets its own copy of the upload
+    with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as upload:
+        shutil.copyfileobj(file.stream, upload)
+        upload.seek(0)
+        error = check_csv_headers(upload)
+    if error:
+        os.remove(upload.name)
+        return jsonify({'error': error}), 400
+
+    job = submit_job('player_csv_import', import_player_csv_job, upload.name, chunk_size, user_id=session.get('user_id'))
+    return jsonify(job.to_dict()), 202
+
+def import_players_csv_stream(file):
+    """Chunked, streaming mode of import_players_csv"""
+    try:
+        chunk_size = get_import_chunk_size()
+    except ValueError:
+        return jsonify({'error': 'Invalid chunk_size'}), 400
+
+    # Flask closes uploaded files when the view returns, before the response is
+    # streamed; keep a private copy (on disk) to read from while importing
+    upload = tempfile.TemporaryFile()
+    shutil.copyfileobj(file.stream, upload)
+    upload.seek(0)
+
+    error = check_csv_headers(upload)
+    if error:
+        upload.close()
+        return jsonify({'error': error}), 400
+    upload.seek(0)
+    # Decode line by line instead of reading the whole upload
+    reader = csv.DictReader(codecs.iterdecode(upload, 'utf-8'), delimiter=';')
+
+    def generate():
+        dumps = current_app.json.dumps
+        progress = {'chunk': 0, 'rows': 0, 'imported': 0, 'updated': 0, 'unchanged': 0}
+        try:
+            for progress in import_player_csv_chunks(reader, chunk_size):
+                yield dumps(progress) + '\n'
+        except Exception as e:
+            db.session.rollback()
+            yield dumps({**progress, 'error': str(e)}) + '\n'
+            return
+        finally:
+            upload.close()
+        if progress['imported']:
+            progress['relink_job_id'] = submit_relink_job(user_id=session.get('user_id')).id
+        yield dumps({**progress, 'done': True}) + '\n'
+
+    return Response(stream_with_context(generate()), status=201, mimetype='application/x-ndjson')
 
 @players_bp.route('/players/<int:player_id>/notes', methods=['GET'])
 @login_required
@@ -501,6 +657,13 @@ def delete_player_note(player_id, note_id):
     db.session.commit()
     return jsonify({'message': 'Note deleted successfully'}), 200
 
+# Compact automatic notes in the background (also run nightly by compact_notes.py)
+@players_bp.route('/notes/compact', methods=['POST'])
+@admin_required
+def compact_player_notes():
+    job = submit_job(NOTE_COMPACTION_JOB, compact_notes, user_id=session.get('user_id'))
+    return jsonify(job.to_dict()), 202
+
 @players_bp.route('/players/<int:player_id>/tournaments', methods=['GET'])
 @login_required
 def get_player_tournaments(player_id):
@@ -0,0 +1,29 @@
+from flask import Response, current_app, stream_with_context
+
+# Rows fetched per round trip and encoded per chunk when streaming
+STREAM_BATCH_SIZE = 500
+
+def stream_json_array(query, format_item, batch_size=STREAM_BATCH_SIZE):
+    """
+    Stream the results of a query as a JSON array.
+
+    Rows are fetched with yield_per and encoded one batch at a time, so neither
+    the full list of ORM objects nor the complete JSON document is ever held in
+    memory, and the first bytes go out before the last row has been loaded.
+    """
+    def generate():
+        dumps = current_app.json.dumps
+        yield '['
+        chunk = []
+        first = True
+        for item in query.yield_per(batch_size):
+            chunk.append(dumps(format_item(item)))
+            if len(chunk) >= batch_size:
+                yield ('' if first else ',') + ','.join(chunk)
+                first = False
+                chunk = []
+        if chunk:
+            yield ('' if first else ',') + ','.join(chunk)
+        yield ']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
@@ -4,11 +4,17 @@ import io
 import re
 import os
 import tempfile
-import pandas as pd
 from flask import Blueprint, request, jsonify, abort, session
-from db.models import db, Player, Note, Tournament, TournamentPlayer, Game
+from db.models import db, Player, Note, Tournament, TournamentPlayer, Game, MatchCandidate
 from datetime import datetime, date
 from .auth import login_required, admin_required
+from .streaming import stream_json_array
+from .etag import versioned
+from player_stats import refresh_player_stats, refresh_tournament_player_stats
+from tournament_importer import update_tournament_counts, set_player_active_if_youth
+from jobs import submit_job
+from player_matching import record_alias, forget_alias
+from participant_relinking import submit_relink_job
 
 tournaments_bp = Blueprint('tournaments', __name__)
 
@@ -30,7 +36,7 @@ def format_tournament_player(tp):
             'last_name': tp.player.last_name,
             'kat': tp.player.kat,
             'female': tp.player.female,
-            'birthday': tp.player.birthday.isoformat() if tp.player.birthday else None
+            'birthday': tp.player.birthday
         } if tp.player else None
     }
 
@@ -46,11 +52,19 @@ def format_tournament(t):
         'chess_results_url': t.chess_results_url,
         'rounds': t.rounds,
         'time_control': t.time_control,
-        'imported_at': t.imported_at.isoformat() if t.imported_at else None,
+        'imported_at': t.imported_at,
         'elo_rating': t.elo_rating,
         'elo_rated_rounds': t.elo_rated_rounds
     }
 
+def refresh_game_player_stats(*tournament_player_ids):
+    """Refresh the stats of the players behind the given TournamentPlayer ids"""
+    tournament_player_ids = [tp_id for tp_id in tournament_player_ids if tp_id is not None]
+    if tournament_player_ids:
+        refresh_player_stats(
+            tp.player_id for tp in TournamentPlayer.query.filter(TournamentPlayer.id.in_(tournament_player_ids))
+        )
+
 def format_game(g):
     """Helper function to format game data consistently"""
     return {
@@ -66,9 +80,10 @@ def format_game(g):
 
 # --- Tournament Endpoints ---
 @tournaments_bp.route('/tournaments', methods=['GET'])
+@versioned('tournaments')
 def list_tournaments():
-    tournaments = Tournament.query.order_by(Tournament.date.desc()).all()
-    return jsonify([format_tournament(t) for t in tournaments])
+    query = Tournament.query.order_by(Tournament.date.desc())
+    return stream_json_array(query, format_tournament)
 
 @tournaments_bp.route('/tournaments/<int:tournament_id>', methods=['GET'])
 def get_tournament(tournament_id):
@@ -103,6 +118,8 @@ def update_tournament(tournament_id):
     
     t.location = data.get('location', t.location)
     t.is_team = data.get('is_team', t.is_team)
+    # The date decides whether the tournament counts towards the stats window
+    refresh_tournament_player_stats(t.id)
     db.session.commit()
     return jsonify(format_tournament(t))
 
@@ -110,12 +127,15 @@ def update_tournament(tournament_id):
 @admin_required
 def delete_tournament(tournament_id):
     t = Tournament.query.options(db.joinedload(Tournament.tournament_players), db.joinedload(Tournament.games)).get_or_404(tournament_id)
+    player_ids = [tp.player_id for tp in t.tournament_players]
     db.session.delete(t)
+    refresh_player_stats(player_ids)
     db.session.commit()
     return '', 204
 
 # --- TournamentPlayer Endpoints ---
 @tournaments_bp.route('/tournaments/<int:tournament_id>/players', methods=['GET'])
+@versioned('tournament_players', 'players')
 def list_tournament_players(tournament_id):
     players = TournamentPlayer.query.filter_by(tournament_id=tournament_id).options(db.joinedload(TournamentPlayer.player)).all()
     return jsonify([format_tournament_player(tp) for tp in players])
@@ -139,6 +159,8 @@ def create_tournament_player(tournament_id):
         tiebreak2=data.get('tiebreak2')
     )
     db.session.add(tp)
+    update_tournament_counts([tournament_id])
+    refresh_player_stats([tp.player_id])
     db.session.commit()
     return jsonify({'player_id': tp.player_id, 'name': tp.name}), 201
 
@@ -152,6 +174,7 @@ def update_tournament_player(tournament_id, player_id):
     tp.tiebreak1 = data.get('tiebreak1', tp.tiebreak1)
     tp.tiebreak2 = data.get('tiebreak2', tp.tiebreak2)
     tp.name = data.get('name', tp.name)
+    refresh_player_stats([tp.player_id])
     db.session.commit()
     return jsonify({'player_id': tp.player_id, 'name': tp.name})
 
@@ -160,14 +183,16 @@ def update_tournament_player(tournament_id, player_id):
 def delete_tournament_player(tournament_id, player_id):
     tp = TournamentPlayer.query.filter_by(tournament_id=tournament_id, player_id=player_id).first_or_404()
     db.session.delete(tp)
+    update_tournament_counts([tournament_id])
+    refresh_player_stats([player_id])
     db.session.commit()
     return '', 204
 
 # --- Game Endpoints ---
 @tournaments_bp.route('/tournaments/<int:tournament_id>/games', methods=['GET'])
 def list_games(tournament_id):
-    games = Game.query.filter_by(tournament_id=tournament_id).all()
-    return jsonify([format_game(g) for g in games])
+    query = Game.query.filter_by(tournament_id=tournament_id).order_by(Game.id)
+    return stream_json_array(query, format_game)
 
 @tournaments_bp.route('/tournaments/<int:tournament_id>/games/<int:game_id>', methods=['GET'])
 def get_game(tournament_id, game_id):
@@ -188,6 +213,8 @@ def create_game(tournament_id):
         pgn=data['pgn']
     )
     db.session.add(g)
+    update_tournament_counts([tournament_id])
+    refresh_game_player_stats(g.player_id)
     db.session.commit()
     return jsonify({'id': g.id}), 201
 
@@ -196,12 +223,15 @@ def create_game(tournament_id):
 def update_game(tournament_id, game_id):
     g = Game.query.filter_by(tournament_id=tournament_id, id=game_id).first_or_404()
     data = request.json
+    old_player_id = g.player_id
     g.player_id = data.get('player_id', g.player_id)
     g.opponent_id = data.get('opponent_id', g.opponent_id)
     g.player_color = data.get('player_color', g.player_color)
     g.result = data.get('result', g.result)
     g.round_number = data.get('round_number', g.round_number)
     g.pgn = data.get('pgn', g.pgn)
+    update_tournament_counts([tournament_id])
+    refresh_game_player_stats(old_player_id, g.player_id)
     db.session.commit()
     return jsonify({'id': g.id})
 
@@ -210,6 +240,8 @@ def update_game(tournament_id, game_id):
 def delete_game(tournament_id, game_id):
     g = Game.query.filter_by(tournament_id=tournament_id, id=game_id).first_or_404()
     db.session.delete(g)
+    update_tournament_counts([tournament_id])
+    refresh_game_player_stats(g.player_id)
     db.session.commit()
     return '', 204
 
@@ -224,6 +256,12 @@ def disassociate_player_from_tournament(tp_id):
     
     # Set player_id to null to disassociate
     tp.player_id = None
+    # The name no longer identifies that player in future imports, and
+    # automatic matching (imports, relinking) must not link them again
+    forget_alias(old_player_id, tp.name)
+    if old_player_id:
+        tp.rejected_player_id = old_player_id
+    refresh_player_stats([old_player_id])
     db.session.commit()
     
     return jsonify({
@@ -233,6 +271,79 @@ def disassociate_player_from_tournament(tp_id):
         'message': 'Player disassociated from tournament'
     })
 
+@tournaments_bp.route('/tournament-players/<int:tp_id>/associate', methods=['PUT'])
+@admin_required
+def associate_player_with_tournament(tp_id):
+    """Associate an unlinked tournament participant with a player, e.g. a reviewed match candidate"""
+    tp = TournamentPlayer.query.get_or_404(tp_id)
+    player = db.session.get(Player, (request.json or {}).get('player_id'))
+    if not player:
+        return jsonify({'error': 'Player not found'}), 404
+
+    old_player_id = tp.player_id
+    tp.player_id = player.id
+    # Replacing a player rejects it like a disassociation; choosing a rejected player again lifts the rejection
+    if old_player_id and old_player_id != player.id:
+        tp.rejected_player_id = old_player_id
+    elif tp.rejected_player_id == player.id:
+        tp.rejected_player_id = None
+    # Candidates are only kept for unlinked participants
+    tp.match_candidates = []
+    forget_alias(old_player_id, tp.name)
+    # Future imports resolve this name to the player right away
+    record_alias(player.id, tp.name, source='manual')
+    set_player_active_if_youth(player)
+    refresh_player_stats([old_player_id, player.id])
+    db.session.commit()
+
+    return jsonify({
+        'id': tp.id,
+        'tournament_id': tp.tournament_id,
+        'player_id': player.id,
+        'old_player_id': old_player_id,
+        'message': 'Player associated with tournament'
+    })
+
+# Link participants without a player that can be matched now, e.g. after new members were imported
+@tournaments_bp.route('/tournament-players/relink', methods=['POST'])
+@admin_required
+def relink_tournament_players():
+    job = submit_relink_job(user_id=session.get('user_id'))
+    return jsonify(job.to_dict()), 202
+
+# Unlinked participants with the players they probably are, best candidate first
+@tournaments_bp.route('/match-candidates', methods=['GET'])
+@admin_required
+def list_match_candidates():
+    query = TournamentPlayer.query.filter(
+        TournamentPlayer.player_id.is_(None),
+        TournamentPlayer.match_candidates.any()
+    ).options(
+        db.joinedload(TournamentPlayer.tournament),
+        db.selectinload(TournamentPlayer.match_candidates).joinedload(MatchCandidate.player)
+    )
+    tournament_id = request.args.get('tournament_id', type=int)
+    if tournament_id:
+        query = query.filter(TournamentPlayer.tournament_id == tournament_id)
+
+    result = []
+    for tp in query.order_by(TournamentPlayer.tournament_id.desc(), TournamentPlayer.id).all():
+        candidates = sorted(tp.match_candidates, key=lambda c: -c.score)
+        result.append({
+            'id': tp.id,
+            'name': tp.name,
+            'tournament_id': tp.tournament_id,
+            'tournament_name': tp.tournament.name,
+            'candidates': [{
+                'player_id': c.player_id,
+                'first_name': c.player.first_name,
+                'last_name': c.player.last_name,
+                'club': c.player.club,
+                'score': round(c.score, 3)
+            } for c in candidates]
+        })
+    return jsonify(result)
+
 # --- Crawler Endpoints ---
 @tournaments_bp.route('/crawler/run', methods=['POST'])
 @admin_required
@@ -311,10 +422,30 @@ def crawler_status():
             'message': f'Error getting crawler status: {str(e)}'
         }), 500
 
+def import_tournament_job(ctx, tournament_id):
+    """Background job importing a tournament from chess-results.com"""
+    from import_tournament import import_tournament
+    from chess_results_crawler import ChessResultsCrawler
+
+    ctx.report(step='login')
+    crawler = ChessResultsCrawler()
+    if not crawler.login():
+        raise RuntimeError('Failed to login to chess-results.com')
+
+    def progress(step):
+        ctx.report(step=step)
+        return not ctx.cancel_requested
+
+    result = import_tournament(crawler, tournament_id, force=False, progress=progress)
+    ctx.check_cancelled()
+    if not result.get('success'):
+        raise RuntimeError(result.get('error', 'Unknown error occurred'))
+    return {'success': True, 'tournament_id': tournament_id}
+
 @tournaments_bp.route('/tournaments/import', methods=['POST'])
 @admin_required
 def import_tournament_by_url():
-    """Import a tournament by URL"""
+    """Import a tournament by URL (as a background job with ?background=true)"""
     try:
         data = request.get_json()
         tournament_url = data.get('url')
@@ -341,6 +472,10 @@ def import_tournament_by_url():
                 'success': False,
                 'message': str(e)
             }), 400
+
+        if request.args.get('background', '').lower() == 'true':
+            job = submit_job('tournament_import', import_tournament_job, tournament_id, user_id=session.get('user_id'))
+            return jsonify(job.to_dict()), 202
         
         # Initialize crawler and login
         crawler = ChessResultsCrawler()
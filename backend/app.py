@@ -1,12 +1,25 @@
 import os
 from flask import Flask, render_template
 from api.endpoints import register_blueprints
+from api.json_provider import FastJSONProvider
+from api.compression import init_compression
 from db.models import db
-from sqlalchemy import text, inspect, Boolean, Integer, String, Date, Float, Text
-from db.models import Player, Tournament, TournamentPlayer, Game, User, Note, Tag
+from db.triggers import install_triggers
+from db.search import install_search_index
+from player_stats import refresh_missing_player_stats
+from tournament_importer import update_tournament_counts
+from jobs import fail_interrupted_jobs
+from player_matching import backfill_name_keys
+from sqlalchemy import event, text, inspect, Boolean, Integer, String, Date, Float, Text
+from db.models import Player, PlayerStats, Tournament, TournamentPlayer, Game, User, Note, Tag, ChangeLog, TableVersion, Job, MatchCandidate, PlayerAlias
+
+# Models whose tables are migrated in place by add_missing_columns/add_missing_indexes
+MANAGED_MODELS = [Player, PlayerStats, Tournament, TournamentPlayer, Game, User, Note, Tag, ChangeLog, TableVersion, Job, MatchCandidate, PlayerAlias]
 
 def create_app():
     app = Flask(__name__)
+    # Native date/datetime encoding, backed by orjson when available
+    app.json = FastJSONProvider(app)
     app.secret_key = os.environ.get('FLASK_SECRET_KEY')
     if not app.secret_key:
         raise RuntimeError('FLASK_SECRET_KEY environment variable must be set.')
@@ -25,9 +38,12 @@ def create_app():
         app.config['DEBUG'] = False
     
     # Set up configurations
-    db_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db')
-    os.makedirs(db_dir, exist_ok=True)
-    db_path = os.path.join(db_dir, 'chesscrew.sqlite3')
+    # DATABASE_PATH points to another database file (e.g. for the tests)
+    db_path = os.environ.get('DATABASE_PATH')
+    if not db_path:
+        db_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db')
+        os.makedirs(db_dir, exist_ok=True)
+        db_path = os.path.join(db_dir, 'chesscrew.sqlite3')
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
@@ -37,18 +53,52 @@ def create_app():
     app.config['SQLALCHEMY_POOL_RECYCLE'] = 3600
     app.config['SQLALCHEMY_MAX_OVERFLOW'] = 20
     
+    # Response compression (gzip/brotli) for API payloads
+    app.config['COMPRESSION_MIN_SIZE'] = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    app.config['COMPRESSION_LEVEL'] = int(os.environ.get('COMPRESSION_LEVEL', 6))
+    app.config['COMPRESSION_BROTLI_QUALITY'] = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 5))
+    app.config['COMPRESSION_CACHE_SIZE'] = 32 * 1024 * 1024  # Precompressed bodies kept per worker
+    # Rows per committed chunk of the streaming member CSV import
+    app.config['CSV_IMPORT_CHUNK_SIZE'] = int(os.environ.get('CSV_IMPORT_CHUNK_SIZE', 1000))
+    # Background job threads per worker process (see jobs.py)
+    app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+    # Trigram similarity at which unmatched tournament participants are linked
+    # automatically, and from which candidates are kept for review
+    app.config['FUZZY_MATCH_AUTO_LINK_THRESHOLD'] = float(os.environ.get('FUZZY_MATCH_AUTO_LINK_THRESHOLD', 0.85))
+    app.config['FUZZY_MATCH_REVIEW_THRESHOLD'] = float(os.environ.get('FUZZY_MATCH_REVIEW_THRESHOLD', 0.5))
+    # Parsed tournament files cached on disk (see parse_cache.py); size 0 disables the cache
+    app.config['PARSE_CACHE_DIR'] = os.environ.get('PARSE_CACHE_DIR', '')
+    app.config['PARSE_CACHE_SIZE'] = int(os.environ.get('PARSE_CACHE_SIZE', 64 * 1024 * 1024))
+
     # Set session cookie for cross-origin credentials
     app.config['SESSION_COOKIE_SAMESITE'] = 'None'
     app.config['SESSION_COOKIE_SECURE'] = True
 
     db.init_app(app)
     with app.app_context():
+        enable_wal(db.engine)
         db.create_all()
         # Add missing columns to existing tables
         add_missing_columns()
+        add_missing_indexes()
+        # Keep change tracking and table version triggers in place for delta sync and ETags
+        install_triggers(db.engine)
+        install_search_index(db.engine)
+        # Backfill stored counts for tournaments imported before the columns existed
+        update_tournament_counts(
+            row.id for row in db.session.query(Tournament.id).filter(Tournament.total_players.is_(None)).all()
+        )
+        # Backfill normalized name keys for players created before the columns existed
+        backfill_name_keys()
+        # Backfill materialized stats for players created before player_stats existed
+        refresh_missing_player_stats()
+        # Jobs of processes that are gone can never finish
+        fail_interrupted_jobs()
+        db.session.commit()
 
     # Register API routes
     register_blueprints(app)
+    init_compression(app)
 
     # Index page route
     @app.route('/')
@@ -57,14 +107,23 @@ def create_app():
 
     return app
 
+def enable_wal(engine):
+    """
+    Put every SQLite connection into WAL mode. Readers then no longer block
+    writers, e.g. while a streamed list response (api/streaming.py) keeps its
+    read transaction open until the client has downloaded everything.
+    """
+    @event.listens_for(engine, 'connect')
+    def set_journal_mode(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.close()
+
 def add_missing_columns():
     """Automatically add missing columns to existing database tables by comparing model definitions with database schema."""
     inspector = inspect(db.engine)
     
-    # Define all models to check
-    models_to_check = [Player, Tournament, TournamentPlayer, Game, User, Note, Tag]
-    
-    for model in models_to_check:
+    for model in MANAGED_MODELS:
         table_name = model.__tablename__
         
         if table_name not in inspector.get_table_names():
@@ -96,6 +155,15 @@ def add_missing_columns():
                 except Exception as e:
                     print(f"    ✗ Failed to add column '{column_name}': {e}")
 
+def add_missing_indexes():
+    """Create indexes declared on the models that are missing in existing tables."""
+    for model in MANAGED_MODELS:
+        for index in model.__table__.indexes:
+            try:
+                index.create(bind=db.engine, checkfirst=True)
+            except Exception as e:
+                print(f"    ✗ Failed to create index '{index.name}': {e}")
+
 def get_sql_type_for_column(column):
     """Convert SQLAlchemy column type to SQL type string."""
     column_type = column.type
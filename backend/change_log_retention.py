@@ -0,0 +1,60 @@
+"""
+Change Log Retention Module
+
+change_log (written by the triggers in db/triggers.py) backs the delta sync of
+/api/players?since=<cursor> and the incremental note compaction. It is
+append-only, so rows older than CHANGE_LOG_RETENTION_DAYS are pruned by a
+job, run nightly by prune_change_log.py.
+
+The newest row is always kept. change_log ids are never reused
+(AUTOINCREMENT), so the oldest remaining id tells which cursors can still be
+served: a cursor older than that misses pruned changes, and the client has
+to do a full resync instead (see oldest_valid_cursor).
+"""
+
+from datetime import datetime, timedelta, timezone
+from db.models import db, ChangeLog
+
+JOB_KIND = 'change_log_pruning'
+
+CHANGE_LOG_RETENTION_DAYS = 30
+
+# change_log ids deleted per transaction
+PRUNE_CHUNK_SIZE = 10000
+
+
+def oldest_valid_cursor():
+    """The oldest delta-sync cursor that still sees every later change"""
+    oldest_id = db.session.query(db.func.min(ChangeLog.id)).scalar()
+    return oldest_id - 1 if oldest_id else 0
+
+
+def prune_change_log(ctx):
+    """
+    Job handler: delete change_log rows older than CHANGE_LOG_RETENTION_DAYS.
+
+    Commits after every chunk of PRUNE_CHUNK_SIZE ids.
+    """
+    # changed_at is written by the triggers with CURRENT_TIMESTAMP, which is UTC
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=CHANGE_LOG_RETENTION_DAYS)
+    newest_id = db.session.query(db.func.max(ChangeLog.id)).scalar() or 0
+    # ids grow with changed_at, so everything up to the newest expired id goes
+    through_id = db.session.query(db.func.max(ChangeLog.id)).filter(
+        ChangeLog.changed_at < cutoff,
+        ChangeLog.id < newest_id
+    ).scalar() or 0
+
+    deleted = 0
+    start_id = db.session.query(db.func.min(ChangeLog.id)).scalar() or 0
+    while start_id and start_id <= through_id:
+        end_id = min(start_id + PRUNE_CHUNK_SIZE - 1, through_id)
+        deleted += ChangeLog.query.filter(
+            ChangeLog.id >= start_id,
+            ChangeLog.id <= end_id
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        ctx.report(deleted=deleted, pruned_through=end_id)
+        ctx.check_cancelled()
+        start_id = end_id + 1
+
+    return {'deleted': deleted, 'oldest_valid_cursor': oldest_valid_cursor()}
@@ -0,0 +1,5 @@
+#!/bin/bash
+
+source venv/bin/activate
+export FLASK_SECRET_KEY=cronjob-changelog
+python prune_change_log.py
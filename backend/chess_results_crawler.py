@@ -1,5 +1,4 @@
 import requests
-import pandas as pd
 import re
 import os
 import time
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Nightly job that compacts automatic player notes.
+
+Merges consecutive automatic change notes into history notes and drops old
+import markers, see note_compaction.py. Run once a day via cron, e.g. through
+notes-cronjob.sh.
+"""
+
+import sys
+import os
+import logging
+from datetime import datetime
+
+# Add the backend directory to Python path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, backend_dir)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+def main():
+    logger.info(f"Compacting player notes at {datetime.now()}")
+
+    try:
+        # Import here to avoid issues with Flask app context
+        from app import create_app
+        from jobs import run_job
+        from note_compaction import JOB_KIND, compact_notes
+
+        app = create_app()
+
+        with app.app_context():
+            job = run_job(JOB_KIND, compact_notes)
+            if job.status != 'succeeded':
+                logger.error(f"Note compaction {job.status}: {job.error}")
+                sys.exit(1)
+            logger.info(f"Notes compacted: {job.result}")
+
+    except Exception as e:
+        logger.error(f"Error compacting player notes: {str(e)}", exc_info=True)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,12 @@ db = SQLAlchemy()
 
 class Player(db.Model):
     __tablename__ = 'players'
+    __table_args__ = (
+        # Serves the (last_name, first_name, id) ordering and keyset pagination of /players
+        db.Index('ix_players_name_order', 'last_name', 'first_name', 'id'),
+        # Serves name matching during imports (see player_matching.py)
+        db.Index('ix_players_name_keys', 'last_name_key', 'first_name_key'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     p_number = db.Column(db.Integer, unique=True, nullable=False)
@@ -28,6 +34,14 @@ class Player(db.Model):
     is_active = db.Column(db.Boolean, default=False)
     female = db.Column(db.Boolean, default=False)
     email_alternate = db.Column(db.String(120), nullable=True)
+    # Hash of the member CSV row last imported for this player (see player_importer.py)
+    import_row_hash = db.Column(db.String(40), nullable=True)
+    # Normalized names for matching, see player_matching.normalize_name
+    first_name_key = db.Column(db.String(80), nullable=True)
+    last_name_key = db.Column(db.String(80), nullable=True)
+
+    # Bookkeeping columns that are not part of the API representation
+    INTERNAL_COLUMNS = ('import_row_hash', 'first_name_key', 'last_name_key')
     
     # Helper properties
     @property
@@ -35,11 +49,14 @@ class Player(db.Model):
         return f"{self.first_name} {self.last_name}"
     
     def to_dict(self):
-        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+        return {c.name: getattr(self, c.name) for c in self.__table__.columns if c.name not in self.INTERNAL_COLUMNS}
     
     tags = db.relationship('Tag', secondary='player_tags', back_populates='players')
     notes = db.relationship('Note', back_populates='player')
+    stats = db.relationship('PlayerStats', back_populates='player', uselist=False, cascade="all, delete-orphan")
     tournament_players = db.relationship('TournamentPlayer', back_populates='player')
+    match_candidates = db.relationship('MatchCandidate', back_populates='player', cascade="all, delete-orphan")
+    aliases = db.relationship('PlayerAlias', back_populates='player', cascade="all, delete-orphan")
     tournaments = db.relationship(
         'Tournament',
         secondary='tournament_players',
@@ -47,6 +64,28 @@ class Player(db.Model):
         overlaps='tournament_players'
     )
 
+class PlayerStats(db.Model):
+    """Materialized tournament statistics per player, maintained by player_stats.py"""
+    __tablename__ = 'player_stats'
+
+    player_id = db.Column(db.Integer, db.ForeignKey('players.id'), primary_key=True)
+    total_points = db.Column(db.Float, nullable=False, default=0)  # Unrated tournaments
+    total_games = db.Column(db.Integer, nullable=False, default=0)
+    total_points_rated = db.Column(db.Float, nullable=False, default=0)  # Rated tournaments
+    total_games_rated = db.Column(db.Integer, nullable=False, default=0)
+    window_start = db.Column(db.Date, nullable=False)  # Oldest tournament date included
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+
+    player = db.relationship('Player', back_populates='stats')
+
+    def to_dict(self):
+        return {
+            'total_points': self.total_points,
+            'total_games': self.total_games,
+            'total_points_rated': self.total_points_rated,
+            'total_games_rated': self.total_games_rated
+        }
+
 class Tournament(db.Model):
     __tablename__ = 'tournaments'
 
@@ -63,6 +102,7 @@ class Tournament(db.Model):
     imported_at = db.Column(db.DateTime, nullable=True)  # When it was imported from chess-results
     elo_rating = db.Column(db.String(100), nullable=True)  # e.g., "FIDE", "National", etc.
     elo_rated_rounds = db.Column(db.String(50), nullable=True)  # e.g., "3-5"
+    total_players = db.Column(db.Integer, nullable=True)  # Field size, maintained by update_tournament_counts
     
     tournament_players = db.relationship('TournamentPlayer', back_populates='tournament', cascade="all, delete-orphan")
     players = db.relationship(
@@ -90,6 +130,10 @@ class TournamentPlayer(db.Model):
     rating = db.Column(db.Integer, nullable=True)  # Rating at time of tournament
     title = db.Column(db.String(10), nullable=True)  # Chess title (GM, IM, etc)
     chess_results_id = db.Column(db.String(20), nullable=True)  # Player ID from chess-results.com for this tournament
+    games_played = db.Column(db.Integer, nullable=True)  # Number of Game rows, maintained by update_tournament_counts
+    # Player an admin disassociated from this participant; automatic matching never links
+    # that player to this name again (see player_matching.load_rejected_matches)
+    rejected_player_id = db.Column(db.Integer, nullable=True)
 
     __mapper_args__ = {
         'confirm_deleted_rows': False
@@ -97,6 +141,35 @@ class TournamentPlayer(db.Model):
 
     tournament = db.relationship('Tournament', back_populates='tournament_players', overlaps='players,tournaments')
     player = db.relationship('Player', back_populates='tournament_players', overlaps="players,tournaments")
+    match_candidates = db.relationship('MatchCandidate', back_populates='tournament_player', cascade="all, delete-orphan")
+
+class MatchCandidate(db.Model):
+    """A possible player for an unlinked tournament participant, found by fuzzy name matching."""
+    __tablename__ = 'match_candidates'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    tournament_player_id = db.Column(db.Integer, db.ForeignKey('tournament_players.id'), nullable=False, index=True)
+    player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False)  # Trigram similarity, 0..1
+
+    tournament_player = db.relationship('TournamentPlayer', back_populates='match_candidates')
+    player = db.relationship('Player', back_populates='match_candidates')
+
+class PlayerAlias(db.Model):
+    """A confirmed identity of a player in tournament data (a name variant or FIDE id), see player_matching.py."""
+    __tablename__ = 'player_aliases'
+    __table_args__ = (
+        db.Index('ix_player_aliases_key', 'kind', 'alias_key', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    kind = db.Column(db.String(10), nullable=False)  # "name" or "fide_id"
+    alias_key = db.Column(db.String(160), nullable=False)  # Normalized name or FIDE id
+    player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False, index=True)
+    source = db.Column(db.String(10), nullable=False)  # "manual" (admin association) or "import" (matched)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    player = db.relationship('Player', back_populates='aliases')
 
 class Game(db.Model):
     __tablename__ = 'games'
@@ -154,3 +227,56 @@ player_tags = db.Table('player_tags',
     db.Column('player_id', db.Integer, db.ForeignKey('players.id'), primary_key=True),
     db.Column('tag_id', db.Integer, db.ForeignKey('tags.id'), primary_key=True)
 )
+
+class ChangeLog(db.Model):
+    """Append-only log of row changes, written by the triggers in db/triggers.py.
+
+    The autoincrement id doubles as the delta-sync cursor for /api/players?since=.
+    """
+    __tablename__ = 'change_log'
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    table_name = db.Column(db.String(40), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    player_id = db.Column(db.Integer, nullable=True, index=True)
+    operation = db.Column(db.String(10), nullable=False)  # "upsert" or "delete"
+    changed_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+class TableVersion(db.Model):
+    """Per-table write counter, bumped by the triggers in db/triggers.py and used for ETags."""
+    __tablename__ = 'table_versions'
+
+    table_name = db.Column(db.String(40), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class Job(db.Model):
+    """A long-running admin operation executed in the background, see jobs.py."""
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    kind = db.Column(db.String(40), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed, cancelled
+    progress = db.Column(db.JSON, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    worker_pid = db.Column(db.Integer, nullable=True)  # Process that runs the job
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'result': self.result,
+            'error': self.error,
+            'cancel_requested': self.cancel_requested,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
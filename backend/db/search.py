@@ -0,0 +1,146 @@
+"""
+Full-text player search backed by an SQLite FTS5 table.
+
+player_search holds one row per player (rowid = players.id) with folded name,
+club, town and tag texts. It is kept in sync by triggers, so every write path
+including raw SQL and bulk imports updates it.
+
+Folding lowercases and maps German umlauts and their transliterations onto the
+same letters (ä/ae -> a, ö/oe -> o, ü/ue -> u, ß/ss -> s). The same rules are
+applied in SQL (fold_sql, used by the triggers) and in Python (fold_text, used
+for queries), so "Mueller", "Müller" and "MÜLLER" all match. Other diacritics
+are removed by the FTS5 unicode61 tokenizer.
+"""
+
+import re
+from sqlalchemy import text
+
+# Applied in order, after lowercasing
+FOLD_REPLACEMENTS = [
+    ('Ä', 'a'), ('Ö', 'o'), ('Ü', 'u'),
+    ('ä', 'a'), ('ö', 'o'), ('ü', 'u'), ('ß', 's'),
+    ('ae', 'a'), ('oe', 'o'), ('ue', 'u'), ('ss', 's'),
+]
+
+
+def fold_text(value):
+    """Fold a text for matching against the search index"""
+    value = (value or '').lower()
+    for old, new in FOLD_REPLACEMENTS:
+        value = value.replace(old, new)
+    return value
+
+
+def fold_sql(expression):
+    """SQL expression applying the same folding as fold_text"""
+    # SQLite's lower() only folds ASCII, hence the explicit uppercase umlauts
+    sql = f"lower(coalesce({expression}, ''))"
+    for old, new in FOLD_REPLACEMENTS:
+        sql = f"replace({sql}, '{old}', '{new}')"
+    return sql
+
+
+def _name_sql(alias):
+    return f"{alias}.first_name || ' ' || {alias}.last_name"
+
+
+def _tags_sql(player_id):
+    return (
+        "(SELECT " + fold_sql("group_concat(tags.name, ' ')") + " FROM player_tags "
+        f"JOIN tags ON tags.id = player_tags.tag_id WHERE player_tags.player_id = {player_id})"
+    )
+
+
+def _insert_sql(alias):
+    return (
+        "INSERT INTO player_search (rowid, name, club, town, tags) VALUES ("
+        f"{alias}.id, "
+        f"{fold_sql(_name_sql(alias))}, "
+        f"{fold_sql(f'{alias}.club')}, "
+        f"{fold_sql(f'{alias}.town')}, "
+        f"{_tags_sql(f'{alias}.id')});"
+    )
+
+
+CREATE_SEARCH_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS player_search USING fts5(
+        name, club, town, tags,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+"""
+
+SEARCH_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_players_insert_search AFTER INSERT ON players BEGIN
+        {_insert_sql('NEW')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_players_update_search
+    AFTER UPDATE OF first_name, last_name, club, town ON players BEGIN
+        DELETE FROM player_search WHERE rowid = OLD.id;
+        {_insert_sql('NEW')}
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_players_delete_search AFTER DELETE ON players BEGIN
+        DELETE FROM player_search WHERE rowid = OLD.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_player_tags_insert_search AFTER INSERT ON player_tags BEGIN
+        UPDATE player_search SET tags = {_tags_sql('NEW.player_id')} WHERE rowid = NEW.player_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_player_tags_delete_search AFTER DELETE ON player_tags BEGIN
+        UPDATE player_search SET tags = {_tags_sql('OLD.player_id')} WHERE rowid = OLD.player_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_tags_update_search AFTER UPDATE OF name ON tags BEGIN
+        UPDATE player_search SET tags = {_tags_sql('player_search.rowid')}
+        WHERE rowid IN (SELECT player_id FROM player_tags WHERE tag_id = NEW.id);
+    END
+    """,
+]
+
+# Column weights for bm25 ranking: name matches count most
+RANK_EXPRESSION = "bm25(player_search, 10.0, 2.0, 2.0, 1.0)"
+
+
+def rebuild_search_index(conn):
+    """Repopulate player_search from the players table"""
+    conn.execute(text("DELETE FROM player_search"))
+    conn.execute(text(
+        "INSERT INTO player_search (rowid, name, club, town, tags) "
+        f"SELECT p.id, {fold_sql(_name_sql('p'))}, "
+        f"{fold_sql('p.club')}, {fold_sql('p.town')}, {_tags_sql('p.id')} FROM players p"
+    ))
+
+
+def install_search_index(engine):
+    """Create the FTS5 table and its triggers; populate the table when it is new."""
+    with engine.connect() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'player_search'"
+        )).first() is not None
+        conn.execute(text(CREATE_SEARCH_TABLE))
+        for statement in SEARCH_TRIGGERS:
+            conn.execute(text(statement))
+        if not exists:
+            rebuild_search_index(conn)
+        conn.commit()
+
+
+def build_match_query(query):
+    """
+    Turn user input into an FTS5 MATCH expression.
+
+    Every word is folded and matched as a prefix; all words must match.
+    Returns None if the input contains no searchable words.
+    """
+    words = re.findall(r'\w+', fold_text(query))
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
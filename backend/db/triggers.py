@@ -0,0 +1,199 @@
+"""
+SQLite triggers maintained by the application.
+
+The change tracking triggers write one row into change_log for every insert,
+update or delete on the tables embedded in /api/players, and the version
+triggers bump the write counter of a table in table_versions. Because they live
+in the database they also catch raw SQL and bulk writes that bypass the ORM.
+
+Updates are only logged when a column that is part of the player payload
+actually changed; update_tournament_counts rewrites the counts of a whole
+tournament on every game change. Old change_log rows are pruned by
+change_log_retention.py.
+"""
+
+import re
+from sqlalchemy import text
+from db.models import Player
+
+# Columns of players in the player payload (Player.to_dict); writes that only
+# touch internal columns (import row hash, name keys) are not logged
+EMBEDDED_PLAYER_COLUMNS = [
+    column.name for column in Player.__table__.columns if column.name not in Player.INTERNAL_COLUMNS
+]
+
+# Columns of tournaments and tournament_players embedded in player payloads
+# (format_tournament and format_tournament_data); updates of other columns are not logged
+EMBEDDED_TOURNAMENT_COLUMNS = [
+    'name', 'date', 'location', 'is_team', 'chess_results_id', 'chess_results_url', 'rounds',
+    'time_control', 'imported_at', 'elo_rating', 'elo_rated_rounds', 'total_players'
+]
+EMBEDDED_TOURNAMENT_PLAYER_COLUMNS = [
+    'player_id', 'tournament_id', 'ranking', 'starting_rank', 'title', 'rating',
+    'points', 'tiebreak1', 'tiebreak2', 'games_played'
+]
+
+
+def changed_condition(columns):
+    """Trigger WHEN condition that holds if any of the columns changed"""
+    return ' OR '.join(f'OLD.{column} IS NOT NEW.{column}' for column in columns)
+
+
+CHANGE_TRIGGERS = [
+    # Players
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_players_insert AFTER INSERT ON players BEGIN
+        INSERT INTO change_log (table_name, row_id, player_id, operation, changed_at)
+        VALUES ('players', NEW.id, NEW.id, 'upsert', CURRENT_TIMESTAMP);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_players_update AFTER UPDATE ON players
+    WHEN {changed_condition(EMBEDDED_PLAYER_COLUMNS)}
+    BEGIN
+        INSERT INTO change_log (table_name, row_id, player_id, operation, changed_at)
+        VALUES ('players', NEW.id, NEW.id, 'upsert', CURRENT_TIMESTAMP);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_players_delete AFTER DELETE ON players BEGIN
+        INSERT INTO change_log (table_name, row_id, player_id, operation, changed_at)
+        VALUES ('players', OLD.id, OLD.id, 'delete', CURRENT_TIMESTAMP);
+    END
+    """,
+    # Notes
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_notes_insert AFTER INSERT ON notes BEGIN
+        INSERT INTO change_log (table_name, row_id, player_id, operation, changed_at)
+        VALUES ('notes', NEW.id, NEW.player_id, 'upsert', CURRENT_TIMESTAMP);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_notes_update AFTER UPDATE ON notes BEGIN
+        INSERT INTO change_log (table_name, row_id, player_id, operation, changed_at)
+        VALUES ('notes', NEW.id, NEW.player_id, 'upsert', CURRENT_TIMESTAMP);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_notes_delete AFTER DELETE ON notes BEGIN
+        INSERT INTO change_log (table_name, row_id, player_id, operation, changed_at)
+        VALUES ('notes', OLD.id, OLD.player_id, 'delete', CURRENT_TIMESTAMP);
+    END
+    """,
+    # Tournament participations
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tournament_players_insert AFTER INSERT ON tournament_players BEGIN
+        INSERT INTO change_log (table_name, row_id, player_id, operation, changed_at)
+        VALUES ('tournament_players', NEW.id, NEW.player_id, 'upsert', CURRENT_TIMESTAMP);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_tournament_players_update AFTER UPDATE ON tournament_players
+    WHEN {changed_condition(EMBEDDED_TOURNAMENT_PLAYER_COLUMNS)}
+    BEGIN
+        -- Re-associating a participation removes it from the previous player
+        INSERT INTO change_log (table_name, row_id, player_id, operation, changed_at)
+        SELECT 'tournament_players', OLD.id, OLD.player_id, 'delete', CURRENT_TIMESTAMP
+        WHERE OLD.player_id IS NOT NULL AND OLD.player_id IS NOT NEW.player_id;
+        INSERT INTO change_log (table_name, row_id, player_id, operation, changed_at)
+        VALUES ('tournament_players', NEW.id, NEW.player_id, 'upsert', CURRENT_TIMESTAMP);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tournament_players_delete AFTER DELETE ON tournament_players BEGIN
+        INSERT INTO change_log (table_name, row_id, player_id, operation, changed_at)
+        VALUES ('tournament_players', OLD.id, OLD.player_id, 'delete', CURRENT_TIMESTAMP);
+    END
+    """,
+    # Tournament metadata is embedded in every participation
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_tournaments_update AFTER UPDATE OF {', '.join(EMBEDDED_TOURNAMENT_COLUMNS)} ON tournaments
+    WHEN {changed_condition(EMBEDDED_TOURNAMENT_COLUMNS)}
+    BEGIN
+        INSERT INTO change_log (table_name, row_id, player_id, operation, changed_at)
+        SELECT 'tournament_players', id, player_id, 'upsert', CURRENT_TIMESTAMP
+        FROM tournament_players WHERE tournament_id = NEW.id;
+    END
+    """,
+    # Materialized stats are embedded in the player rows
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_player_stats_insert AFTER INSERT ON player_stats BEGIN
+        INSERT INTO change_log (table_name, row_id, player_id, operation, changed_at)
+        VALUES ('player_stats', NEW.player_id, NEW.player_id, 'upsert', CURRENT_TIMESTAMP);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_player_stats_update AFTER UPDATE ON player_stats
+    WHEN OLD.total_points IS NOT NEW.total_points
+        OR OLD.total_games IS NOT NEW.total_games
+        OR OLD.total_points_rated IS NOT NEW.total_points_rated
+        OR OLD.total_games_rated IS NOT NEW.total_games_rated
+    BEGIN
+        INSERT INTO change_log (table_name, row_id, player_id, operation, changed_at)
+        VALUES ('player_stats', NEW.player_id, NEW.player_id, 'upsert', CURRENT_TIMESTAMP);
+    END
+    """,
+    # Tag assignments
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_player_tags_insert AFTER INSERT ON player_tags BEGIN
+        INSERT INTO change_log (table_name, row_id, player_id, operation, changed_at)
+        VALUES ('player_tags', NEW.tag_id, NEW.player_id, 'upsert', CURRENT_TIMESTAMP);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_player_tags_delete AFTER DELETE ON player_tags BEGIN
+        INSERT INTO change_log (table_name, row_id, player_id, operation, changed_at)
+        VALUES ('player_tags', OLD.tag_id, OLD.player_id, 'delete', CURRENT_TIMESTAMP);
+    END
+    """,
+    # Tag names and colors are embedded in the players carrying the tag
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_tags_update AFTER UPDATE OF name, color ON tags
+    WHEN OLD.name IS NOT NEW.name OR OLD.color IS NOT NEW.color
+    BEGIN
+        INSERT INTO change_log (table_name, row_id, player_id, operation, changed_at)
+        SELECT 'player_tags', NEW.id, player_id, 'upsert', CURRENT_TIMESTAMP
+        FROM player_tags WHERE tag_id = NEW.id;
+    END
+    """,
+]
+
+
+# Tables with a write counter in table_versions (see api/etag.py)
+VERSIONED_TABLES = [
+    'players', 'notes', 'tags', 'player_tags', 'player_stats',
+    'tournaments', 'tournament_players', 'games'
+]
+
+VERSION_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_{operation.lower()}_version AFTER {operation} ON {table} BEGIN
+        UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+    END
+    """
+    for table in VERSIONED_TABLES
+    for operation in ('INSERT', 'UPDATE', 'DELETE')
+]
+
+
+def trigger_name(statement):
+    return re.search(r'CREATE TRIGGER IF NOT EXISTS (\w+)', statement).group(1)
+
+
+def install_triggers(engine):
+    """
+    Create all application triggers. Change triggers are recreated, so
+    changed definitions reach existing databases.
+    """
+    with engine.connect() as conn:
+        for table in VERSIONED_TABLES:
+            conn.execute(
+                text("INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (:table, 0)"),
+                {'table': table}
+            )
+        for statement in CHANGE_TRIGGERS:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger_name(statement)}"))
+            conn.execute(text(statement))
+        for statement in VERSION_TRIGGERS:
+            conn.execute(text(statement))
+        conn.commit()
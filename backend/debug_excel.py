@@ -9,7 +9,7 @@ sys.path.insert(0, '/home/martin/chesscrew/backend')
 
 import pandas as pd
 import glob
-from tournament_importer import detect_round_columns, parse_players, parse_games
+from tournament_parser import detect_round_columns, parse_players, parse_games
 from db.models import Tournament
 import tempfile
 
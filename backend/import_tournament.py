@@ -10,6 +10,7 @@ Usage:
     python import_tournament.py 1152295
     python import_tournament.py --url https://s2.chess-results.com/tnr1152295.aspx
     python import_tournament.py --id 1152295
+    python import_tournament.py --reader pandas 1152295
 """
 
 import sys
@@ -20,6 +21,7 @@ import logging
 import re
 from datetime import datetime
 from tournament_importer import import_tournament_from_excel
+from tournament_parser import SHEET_READERS
 from db.models import db, Tournament, TournamentPlayer, Player
 
 # Add the backend directory to Python path
@@ -49,8 +51,17 @@ def extract_tournament_id(url_or_id):
     
     raise ValueError(f"Could not extract tournament ID from: {url_or_id}")
 
-def import_tournament(crawler, tournament_id, force=False):
-    """Import tournament by ID"""
+def import_tournament(crawler, tournament_id, force=False, progress=None, reader=None):
+    """
+    Import tournament by ID
+
+    progress is an optional callback called with the name of each step
+    ('details', 'download', 'import'); returning False aborts the import.
+    reader selects the sheet reader (see tournament_parser.read_sheet).
+    """
+    def proceed(step):
+        return progress is None or progress(step) is not False
+
     try:
         # Import here to avoid issues with Flask app context
         from app import create_app
@@ -71,12 +82,16 @@ def import_tournament(crawler, tournament_id, force=False):
             logger.info(f"Reading tournament details from: {tournament_url}")
 
             # Get tournament details
+            if not proceed('details'):
+                return {'success': False, 'error': 'Cancelled'}
             tournament_details = crawler.get_tournament_details(tournament_url, tournament_id)
             if not tournament_details:
                 logger.error(f"Could not get details for tournament {tournament_id}")
                 return {'success': False, 'error': 'Could not get tournament details'}
                         
             # Download Excel export
+            if not proceed('download'):
+                return {'success': False, 'error': 'Cancelled'}
             excel_file = crawler.download_excel_export(tournament_details)
 
             if not excel_file:
@@ -93,8 +108,10 @@ def import_tournament(crawler, tournament_id, force=False):
             logger.info(f"Wrote tournament details to: {details_file}")
             
             # Import tournament using the tournament_importer module
+            if not proceed('import'):
+                return {'success': False, 'error': 'Cancelled'}
             try:
-                result = import_tournament_from_excel(excel_file, tournament_details)
+                result = import_tournament_from_excel(excel_file, tournament_details, reader=reader)
                 
                 # Clean up the temporary file
                 # if os.path.exists(excel_file):
@@ -137,6 +154,8 @@ Examples:
     parser.add_argument('--force', action='store_true', 
                        help='Force import even if tournament already exists')
     parser.add_argument('--file', help='Path to JSON file with tournament details (to re-import downloaded content)')
+    parser.add_argument('--reader', choices=SHEET_READERS,
+                       help='Excel reader (default: openpyxl for .xlsx, pandas otherwise)')
     
     args = parser.parse_args()
     
@@ -171,7 +190,7 @@ Examples:
             # Create Flask app context for database operations
             app = create_app()
             with app.app_context():
-                result = import_tournament_from_excel(excel_file, tournament_details)
+                result = import_tournament_from_excel(excel_file, tournament_details, reader=args.reader)
             
             if result.get('success'):
                 logger.info("Tournament import completed successfully")
@@ -188,7 +207,7 @@ Examples:
             logger.error("Failed to login for tournament type detection")
             sys.exit(1)
         
-        import_tournament(crawler, tournament_id, force=args.force)
+        import_tournament(crawler, tournament_id, force=args.force, reader=args.reader)
         logger.info("Tournament import completed successfully")
         sys.exit(0)
         
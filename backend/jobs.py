@@ -0,0 +1,197 @@
+"""
+Background Job Module
+
+Runs long admin operations (member CSV import, tournament import, player
+relinking, note compaction) outside the request worker. Jobs are persisted in
+the jobs table so any gunicorn worker can report their status; they are
+executed by a small thread pool in the process that accepted them.
+
+A job handler is a function taking a JobContext as first argument. It runs in
+its own app context (and thus its own database session) and returns a
+JSON-serializable result. Handlers report progress with ctx.report(...) and
+support cancellation by calling ctx.check_cancelled() at safe points, usually
+right after a commit.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from db.models import db, Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_WORKERS = 2
+
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    """Raised by JobContext.check_cancelled when cancellation was requested"""
+
+
+class JobContext:
+    """Handle passed to job handlers for progress reporting and cancellation"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+
+    def _update(self, **values):
+        # Separate connection, so progress is visible without committing the handler's session
+        with db.engine.begin() as conn:
+            conn.execute(db.update(Job).where(Job.id == self.job_id).values(**values))
+
+    def report(self, **progress):
+        """Store the current progress (any JSON-serializable values)"""
+        self._update(progress=progress)
+
+    @property
+    def cancel_requested(self):
+        with db.engine.connect() as conn:
+            return bool(conn.execute(
+                db.select(Job.cancel_requested).where(Job.id == self.job_id)
+            ).scalar())
+
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation of this job was requested"""
+        if self.cancel_requested:
+            raise JobCancelled()
+
+
+def get_executor(app):
+    """Thread pool of this process, created on first use (after gunicorn forked)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get('JOB_WORKERS', DEFAULT_JOB_WORKERS),
+                thread_name_prefix='job'
+            )
+        return _executor
+
+
+def submit_job(kind, handler, *args, user_id=None, **kwargs):
+    """
+    Persist a new job and schedule handler(ctx, *args, **kwargs) in the background.
+
+    Must be called within an app context; commits the current session.
+    Returns the Job.
+    """
+    from flask import current_app
+    app = current_app._get_current_object()
+
+    job = Job(kind=kind, status='queued', created_by=user_id, worker_pid=os.getpid())
+    db.session.add(job)
+    db.session.commit()
+
+    get_executor(app).submit(_run_job, app, job.id, handler, args, kwargs)
+    return job
+
+
+def run_job(kind, handler, *args, user_id=None, **kwargs):
+    """
+    Persist a new job and run it right away in the calling thread.
+
+    For cron scripts that want the same bookkeeping as background jobs.
+    Must be called within an app context. Returns the finished Job.
+    """
+    from flask import current_app
+    app = current_app._get_current_object()
+
+    job = Job(kind=kind, status='queued', created_by=user_id, worker_pid=os.getpid())
+    db.session.add(job)
+    db.session.commit()
+    job_id = job.id
+
+    _run_job(app, job_id, handler, args, kwargs)
+    return db.session.get(Job, job_id, populate_existing=True)
+
+
+def last_succeeded_job(kind):
+    """The most recent successful job of a kind, or None"""
+    return Job.query.filter_by(kind=kind, status='succeeded').order_by(Job.id.desc()).first()
+
+
+def _run_job(app, job_id, handler, args, kwargs):
+    with app.app_context():
+        ctx = JobContext(job_id)
+        try:
+            job = db.session.get(Job, job_id)
+            if job.cancel_requested:
+                _finish(job_id, 'cancelled')
+                return
+            job.status = 'running'
+            job.started_at = datetime.now()
+            db.session.commit()
+
+            result = handler(ctx, *args, **kwargs)
+            db.session.commit()
+            _finish(job_id, 'succeeded', result=result)
+        except JobCancelled:
+            db.session.rollback()
+            _finish(job_id, 'cancelled')
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+            db.session.rollback()
+            _finish(job_id, 'failed', error=str(e))
+        finally:
+            db.session.remove()
+
+
+def _finish(job_id, status, result=None, error=None):
+    Job.query.filter_by(id=job_id).update({
+        Job.status: status,
+        Job.result: result,
+        Job.error: error,
+        Job.finished_at: datetime.now()
+    }, synchronize_session=False)
+    db.session.commit()
+
+
+def request_cancel(job):
+    """
+    Request cancellation of a job; queued jobs are cancelled right away,
+    running jobs stop at their next check_cancelled(). Commits.
+    """
+    if job.status in FINISHED_STATUSES:
+        return job
+    job.cancel_requested = True
+    if job.status == 'queued':
+        job.status = 'cancelled'
+        job.finished_at = datetime.now()
+    db.session.commit()
+    return job
+
+
+def fail_interrupted_jobs():
+    """
+    Mark unfinished jobs of processes that no longer exist as failed.
+
+    Jobs live in the memory of the process that accepted them; after a
+    restart they can never finish. Does not commit.
+    """
+    interrupted = 0
+    for job in Job.query.filter(Job.status.in_(('queued', 'running'))).all():
+        if job.worker_pid == os.getpid() or _process_alive(job.worker_pid):
+            continue
+        job.status = 'failed'
+        job.error = 'Interrupted by a server restart'
+        job.finished_at = datetime.now()
+        interrupted += 1
+    return interrupted
+
+
+def _process_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
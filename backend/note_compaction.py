@@ -0,0 +1,161 @@
+"""
+Note Compaction Module
+
+Automatic notes (manual=False) are written by update_player ("Geändert: ...")
+and the member CSV import ("Importiert" / "Importiert: ..."). They are embedded
+in every player response, so they are compacted regularly:
+
+- Consecutive automatic change notes of a player (not interrupted by a manual
+  note) are merged into one history note, one line per original note.
+- Bare "Importiert" markers older than IMPORT_MARKER_RETENTION_DAYS are
+  deleted, except a player's oldest note, which records the first import.
+
+Manual notes and notes in any other format are never touched. Compaction runs
+as a job (see jobs.py) and is incremental: only players whose notes changed
+(according to change_log) since the last successful run are merged again.
+The first run, and any run after change_log was pruned past the last one,
+checks all players.
+"""
+
+from datetime import datetime, timedelta
+from db.models import db, Note, ChangeLog
+from jobs import last_succeeded_job
+from change_log_retention import oldest_valid_cursor
+
+JOB_KIND = 'note_compaction'
+
+IMPORT_MARKER = 'Importiert'
+CHANGE_PREFIXES = ('Importiert: ', 'Geändert: ')
+HISTORY_HEADER = 'Änderungsverlauf:'
+
+IMPORT_MARKER_RETENTION_DAYS = 90
+
+# Players whose notes are compacted per transaction
+PLAYER_CHUNK_SIZE = 500
+
+
+def is_automatic(note):
+    # manual is NULL for notes created before the column existed; leave those alone
+    return note.manual is False
+
+
+def is_change_note(note):
+    return is_automatic(note) and (
+        note.content.startswith(CHANGE_PREFIXES) or note.content.startswith(HISTORY_HEADER + '\n')
+    )
+
+
+def is_import_marker(note):
+    return is_automatic(note) and note.content == IMPORT_MARKER
+
+
+def history_lines(note):
+    """The history lines a note contributes to a merged history note"""
+    if note.content.startswith(HISTORY_HEADER + '\n'):
+        return note.content.split('\n')[1:]
+    created = note.created_at.strftime('%Y-%m-%d') if note.created_at else '?'
+    return [f"{created} {note.content}"]
+
+
+def merge_notes(run, now):
+    """Merge a run of change notes into its first note; the others are deleted"""
+    keep = run[0]
+    keep.content = '\n'.join([HISTORY_HEADER] + [line for note in run for line in history_lines(note)])
+    # The merged note stands for the most recent change
+    keep.created_at = run[-1].created_at
+    keep.updated_at = now
+    for note in run[1:]:
+        db.session.delete(note)
+    return len(run) - 1
+
+
+def compact_player_notes(notes, now):
+    """Merge consecutive change notes of one player; returns the number of removed notes"""
+    merged = 0
+    run = []
+    for note in sorted(notes, key=lambda n: (n.created_at or datetime.min, n.id)):
+        if is_change_note(note):
+            run.append(note)
+        elif is_import_marker(note):
+            # Markers are subject to retention only and do not interrupt a run
+            continue
+        else:
+            if len(run) > 1:
+                merged += merge_notes(run, now)
+            run = []
+    if len(run) > 1:
+        merged += merge_notes(run, now)
+    return merged
+
+
+def delete_expired_import_markers(cutoff):
+    """Delete bare import markers created before cutoff, except each player's oldest note"""
+    # Note ids are reused after deletes, so the oldest note is the one created
+    # first; the id only breaks ties between notes created at the same time
+    positions = db.select(
+        Note.id,
+        db.func.row_number().over(
+            partition_by=Note.player_id,
+            order_by=(Note.created_at, Note.id)
+        ).label('position')
+    ).subquery()
+    oldest_notes = db.select(positions.c.id).where(positions.c.position == 1)
+    return Note.query.filter(
+        Note.manual.is_(False),
+        Note.content == IMPORT_MARKER,
+        Note.created_at < cutoff,
+        Note.id.notin_(oldest_notes)
+    ).delete(synchronize_session=False)
+
+
+def compact_notes(ctx):
+    """
+    Job handler: compact automatic notes created since the last successful run
+    (all automatic notes on the first run).
+
+    Commits after every chunk of players; the result records the newest
+    change_log id seen, which is where the next run continues.
+    """
+    # Note ids are reused by SQLite after deletions; the change log id is not
+    last_run = last_succeeded_job(JOB_KIND)
+    since = (last_run.result or {}).get('last_change_id', 0) if last_run else 0
+    last_change_id = db.session.query(db.func.max(ChangeLog.id)).scalar() or 0
+
+    if last_run is None or since < oldest_valid_cursor():
+        # First run (notes written before change_log existed are not in it), or changes
+        # since the last run were pruned from change_log; check every player with automatic notes
+        player_ids = [
+            row.player_id for row in db.session.query(Note.player_id).filter(Note.manual.is_(False)).distinct().all()
+        ]
+    else:
+        player_ids = [
+            row.player_id for row in db.session.query(ChangeLog.player_id).filter(
+                ChangeLog.table_name == 'notes',
+                ChangeLog.operation == 'upsert',
+                ChangeLog.id > since,
+                ChangeLog.id <= last_change_id
+            ).distinct().all()
+        ]
+
+    now = datetime.now()
+    merged = 0
+    for i in range(0, len(player_ids), PLAYER_CHUNK_SIZE):
+        chunk = player_ids[i:i + PLAYER_CHUNK_SIZE]
+        notes_by_player = {}
+        for note in Note.query.filter(Note.player_id.in_(chunk)).all():
+            notes_by_player.setdefault(note.player_id, []).append(note)
+        for notes in notes_by_player.values():
+            merged += compact_player_notes(notes, now)
+        db.session.commit()
+        ctx.report(players=min(i + PLAYER_CHUNK_SIZE, len(player_ids)), total_players=len(player_ids), merged=merged)
+        ctx.check_cancelled()
+
+    deleted = delete_expired_import_markers(now - timedelta(days=IMPORT_MARKER_RETENTION_DAYS))
+    db.session.commit()
+
+    return {
+        'last_change_id': last_change_id,
+        'players': len(player_ids),
+        'merged_notes': merged,
+        'deleted_markers': deleted
+    }
@@ -0,0 +1,107 @@
+"""
+Parse Cache Module
+
+Keeps parsed tournaments (tournament_parser.ParsedTournament) on disk, keyed
+by the SHA-256 checksum of the Excel file and tournament_parser.PARSER_VERSION,
+so re-importing a file that was parsed before (import_tournament.py --file,
+regression runs) skips decoding the workbook.
+
+Entries are pickled and zlib-compressed, one file per entry. The directory is
+bounded in size: after every write the least recently used entries (by file
+modification time, which is refreshed on every hit) are removed until the
+total size is below the limit. Unreadable entries are treated as misses and
+removed. Only files written by this module are ever loaded, so the directory
+must not be writable by anyone else.
+"""
+
+import os
+import pickle
+import tempfile
+import zlib
+from tournament_parser import PARSER_VERSION
+
+DEFAULT_PARSE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'parsed_tournaments')
+DEFAULT_PARSE_CACHE_SIZE = 64 * 1024 * 1024  # Bytes of cache files kept on disk
+
+ENTRY_SUFFIX = '.pickle.z'
+
+
+class ParseCache:
+    """Size-bounded on-disk cache of parsed tournaments keyed by file checksum"""
+
+    def __init__(self, directory=DEFAULT_PARSE_CACHE_DIR, max_size=DEFAULT_PARSE_CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    @classmethod
+    def from_config(cls, config):
+        """The cache configured by PARSE_CACHE_DIR and PARSE_CACHE_SIZE, or None if disabled (size 0)"""
+        max_size = config.get('PARSE_CACHE_SIZE', DEFAULT_PARSE_CACHE_SIZE)
+        if not max_size:
+            return None
+        return cls(config.get('PARSE_CACHE_DIR') or DEFAULT_PARSE_CACHE_DIR, max_size)
+
+    def path(self, checksum):
+        return os.path.join(self.directory, f'{checksum}-v{PARSER_VERSION}{ENTRY_SUFFIX}')
+
+    def get(self, checksum):
+        """The cached ParsedTournament of the file with this checksum, or None"""
+        path = self.path(checksum)
+        try:
+            with open(path, 'rb') as f:
+                parsed = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Discarding unreadable parse cache entry {path}: {e}")
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return parsed
+
+    def put(self, checksum, parsed):
+        """Store a ParsedTournament; caching is best effort, errors are only logged"""
+        try:
+            data = zlib.compress(pickle.dumps(parsed, protocol=pickle.HIGHEST_PROTOCOL))
+            if len(data) > self.max_size:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temporary file first so readers never see partial entries
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path(checksum))
+            except BaseException:
+                self._remove(tmp_path)
+                raise
+            self.evict()
+        except Exception as e:
+            print(f"Could not write parse cache entry for {checksum}: {e}")
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits into max_size"""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(ENTRY_SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            self._remove(path)
+            size -= entry_size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
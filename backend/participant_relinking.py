@@ -0,0 +1,113 @@
+"""
+Participant Relinking Module
+
+Tournament participants that could not be matched at import time keep
+player_id NULL. Once the member CSV import adds the missing players, the
+relinking job matches all unlinked participants again in one pass: confirmed
+aliases first, then the name heuristics of the tournament import against an
+in-memory PlayerNameIndex. Players an admin disassociated from a name are
+never linked to it again. Matches are written in bulk, youth players are
+activated and the stats of all linked players are refreshed.
+
+The job runs after member CSV imports that created players and can be
+started from POST /api/tournament-players/relink.
+"""
+
+from db.models import db, Player, TournamentPlayer, MatchCandidate
+from jobs import submit_job
+from player_matching import PlayerNameIndex, load_name_aliases, record_alias, load_rejected_matches, is_rejected_match
+from player_stats import refresh_player_stats
+from tournament_importer import find_existing_player, set_player_active_if_youth
+
+JOB_KIND = 'participant_relinking'
+
+# Participants linked per transaction
+LINK_CHUNK_SIZE = 500
+
+
+def match_names(names):
+    """
+    Player ids for the given participant names, keyed by name; names without
+    a match are left out. Heuristic matches are recorded as aliases; rejected
+    matches (see player_matching.load_rejected_matches) are skipped.
+    """
+    aliases = load_name_aliases(names)
+    rejected_matches = load_rejected_matches()
+    name_index = PlayerNameIndex.load()
+    matches = {}
+    for name in names:
+        player_id = aliases.get(name)
+        if player_id is not None and is_rejected_match(rejected_matches, name, player_id):
+            player_id = None
+        if player_id is None:
+            player = find_existing_player(name, name_index=name_index)
+            if not player or is_rejected_match(rejected_matches, name, player.id):
+                continue
+            player_id = player.id
+            record_alias(player_id, name)
+        matches[name] = player_id
+    return matches
+
+
+def link_participants(participants, matches):
+    """
+    Link (id, name) participants to their matched players in bulk.
+
+    Returns the ids of the linked players. Does not commit.
+    """
+    links = [
+        {'id': tp_id, 'player_id': matches[name]}
+        for tp_id, name in participants if name in matches
+    ]
+    if not links:
+        return set()
+    db.session.execute(db.update(TournamentPlayer), links)
+    # Candidates are only kept for unlinked participants
+    MatchCandidate.query.filter(
+        MatchCandidate.tournament_player_id.in_([link['id'] for link in links])
+    ).delete(synchronize_session=False)
+
+    player_ids = {link['player_id'] for link in links}
+    for player in Player.query.filter(Player.id.in_(player_ids)).all():
+        set_player_active_if_youth(player)
+    refresh_player_stats(player_ids)
+    return player_ids
+
+
+def relink_participants(ctx):
+    """
+    Job handler: link all participants without a player that can be matched now.
+
+    Commits after every chunk of participants.
+    """
+    participants = db.session.query(TournamentPlayer.id, TournamentPlayer.name).filter(
+        TournamentPlayer.player_id.is_(None),
+        TournamentPlayer.name.isnot(None)
+    ).order_by(TournamentPlayer.id).all()
+    matches = match_names({name for _, name in participants})
+    db.session.commit()
+
+    linked = 0
+    player_ids = set()
+    for i in range(0, len(participants), LINK_CHUNK_SIZE):
+        chunk = [(tp_id, name) for tp_id, name in participants[i:i + LINK_CHUNK_SIZE] if name in matches]
+        player_ids |= link_participants(chunk, matches)
+        linked += len(chunk)
+        db.session.commit()
+        ctx.report(
+            participants=min(i + LINK_CHUNK_SIZE, len(participants)),
+            total_participants=len(participants),
+            linked=linked
+        )
+        ctx.check_cancelled()
+
+    return {
+        'unlinked_participants': len(participants),
+        'linked_participants': linked,
+        'linked_players': len(player_ids)
+    }
+
+
+def submit_relink_job(user_id=None):
+    """Start relinking in the background, see jobs.submit_job. Returns the Job."""
+    return submit_job(JOB_KIND, relink_participants, user_id=user_id)
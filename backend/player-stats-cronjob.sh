@@ -0,0 +1,5 @@
+#!/bin/bash
+
+source venv/bin/activate
+export FLASK_SECRET_KEY=cronjob-player-stats
+python update_player_stats.py
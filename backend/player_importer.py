@@ -0,0 +1,314 @@
+"""
+Player Import Module
+
+Imports the federation member CSV (semicolon separated, one row per club
+membership). Only "Stamm-Spieler" rows are imported; players are matched by
+their federation number (p_number).
+
+The import works in bulk: all affected players are loaded with one query per
+500 p_numbers, rows are diffed in memory, and inserts, updates and notes are
+written with executemany statements. Each player stores a hash of the row
+it was last imported from (import_row_hash); rows with the same hash are
+skipped without touching the database. import_player_rows leaves committing to
+the caller; import_player_csv_chunks commits after every chunk so files of
+any size can be imported with bounded memory.
+"""
+
+import csv
+import hashlib
+import os
+from datetime import datetime, date
+from itertools import islice
+from db.models import db, Player, Note
+from player_matching import name_keys
+from participant_relinking import submit_relink_job
+
+# Key translations for notes
+KEY_TRANSLATIONS = {
+    'first_name': 'Vorname',
+    'last_name': 'Nachname',
+    'elo': 'ELO',
+    'fide_number': 'FIDE-Nr.',
+    'fide_elo': 'FIDE-ELO',
+    'birthday': 'Geburtsdatum',
+    'kat': 'Kategorie',
+    'zip': 'PLZ',
+    'town': 'Ort',
+    'country': 'Land',
+    'phone': 'Telefon',
+    'email': 'E-Mail',
+    'email_alternate': 'E-Mail (alternativ)',
+    'club': 'Verein',
+    'is_active': 'Aktiv',
+    'female': 'Weiblich',
+    'p_number': 'PNr',
+    'tags': 'Tags',
+    'rating': 'Wertung',
+    'username': 'Benutzername',
+    'citizen': 'Staatsbuerger',
+    'address': 'Adresse',
+    'fide_title': 'FIDE-Titel'
+}
+
+REQUIRED_HEADERS = [
+    'PNr', 'Vorname', 'Nachname', 'elo', 'Funktion', 'Verein', 'Staat', 'Gebdat', 'Sex'
+]
+
+# Columns that are normalized to title case; some names are entered in all UPPERCASE
+TITLE_CASE_COLUMNS = ['Vorname', 'Nachname', 'Verein', 'Ort', 'Staat', 'Adresse']
+
+# p_numbers per IN (...) list, well below SQLite's variable limit
+LOOKUP_CHUNK_SIZE = 500
+
+# CSV rows per committed chunk in import_player_csv_chunks
+DEFAULT_IMPORT_CHUNK_SIZE = 1000
+
+
+def parse_birthday(s):
+    s = s.strip()
+    if not s:
+        return None
+    # Accept formats: YYYYMMDD or YYYY-MM-DD
+    try:
+        if '-' in s:
+            return date.fromisoformat(s)
+        elif len(s) == 8:
+            return date(int(s[:4]), int(s[4:6]), int(s[6:8]))
+    except Exception:
+        return None
+    return None
+
+
+# Define mapping from CSV to Player fields
+FIELD_MAP = [
+    ('first_name', 'Vorname', str),
+    ('last_name', 'Nachname', str),
+    ('elo', 'elo', int),
+    ('fide_number', 'FideNr', lambda v: int(v) if v else None),
+    ('fide_elo', 'FideElo', lambda v: int(v) if v else None),
+    ('birthday', 'Gebdat', parse_birthday),
+    ('kat', 'Kategorie', str),
+    ('zip', 'Plz', str),
+    ('town', 'Ort', str),
+    ('country', 'Staat', str),
+    ('citizen', 'Staatsbuerger', str),
+    ('phone', 'Telefon', str),
+    ('email', 'Email', str),
+    ('club', 'Verein', str),
+    ('address', 'Adresse', str),
+    ('fide_title', 'fidetitel', str)
+]
+
+
+# Raw CSV columns covered by the row hash
+HASHED_COLUMNS = ['PNr', 'Sex', 'bis'] + [csv_key for _, csv_key, _ in FIELD_MAP]
+
+
+def missing_headers(fieldnames):
+    """Required CSV headers that are not present in fieldnames"""
+    return [h for h in REQUIRED_HEADERS if h not in (fieldnames or [])]
+
+
+def is_imported_row(row):
+    """Only Stamm-Spieler rows are imported"""
+    return row.get('Funktion', '').strip() == 'Stamm-Spieler'
+
+
+def parse_is_active(row):
+    """False if the membership ended (bis column in the past), otherwise None (unknown)"""
+    bis_str = row.get('bis', '').strip()
+    if bis_str:
+        try:
+            bis_date = datetime.strptime(bis_str, '%d.%m.%Y').date()
+            if bis_date < date.today():
+                return False
+        except Exception:
+            pass
+    return None
+
+
+def row_hash(row):
+    """
+    Hash of everything the import takes from a CSV row.
+
+    Computed on the raw values, so unchanged rows can be recognized without
+    casting them. The derived is_active is included because it depends on
+    today's date, not only on the row.
+    """
+    values = [row.get(key) or '' for key in HASHED_COLUMNS]
+    values.append(str(parse_is_active(row)))
+    return hashlib.sha1('\x1f'.join(values).encode('utf-8')).hexdigest()
+
+
+def parse_player_row(row):
+    """
+    Convert a CSV row into player values.
+
+    Returns None for rows that are not imported (anything but Stamm-Spieler),
+    otherwise a dict with p_number, is_active (None if unknown), female and
+    the FIELD_MAP attributes.
+    """
+    if not is_imported_row(row):
+        return None
+
+    is_active = parse_is_active(row)
+
+    # Determine female from Sex column
+    sex_value = row.get('Sex', '').strip().lower()
+
+    for key in TITLE_CASE_COLUMNS:
+        if key in row:
+            row[key] = row[key].strip().title()
+
+    values = {attr: cast(row.get(csv_key, '')) for attr, csv_key, cast in FIELD_MAP}
+    values['p_number'] = int(row.get('PNr', 0))
+    values['is_active'] = is_active
+    values['female'] = sex_value in ('w', 'f')
+    return values
+
+
+def load_players_by_number(p_numbers):
+    """Current values of the players with the given p_numbers, keyed by p_number"""
+    columns = [Player.id, Player.p_number, Player.is_active, Player.import_row_hash] + [getattr(Player, attr) for attr, _, _ in FIELD_MAP]
+    p_numbers = list(p_numbers)
+    players = {}
+    for i in range(0, len(p_numbers), LOOKUP_CHUNK_SIZE):
+        rows = db.session.execute(
+            db.select(*columns).where(Player.p_number.in_(p_numbers[i:i + LOOKUP_CHUNK_SIZE]))
+        )
+        for row in rows:
+            players[row.p_number] = dict(row._mapping)
+    return players
+
+
+def diff_player(current, values):
+    """Apply values to the current player dict; returns the note texts of all changes"""
+    changes = []
+    is_active = values['is_active']
+    if is_active is not None and current['is_active'] != is_active:
+        changes.append(f"Aktiv: '{current['is_active']}' → '{is_active}'")
+        current['is_active'] = is_active
+
+    for attr, _, _ in FIELD_MAP:
+        new_value = values[attr]
+        old_value = current[attr]
+        if old_value != new_value:
+            key_label = KEY_TRANSLATIONS.get(attr, attr)
+            changes.append(f"{key_label}: '{old_value}' → '{new_value}'")
+            current[attr] = new_value
+    return changes
+
+
+def import_player_rows(rows):
+    """
+    Import raw CSV rows (dicts from csv.DictReader) in bulk.
+
+    Rows whose hash matches the row last imported for the player are skipped
+    without any write, so local edits of a player are kept until the
+    federation data changes. Changed players are updated and get an
+    "Importiert" note listing the changes; new players are created inactive
+    with an "Importiert" note. Returns a dict with the number of imported
+    (new), updated and unchanged players.
+    """
+    rows = [(row, int(row.get('PNr', 0)), row_hash(row)) for row in rows if is_imported_row(row)]
+    if not rows:
+        return {'imported': 0, 'updated': 0, 'unchanged': 0}
+
+    existing = load_players_by_number({p_number for _, p_number, _ in rows})
+    new_players = {}  # p_number -> insert values
+    updated = {}  # player id -> update values
+    changed = set()  # ids of players with changed values (not just a new row hash)
+    notes = []  # (p_number, content)
+    unchanged = 0
+
+    for row, p_number, hash_value in rows:
+        current = existing.get(p_number) or new_players.get(p_number)
+        if current is not None and current['import_row_hash'] == hash_value:
+            unchanged += 1
+            continue
+
+        values = parse_player_row(row)
+        if current is not None:
+            changes = diff_player(current, values)
+            current['import_row_hash'] = hash_value
+            current.update(name_keys(current['first_name'], current['last_name']))
+            if 'id' in current:
+                updated[current['id']] = current
+            if changes:
+                notes.append((p_number, "Importiert: " + "; ".join(changes)))
+                if 'id' in current:
+                    changed.add(current['id'])
+        else:
+            # New players start inactive
+            new_players[p_number] = {
+                **values,
+                **name_keys(values['first_name'], values['last_name']),
+                'is_active': False,
+                'import_row_hash': hash_value
+            }
+            notes.append((p_number, "Importiert"))
+
+    player_ids = {p_number: current['id'] for p_number, current in existing.items()}
+    if new_players:
+        result = db.session.execute(
+            db.insert(Player).returning(Player.id, Player.p_number, sort_by_parameter_order=True),
+            list(new_players.values())
+        )
+        player_ids.update({row.p_number: row.id for row in result})
+    if updated:
+        db.session.execute(db.update(Player), list(updated.values()))
+
+    if notes:
+        now = datetime.now()
+        db.session.execute(db.insert(Note), [
+            {'player_id': player_ids[p_number], 'content': content, 'created_at': now, 'updated_at': now}
+            for p_number, content in notes
+        ])
+    return {'imported': len(new_players), 'updated': len(changed), 'unchanged': unchanged}
+
+
+def import_player_csv_chunks(reader, chunk_size=DEFAULT_IMPORT_CHUNK_SIZE):
+    """
+    Import CSV rows from reader (a csv.DictReader) in chunks of chunk_size rows.
+
+    Rows are read incrementally and every chunk is committed on its own, so
+    neither the file nor the whole import is ever held in memory. Yields the
+    running totals after each chunk: chunk number, CSV rows read, imported
+    and updated players. Chunks committed before an error stay committed.
+    """
+    totals = {'chunk': 0, 'rows': 0, 'imported': 0, 'updated': 0, 'unchanged': 0}
+    while True:
+        rows = list(islice(reader, chunk_size))
+        if not rows:
+            break
+        result = import_player_rows(rows)
+        db.session.commit()
+        totals['chunk'] += 1
+        totals['rows'] += len(rows)
+        totals['imported'] += result['imported']
+        totals['updated'] += result['updated']
+        totals['unchanged'] += result['unchanged']
+        yield dict(totals)
+
+
+def import_player_csv_job(ctx, path, chunk_size=DEFAULT_IMPORT_CHUNK_SIZE):
+    """
+    Background job (see jobs.py) importing the CSV file at path in chunks.
+
+    Progress is reported after every committed chunk, which is also where a
+    cancellation takes effect. The file is removed when the job ends. If
+    players were created, a relinking job is started for them (see
+    participant_relinking.py).
+    """
+    try:
+        with open(path, encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f, delimiter=';')
+            progress = {'chunk': 0, 'rows': 0, 'imported': 0, 'updated': 0, 'unchanged': 0}
+            for progress in import_player_csv_chunks(reader, chunk_size):
+                ctx.report(**progress)
+                ctx.check_cancelled()
+        if progress['imported']:
+            progress['relink_job_id'] = submit_relink_job().id
+        return progress
+    finally:
+        os.remove(path)
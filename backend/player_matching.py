@@ -0,0 +1,292 @@
+"""
+Player Matching Module
+
+Helpers for matching participant names from tournament imports to existing
+players:
+
+- normalize_name folds names for the persisted, indexed first_name_key and
+  last_name_key columns of Player, so name lookups can use an index.
+- PlayerNameIndex holds all player names in memory. find_existing_player
+  (tournament_importer.py) tries many name variants per participant; with an
+  index built once per import every variant is a dict lookup.
+- TrigramIndex ranks players by trigram similarity for names that have no
+  exact match (typos, missing accents, double-barrelled names).
+- Player aliases remember confirmed identities (name variants and FIDE ids)
+  from admin associations and earlier exact or heuristic matches; imports
+  consult them first. Fuzzy links are never recorded as aliases.
+- Rejected matches remember which player an admin disassociated from a
+  participant name, so automatic matching does not link them again.
+"""
+
+import unicodedata
+from collections import Counter, defaultdict
+from sqlalchemy.dialects.sqlite import insert
+from db.models import db, Player, PlayerAlias, TournamentPlayer
+
+UMLAUT_TRANSLITERATIONS = [('ä', 'ae'), ('ö', 'oe'), ('ü', 'ue'), ('ß', 'ss')]
+
+# Players whose name keys are backfilled per query
+BACKFILL_CHUNK_SIZE = 500
+
+# Alias keys per IN (...) list in load_name_aliases
+ALIAS_LOOKUP_CHUNK_SIZE = 500
+
+# Fuzzy matching defaults, can be overridden in app.config
+DEFAULT_FUZZY_AUTO_LINK_THRESHOLD = 0.85  # FUZZY_MATCH_AUTO_LINK_THRESHOLD
+DEFAULT_FUZZY_REVIEW_THRESHOLD = 0.5  # FUZZY_MATCH_REVIEW_THRESHOLD
+FUZZY_MAX_CANDIDATES = 3
+# The best candidate is only linked automatically if it beats the runner-up by this much
+FUZZY_AMBIGUITY_MARGIN = 0.05
+
+# SQLite's lower() only folds ASCII letters
+_SQLITE_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+
+def sqlite_lower(value):
+    """Python equivalent of SQLite's lower()"""
+    return value.translate(_SQLITE_LOWER)
+
+
+def normalize_name(value):
+    """
+    Fold a name for matching: lowercase, transliterate umlauts (ü -> ue),
+    strip other diacritics, drop titles and initials (parts containing a dot)
+    and collapse whitespace. "Dr. Jörg  MÜLLER" becomes "joerg mueller".
+    """
+    value = (value or '').lower()
+    for umlaut, transliteration in UMLAUT_TRANSLITERATIONS:
+        value = value.replace(umlaut, transliteration)
+    value = ''.join(c for c in unicodedata.normalize('NFKD', value) if not unicodedata.combining(c))
+    return ' '.join(part for part in value.split() if '.' not in part)
+
+
+def name_keys(first_name, last_name):
+    """Values of the first_name_key and last_name_key columns"""
+    return {'first_name_key': normalize_name(first_name), 'last_name_key': normalize_name(last_name)}
+
+
+def update_name_keys(player):
+    """Recompute the name keys of a Player after its names changed"""
+    for column, value in name_keys(player.first_name, player.last_name).items():
+        setattr(player, column, value)
+
+
+@db.event.listens_for(Player, 'before_insert')
+@db.event.listens_for(Player, 'before_update')
+def _fill_name_keys(mapper, connection, player):
+    # Keeps the keys current for every ORM write (update_player and friends);
+    # bulk writes like the CSV import set them explicitly
+    update_name_keys(player)
+
+
+def backfill_name_keys():
+    """Fill the name keys of players that do not have them yet. Does not commit."""
+    filled = 0
+    while True:
+        rows = db.session.query(Player.id, Player.first_name, Player.last_name).filter(
+            db.or_(Player.first_name_key.is_(None), Player.last_name_key.is_(None))
+        ).limit(BACKFILL_CHUNK_SIZE).all()
+        if not rows:
+            return filled
+        db.session.execute(db.update(Player), [
+            {'id': row.id, **name_keys(row.first_name, row.last_name)} for row in rows
+        ])
+        filled += len(rows)
+
+
+def find_player_by_name(first, last):
+    """
+    The player with lower(first_name) == first.lower() and
+    lower(last_name) == last.lower(), lowest id first, or None.
+
+    Candidates are found through the indexed name keys; the exact comparison
+    is then done in Python.
+    """
+    keys = name_keys(first, last)
+    candidates = Player.query.filter(
+        Player.first_name_key == keys['first_name_key'],
+        Player.last_name_key == keys['last_name_key']
+    ).order_by(Player.id).all()
+    for player in candidates:
+        if sqlite_lower(player.first_name) == first.lower() and sqlite_lower(player.last_name) == last.lower():
+            return player
+    return None
+
+
+class PlayerNameIndex:
+    """
+    Players keyed by (lower(first_name), lower(last_name)).
+
+    Keys are folded like SQLite's lower() on the stored names, while lookups
+    use Python's lower() on the searched names, so a lookup matches exactly
+    what `db.func.lower(column) == value.lower()` matched. Where several
+    players share a name, the one with the lowest id wins, as with the
+    unordered .first() query.
+    """
+
+    def __init__(self, rows):
+        self.player_ids = {}
+        for player_id, first_name, last_name in rows:
+            key = (sqlite_lower(first_name or ''), sqlite_lower(last_name or ''))
+            self.player_ids.setdefault(key, player_id)
+
+    @classmethod
+    def load(cls):
+        """Build the index from all players with a single query"""
+        return cls(db.session.query(Player.id, Player.first_name, Player.last_name).order_by(Player.id).all())
+
+    def get(self, first, last):
+        """The player named first last (compared case-insensitively), or None"""
+        player_id = self.player_ids.get((first.lower(), last.lower()))
+        return db.session.get(Player, player_id) if player_id is not None else None
+
+
+def name_trigrams(name):
+    """
+    Trigrams of a normalized name, pg_trgm style: every word is padded with
+    two spaces in front and one behind. Word order and "Last, First" commas
+    do not matter; hyphens separate words.
+    """
+    words = normalize_name(name.replace(',', ' ').replace('-', ' ')).split()
+    trigrams = set()
+    for word in words:
+        padded = f'  {word} '
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+class TrigramIndex:
+    """Players by the trigrams of their normalized full name"""
+
+    def __init__(self, rows):
+        self.sizes = {}
+        self.postings = defaultdict(list)
+        for player_id, first_name_key, last_name_key in rows:
+            trigrams = name_trigrams(f'{first_name_key or ""} {last_name_key or ""}')
+            self.sizes[player_id] = len(trigrams)
+            for trigram in trigrams:
+                self.postings[trigram].append(player_id)
+
+    @classmethod
+    def load(cls):
+        """Build the index from the name keys of all players with a single query"""
+        return cls(db.session.query(Player.id, Player.first_name_key, Player.last_name_key).all())
+
+    def candidates(self, name, min_score=DEFAULT_FUZZY_REVIEW_THRESHOLD, limit=FUZZY_MAX_CANDIDATES):
+        """Best matching players as (player_id, score) pairs, highest score first"""
+        trigrams = name_trigrams(name)
+        if not trigrams:
+            return []
+        shared = Counter()
+        for trigram in trigrams:
+            shared.update(self.postings.get(trigram, ()))
+        # Dice coefficient of the two trigram sets
+        scored = [
+            (player_id, 2 * count / (len(trigrams) + self.sizes[player_id]))
+            for player_id, count in shared.items()
+        ]
+        scored = [(player_id, score) for player_id, score in scored if score >= min_score]
+        scored.sort(key=lambda candidate: (-candidate[1], candidate[0]))
+        return scored[:limit]
+
+    def match_many(self, names, min_score=DEFAULT_FUZZY_REVIEW_THRESHOLD, limit=FUZZY_MAX_CANDIDATES):
+        """Candidates for many names at once, keyed by name"""
+        return {name: self.candidates(name, min_score, limit) for name in set(names)}
+
+
+def auto_link_candidate(candidates, threshold=DEFAULT_FUZZY_AUTO_LINK_THRESHOLD):
+    """The (player_id, score) to link without review, or None if no candidate is certain enough"""
+    if not candidates or candidates[0][1] < threshold:
+        return None
+    if len(candidates) > 1 and candidates[1][1] > candidates[0][1] - FUZZY_AMBIGUITY_MARGIN:
+        return None
+    return candidates[0]
+
+
+def alias_name_key(name):
+    """Key of a participant name in player_aliases: normalized, independent of word order and commas"""
+    return ' '.join(sorted(normalize_name(name.replace(',', ' ')).split()))
+
+
+def _alias_keys(name=None, fide_id=None):
+    keys = []
+    if fide_id:
+        keys.append(('fide_id', str(fide_id)))
+    if name and alias_name_key(name):
+        keys.append(('name', alias_name_key(name)))
+    return keys
+
+
+def _load_alias_player_ids(kind, keys):
+    """Player ids of the aliases of a kind with the given keys, keyed by alias key"""
+    keys = list(keys)
+    player_ids = {}
+    for i in range(0, len(keys), ALIAS_LOOKUP_CHUNK_SIZE):
+        rows = db.session.query(PlayerAlias.alias_key, PlayerAlias.player_id).filter(
+            PlayerAlias.kind == kind,
+            PlayerAlias.alias_key.in_(keys[i:i + ALIAS_LOOKUP_CHUNK_SIZE])
+        )
+        player_ids.update(dict(rows.all()))
+    return player_ids
+
+
+def load_name_aliases(names):
+    """Player ids of all names that have a name alias, keyed by name"""
+    keys = {name: alias_name_key(name) for name in names}
+    player_ids = _load_alias_player_ids('name', {key for key in keys.values() if key})
+    return {name: player_ids[key] for name, key in keys.items() if key in player_ids}
+
+
+def load_fide_id_aliases(fide_ids):
+    """Player ids of all FIDE ids that have an alias, keyed by FIDE id"""
+    return _load_alias_player_ids('fide_id', {str(fide_id) for fide_id in fide_ids if fide_id})
+
+
+def record_alias(player_id, name=None, fide_id=None, source='import'):
+    """
+    Remember that a participant name and/or FIDE id belongs to a player.
+
+    Manual aliases replace any existing alias of the same key; aliases from
+    imports never replace manual ones. Only record confirmed identities
+    (admin associations, exact or heuristic matches), never fuzzy guesses.
+    Does not commit.
+    """
+    keys = _alias_keys(name, fide_id)
+    if not player_id or not keys:
+        return
+    statement = insert(PlayerAlias).values([
+        {'kind': kind, 'alias_key': key, 'player_id': player_id, 'source': source}
+        for kind, key in keys
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[PlayerAlias.kind, PlayerAlias.alias_key],
+        set_={'player_id': statement.excluded.player_id, 'source': statement.excluded.source},
+        where=db.or_(PlayerAlias.source != 'manual', statement.excluded.source == 'manual')
+    )
+    db.session.execute(statement)
+
+
+def forget_alias(player_id, name):
+    """Drop the name alias linking name to player_id, e.g. after a wrong association. Does not commit."""
+    if not player_id or not alias_name_key(name or ''):
+        return
+    PlayerAlias.query.filter_by(
+        kind='name', alias_key=alias_name_key(name), player_id=player_id
+    ).delete(synchronize_session=False)
+
+
+def load_rejected_matches():
+    """
+    (alias name key, player id) pairs an admin rejected by disassociating a
+    participant from a player. Automatic matching skips these pairs in every
+    tournament, not only the one where the participant was disassociated.
+    """
+    rows = db.session.query(TournamentPlayer.name, TournamentPlayer.rejected_player_id).filter(
+        TournamentPlayer.rejected_player_id.isnot(None)
+    ).all()
+    return {(alias_name_key(name or ''), player_id) for name, player_id in rows}
+
+
+def is_rejected_match(rejected_matches, name, player_id):
+    """Whether linking name to player_id was rejected, see load_rejected_matches"""
+    return (alias_name_key(name or ''), player_id) in rejected_matches
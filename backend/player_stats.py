@@ -0,0 +1,178 @@
+"""
+Player Statistics Module
+
+Maintains the materialized player_stats table (points and games of the last
+STATS_WINDOW_DAYS days, split into rated and unrated tournaments), so the
+player endpoints can read statistics with a single join instead of running
+grouped aggregates over tournament_players and games on every request.
+
+Writers that change tournament participations, games or tournament dates call
+refresh_player_stats() for the affected players before committing. The nightly
+roll_stats_window() (see update_player_stats.py) moves the window forward.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy.dialects.sqlite import insert
+from db.models import db, Player, PlayerStats, Tournament, TournamentPlayer, Game
+
+STATS_WINDOW_DAYS = 360
+
+
+def stats_window_start():
+    """Oldest tournament date that still counts towards the statistics"""
+    return datetime.now().date() - timedelta(days=STATS_WINDOW_DAYS)
+
+
+def calculate_player_stats(player_ids, window_start):
+    """Calculate rated/unrated points and games since window_start for the given players"""
+    rated = Tournament.elo_rating.isnot(None)
+
+    # Calculate points separately (no join to games to avoid duplication)
+    points_query = db.session.query(
+        TournamentPlayer.player_id,
+        db.func.sum(db.case((rated, 0), else_=db.func.coalesce(TournamentPlayer.points, 0))).label('total_points'),
+        db.func.sum(db.case((rated, db.func.coalesce(TournamentPlayer.points, 0)), else_=0)).label('total_points_rated')
+    ).join(
+        Tournament, TournamentPlayer.tournament_id == Tournament.id
+    ).filter(
+        TournamentPlayer.player_id.in_(player_ids),
+        Tournament.date >= window_start
+    ).group_by(TournamentPlayer.player_id).all()
+
+    games_query = db.session.query(
+        TournamentPlayer.player_id,
+        db.func.count(db.case((rated, None), else_=Game.id)).label('total_games'),
+        db.func.count(db.case((rated, Game.id), else_=None)).label('total_games_rated')
+    ).join(
+        Tournament, TournamentPlayer.tournament_id == Tournament.id
+    ).join(
+        Game, db.and_(
+            Game.tournament_id == Tournament.id,
+            Game.player_id == TournamentPlayer.id
+        )
+    ).filter(
+        TournamentPlayer.player_id.in_(player_ids),
+        Tournament.date >= window_start
+    ).group_by(TournamentPlayer.player_id).all()
+
+    stats = {
+        player_id: {
+            'total_points': 0,
+            'total_games': 0,
+            'total_points_rated': 0,
+            'total_games_rated': 0
+        }
+        for player_id in player_ids
+    }
+    for row in points_query:
+        stats[row.player_id]['total_points'] = row.total_points or 0
+        stats[row.player_id]['total_points_rated'] = row.total_points_rated or 0
+    for row in games_query:
+        stats[row.player_id]['total_games'] = row.total_games or 0
+        stats[row.player_id]['total_games_rated'] = row.total_games_rated or 0
+    return stats
+
+
+def refresh_player_stats(player_ids):
+    """
+    Recalculate the materialized statistics of the given players.
+
+    Runs inside the current session transaction; the caller commits.
+    """
+    player_ids = {player_id for player_id in player_ids if player_id is not None}
+    if not player_ids:
+        return 0
+
+    # Make pending participations and games visible to the aggregate queries
+    db.session.flush()
+
+    # Deleted players have no stats row to maintain
+    player_ids = [
+        row.id for row in db.session.query(Player.id).filter(Player.id.in_(player_ids)).all()
+    ]
+    if not player_ids:
+        return 0
+
+    window_start = stats_window_start()
+    stats = calculate_player_stats(player_ids, window_start)
+
+    rows = [
+        {'player_id': player_id, 'window_start': window_start, 'updated_at': datetime.now(), **values}
+        for player_id, values in stats.items()
+    ]
+    statement = insert(PlayerStats).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[PlayerStats.player_id],
+        set_={
+            'total_points': statement.excluded.total_points,
+            'total_games': statement.excluded.total_games,
+            'total_points_rated': statement.excluded.total_points_rated,
+            'total_games_rated': statement.excluded.total_games_rated,
+            'window_start': statement.excluded.window_start,
+            'updated_at': statement.excluded.updated_at
+        }
+    )
+    db.session.execute(statement)
+    # Drop cached PlayerStats instances so readers see the new values
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, PlayerStats):
+            db.session.expire(obj)
+    return len(rows)
+
+
+def refresh_tournament_player_stats(tournament_id):
+    """Recalculate the statistics of all players that took part in a tournament"""
+    player_ids = [
+        row.player_id for row in db.session.query(TournamentPlayer.player_id).filter(
+            TournamentPlayer.tournament_id == tournament_id,
+            TournamentPlayer.player_id.isnot(None)
+        ).distinct().all()
+    ]
+    return refresh_player_stats(player_ids)
+
+
+def refresh_missing_player_stats():
+    """Create statistics for players that do not have a player_stats row yet"""
+    player_ids = [
+        row.id for row in db.session.query(Player.id).outerjoin(
+            PlayerStats, PlayerStats.player_id == Player.id
+        ).filter(PlayerStats.player_id.is_(None)).all()
+    ]
+    refreshed = 0
+    # Keep the IN (...) lists well below SQLite's variable limit
+    for i in range(0, len(player_ids), 500):
+        refreshed += refresh_player_stats(player_ids[i:i + 500])
+    return refreshed
+
+
+def roll_stats_window():
+    """
+    Move the statistics window forward to today.
+
+    Only players with a tournament that dropped out of the window since their
+    last refresh are recalculated; all other rows just get the new window start.
+    Returns the number of recalculated players.
+    """
+    window_start = stats_window_start()
+
+    expired_player_ids = [
+        row.player_id for row in db.session.query(TournamentPlayer.player_id).join(
+            Tournament, TournamentPlayer.tournament_id == Tournament.id
+        ).join(
+            PlayerStats, PlayerStats.player_id == TournamentPlayer.player_id
+        ).filter(
+            Tournament.date >= PlayerStats.window_start,
+            Tournament.date < window_start
+        ).distinct().all()
+    ]
+
+    refreshed = 0
+    for i in range(0, len(expired_player_ids), 500):
+        refreshed += refresh_player_stats(expired_player_ids[i:i + 500])
+
+    PlayerStats.query.filter(PlayerStats.window_start < window_start).update(
+        {PlayerStats.window_start: window_start}, synchronize_session=False
+    )
+    refreshed += refresh_missing_player_stats()
+    db.session.commit()
+    return refreshed
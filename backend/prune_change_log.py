@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Nightly job that prunes old change_log rows.
+
+Deletes change tracking rows older than the retention period, see
+change_log_retention.py. Run once a day via cron, e.g. through
+changelog-cronjob.sh.
+"""
+
+import sys
+import os
+import logging
+from datetime import datetime
+
+# Add the backend directory to Python path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, backend_dir)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+def main():
+    logger.info(f"Pruning change log at {datetime.now()}")
+
+    try:
+        # Import here to avoid issues with Flask app context
+        from app import create_app
+        from jobs import run_job
+        from change_log_retention import JOB_KIND, prune_change_log
+
+        app = create_app()
+
+        with app.app_context():
+            job = run_job(JOB_KIND, prune_change_log)
+            if job.status != 'succeeded':
+                logger.error(f"Change log pruning {job.status}: {job.error}")
+                sys.exit(1)
+            logger.info(f"Change log pruned: {job.result}")
+
+    except Exception as e:
+        logger.error(f"Error pruning change log: {str(e)}", exc_info=True)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Shared fixtures for the pytest tests.
+
+Every test gets its own app on a fresh SQLite database (DATABASE_PATH) and
+parse cache directory in tmp_path, so tests never touch db/chesscrew.sqlite3.
+"""
+
+import pytest
+
+from db.models import db, User
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('FLASK_SECRET_KEY', 'test')
+    monkeypatch.setenv('DATABASE_PATH', str(tmp_path / 'test.sqlite3'))
+    monkeypatch.setenv('PARSE_CACHE_DIR', str(tmp_path / 'parse_cache'))
+    from app import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    # The test client talks plain http
+    app.config['SESSION_COOKIE_SECURE'] = False
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    """Test client logged in as an admin"""
+    with app.app_context():
+        user = User(username='admin', is_admin=True)
+        user.set_password('admin')
+        db.session.add(user)
+        db.session.commit()
+    client = app.test_client()
+    response = client.post('/api/login', json={'username': 'admin', 'password': 'admin'})
+    assert response.status_code == 200
+    return client
@@ -0,0 +1,72 @@
+"""Helpers to set up test data, see conftest.py for the fixtures"""
+
+import time
+from datetime import date, timedelta
+
+import openpyxl
+
+from db.models import db, Player, Tournament, TournamentPlayer
+
+
+def add_player(first_name, last_name, p_number, **values):
+    """Add a player to the session; returns it flushed"""
+    player = Player(first_name=first_name, last_name=last_name, p_number=p_number, elo=values.pop('elo', 1500), **values)
+    db.session.add(player)
+    db.session.flush()
+    return player
+
+
+def add_tournament(name, participants=(), days_ago=30, **values):
+    """
+    Add a tournament with participants, given as (name, player or None,
+    points) tuples; returns the tournament and its TournamentPlayers flushed.
+    """
+    tournament = Tournament(
+        name=name,
+        checksum=values.pop('checksum', name),
+        date=date.today() - timedelta(days=days_ago),
+        **values
+    )
+    db.session.add(tournament)
+    db.session.flush()
+    tournament_players = []
+    for tp_name, player, points in participants:
+        tp = TournamentPlayer(
+            tournament_id=tournament.id,
+            player_id=player.id if player else None,
+            name=tp_name,
+            points=points
+        )
+        db.session.add(tp)
+        tournament_players.append(tp)
+    db.session.flush()
+    return tournament, tournament_players
+
+
+def write_tournament_file(path, names):
+    """
+    Write a chess-results style Excel export with a simple cross table of
+    the given participant names; every game is won by the higher ranked one.
+    """
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['From the Tournament-Database of Chess-Results https://chess-results.com'])
+    sheet.append(['Test tournament'])
+    sheet.append(['Last update'])
+    sheet.append(['Rk.', None, 'Name', 'Rtg', 'FED'] + [str(i + 1) for i in range(len(names))] + ['TB1', 'TB2'])
+    for rank, name in enumerate(names, start=1):
+        results = ['*' if i + 1 == rank else (1 if i + 1 > rank else 0) for i in range(len(names))]
+        sheet.append([rank, None, name, 1500, 'AUT'] + results + [len(names) - rank, 0])
+    workbook.save(path)
+    return str(path)
+
+
+def wait_for_job(client, job_id, timeout=10):
+    """Poll a background job until it finished; returns its final state"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f'/api/jobs/{job_id}').get_json()
+        if job['status'] in ('succeeded', 'failed', 'cancelled'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'Job {job_id} did not finish within {timeout}s')
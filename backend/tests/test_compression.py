@@ -0,0 +1,79 @@
+"""Response compression (api/compression.py)"""
+
+import gzip
+
+import pytest
+
+from db.models import db
+from tests.helpers import add_tournament
+
+
+def add_tournaments(count):
+    for i in range(count):
+        add_tournament(f'Tournament {i}', location='Dornbirn, Vorarlberg')
+    db.session.commit()
+
+
+def test_compressed_stream_round_trip(app, client):
+    with app.app_context():
+        add_tournaments(40)
+
+    plain = client.get('/api/tournaments')
+    assert 'Content-Encoding' not in plain.headers
+    assert len(plain.data) > app.config['COMPRESSION_MIN_SIZE']
+
+    compressed = client.get('/api/tournaments', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert gzip.decompress(compressed.data) == plain.data
+    # Compressed and uncompressed responses carry the same weak ETag, and so does the 304
+    etag = compressed.headers['ETag']
+    assert etag.startswith('W/') and etag == plain.headers['ETag']
+    not_modified = client.get('/api/tournaments', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers['ETag'] == etag
+
+    # The second response comes from the cache of compressed bodies
+    cached = client.get('/api/tournaments', headers={'Accept-Encoding': 'gzip'})
+    assert cached.data == compressed.data
+    assert cached.headers['Content-Length'] == str(len(cached.data))
+
+
+def test_brotli_round_trip(app, client):
+    brotli = pytest.importorskip('brotli')
+    with app.app_context():
+        add_tournaments(40)
+    plain = client.get('/api/tournaments')
+    compressed = client.get('/api/tournaments', headers={'Accept-Encoding': 'gzip, br'})
+    assert compressed.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(compressed.data) == plain.data
+
+
+def test_small_bodies_are_not_compressed(app, client):
+    with app.app_context():
+        tournament, _ = add_tournament('Open', [('Muster, Hans', None, 1)])
+        db.session.commit()
+        tournament_id = tournament.id
+
+    # Streamed
+    games = client.get(f'/api/tournaments/{tournament_id}/games', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in games.headers
+    assert games.get_json() == []
+    assert games.headers['Content-Length'] == '2'
+
+    # Not streamed
+    players = client.get(f'/api/tournaments/{tournament_id}/players', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in players.headers
+    assert len(players.get_json()) == 1
+
+
+def test_large_json_response_round_trip(app, client):
+    with app.app_context():
+        tournament, _ = add_tournament('Open', [(f'Participant {i}, Name', None, i) for i in range(60)])
+        db.session.commit()
+        tournament_id = tournament.id
+
+    plain = client.get(f'/api/tournaments/{tournament_id}/players')
+    compressed = client.get(f'/api/tournaments/{tournament_id}/players', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == plain.data
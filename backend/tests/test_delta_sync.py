@@ -0,0 +1,131 @@
+"""Delta sync of GET /api/players?since=<cursor> from change_log"""
+
+from datetime import datetime, timedelta
+
+from change_log_retention import prune_change_log, JOB_KIND as PRUNING_JOB
+from db.models import db, ChangeLog, Player, Tag
+from jobs import run_job
+from tests.helpers import add_player, add_tournament
+
+
+def sync_cursor(client):
+    response = client.get('/api/players')
+    assert response.status_code == 200
+    # Consume the streamed body, so its request context is closed here
+    response.get_data()
+    return int(response.headers['X-Sync-Cursor'])
+
+
+def test_since_returns_only_changes_after_the_cursor(app, client):
+    with app.app_context():
+        hans = add_player('Hans', 'Muster', 1)
+        eva = add_player('Eva', 'Berg', 2)
+        db.session.commit()
+        hans_id, eva_id = hans.id, eva.id
+    cursor = sync_cursor(client)
+
+    assert client.put(f'/api/players/{hans_id}', json={'club': 'SK Test'}).status_code == 200
+    note = client.post(f'/api/players/{eva_id}/notes', json={'content': 'Hello'}).get_json()
+
+    changes = client.get(f'/api/players?since={cursor}').get_json()
+    assert {p['id'] for p in changes['players']} == {hans_id}
+    assert next(p for p in changes['players'] if p['id'] == hans_id)['club'] == 'SK Test'
+    # The update of Hans also wrote a "Geändert" note
+    assert {(n['player_id'], n['content']) for n in changes['notes']} >= {(eva_id, 'Hello')}
+    assert changes['deleted_players'] == []
+    assert changes['cursor'] > cursor
+
+    # Nothing changed since the new cursor
+    unchanged = client.get(f"/api/players?since={changes['cursor']}").get_json()
+    assert unchanged['players'] == [] and unchanged['notes'] == []
+    assert unchanged['cursor'] == changes['cursor']
+
+    assert client.delete(f"/api/players/{eva_id}/notes/{note['id']}").status_code == 200
+    assert client.delete(f'/api/players/{eva_id}').status_code == 200
+    changes = client.get(f"/api/players?since={unchanged['cursor']}").get_json()
+    assert eva_id in changes['deleted_players']
+    assert {n['id'] for n in changes['deleted_notes']} >= {note['id']}
+
+
+def test_participations_are_synced(app, client):
+    with app.app_context():
+        hans = add_player('Hans', 'Muster', 1)
+        db.session.commit()
+        hans_id = hans.id
+    cursor = sync_cursor(client)
+
+    with app.app_context():
+        tournament, (tp,) = add_tournament('Open', [('Muster, Hans', db.session.get(Player, hans_id), 2)])
+        db.session.commit()
+        tournament_id, tp_id = tournament.id, tp.id
+    changes = client.get(f'/api/players?since={cursor}').get_json()
+    assert [(t['player_id'], t['points']) for t in changes['tournaments']] == [(hans_id, 2)]
+
+    # Renaming the tournament changes the embedded participations
+    assert client.put(f'/api/tournaments/{tournament_id}', json={'name': 'Renamed'}).status_code == 200
+    changes = client.get(f"/api/players?since={changes['cursor']}").get_json()
+    assert {p['id'] for p in changes['players']} == {hans_id}
+
+    assert client.put(f'/api/tournament-players/{tp_id}/disassociate').status_code == 200
+    changes = client.get(f"/api/players?since={changes['cursor']}").get_json()
+    assert changes['deleted_tournaments'] == [{'id': tp_id, 'player_id': hans_id}]
+
+
+def test_tag_rename_reaches_players_with_the_tag(app, client):
+    with app.app_context():
+        hans = add_player('Hans', 'Muster', 1)
+        add_player('Eva', 'Berg', 2)
+        tag = Tag(name='Kader', color='#ff0000')
+        hans.tags.append(tag)
+        db.session.commit()
+        hans_id, tag_id = hans.id, tag.id
+    cursor = sync_cursor(client)
+
+    with app.app_context():
+        db.session.get(Tag, tag_id).name = 'Landeskader'
+        db.session.commit()
+    changes = client.get(f'/api/players?since={cursor}').get_json()
+    assert [p['id'] for p in changes['players']] == [hans_id]
+    assert [t['name'] for t in changes['players'][0]['tags']] == ['Landeskader']
+
+
+def test_pruned_cursor_requires_full_resync(app, client):
+    with app.app_context():
+        add_player('Hans', 'Muster', 1)
+        add_player('Eva', 'Berg', 2)
+        db.session.commit()
+    cursor = sync_cursor(client)
+
+    with app.app_context():
+        ChangeLog.query.update({ChangeLog.changed_at: datetime.now() - timedelta(days=365)})
+        db.session.commit()
+        job = run_job(PRUNING_JOB, prune_change_log)
+        assert job.status == 'succeeded'
+        # The newest change is kept, so the current cursor stays valid
+        assert job.result['deleted'] == cursor - 1
+
+    response = client.get('/api/players?since=0')
+    assert response.status_code == 410
+    assert response.get_json()['full_resync'] is True
+    assert client.get(f'/api/players?since={cursor}').status_code == 200
+    assert client.get('/api/players?since=abc').status_code == 400
+
+
+def test_internal_player_columns_are_not_synced(app, client):
+    with app.app_context():
+        hans = add_player('Hans', 'Muster', 1)
+        db.session.commit()
+        hans_id = hans.id
+    cursor = sync_cursor(client)
+
+    with app.app_context():
+        db.session.execute(db.update(Player).values(import_row_hash='abc', first_name_key=None, last_name_key=None))
+        db.session.commit()
+    changes = client.get(f'/api/players?since={cursor}').get_json()
+    assert changes['players'] == [] and changes['cursor'] == cursor
+
+    with app.app_context():
+        db.session.execute(db.update(Player).values(elo=1600))
+        db.session.commit()
+    changes = client.get(f'/api/players?since={cursor}').get_json()
+    assert [p['id'] for p in changes['players']] == [hans_id]
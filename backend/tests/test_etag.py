@@ -0,0 +1,45 @@
+"""ETag/304 handling of the versioned read endpoints (api/etag.py)"""
+
+from db.models import db
+from tests.helpers import add_player, add_tournament
+
+
+def test_unchanged_list_is_answered_with_304(app, client):
+    with app.app_context():
+        add_tournament('First')
+        add_tournament('Second')
+        db.session.commit()
+
+    response = client.get('/api/tournaments')
+    assert len(response.get_json()) == 2
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    not_modified = client.get('/api/tournaments', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+    assert not_modified.headers['ETag'] == etag
+
+    # Any write to a versioned table changes the ETag
+    with app.app_context():
+        add_tournament('Another')
+        db.session.commit()
+    changed = client.get('/api/tournaments', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert len(changed.get_json()) == 3
+
+
+def test_etag_depends_on_query_string(app, client):
+    with app.app_context():
+        add_player('Hans', 'Muster', 1)
+        db.session.commit()
+    full = client.get('/api/players')
+    full.close()
+    projected = client.get('/api/players?fields=first_name')
+    projected.close()
+    assert full.headers['ETag'] != projected.headers['ETag']
+
+    response = client.get('/api/players?fields=first_name', headers={'If-None-Match': full.headers['ETag']})
+    assert response.status_code == 200
+    assert response.get_json()[0]['first_name'] == 'Hans'
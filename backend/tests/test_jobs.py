@@ -0,0 +1,81 @@
+"""Background jobs (jobs.py, /api/jobs)"""
+
+import os
+import threading
+
+from db.models import db, Job
+from jobs import fail_interrupted_jobs, request_cancel, run_job, submit_job
+from tests.helpers import wait_for_job
+
+# Far above any pid_max, so no such process exists
+DEAD_PID = 2 ** 30
+
+
+def test_job_reports_progress_and_result(app, client):
+    def handler(ctx, count):
+        for i in range(count):
+            ctx.report(done=i + 1)
+        return {'count': count}
+
+    with app.app_context():
+        job_id = submit_job('test', handler, 3).id
+    job = wait_for_job(client, job_id)
+    assert (job['status'], job['progress'], job['result']) == ('succeeded', {'done': 3}, {'count': 3})
+
+    with app.app_context():
+        job = run_job('test', lambda ctx: 1 / 0)
+        assert (job.status, job.error) == ('failed', 'division by zero')
+
+
+def test_running_job_stops_at_check_cancelled(app, client):
+    started, resume = threading.Event(), threading.Event()
+    steps = []
+
+    def handler(ctx):
+        started.set()
+        resume.wait(10)
+        ctx.check_cancelled()
+        steps.append('after cancel')
+
+    with app.app_context():
+        job_id = submit_job('test', handler).id
+    assert started.wait(10)
+    response = client.post(f'/api/jobs/{job_id}/cancel')
+    assert response.get_json()['status'] == 'running'
+    resume.set()
+    assert wait_for_job(client, job_id)['status'] == 'cancelled'
+    assert steps == []
+
+
+def test_queued_job_is_cancelled_right_away(app):
+    with app.app_context():
+        job = Job(kind='test', status='queued')
+        db.session.add(job)
+        db.session.commit()
+        request_cancel(job)
+        assert (job.status, job.cancel_requested) == ('cancelled', True)
+        assert job.finished_at is not None
+
+        # Finished jobs stay as they are
+        request_cancel(job)
+        assert job.status == 'cancelled'
+
+
+def test_fail_interrupted_jobs(app):
+    with app.app_context():
+        db.session.add_all([
+            Job(kind='test', status='running', worker_pid=DEAD_PID),
+            Job(kind='test', status='queued', worker_pid=None),
+            Job(kind='test', status='succeeded', worker_pid=DEAD_PID),
+            # Jobs of this process are still being worked on
+            Job(kind='test', status='running', worker_pid=os.getpid()),
+        ])
+        db.session.commit()
+        assert fail_interrupted_jobs() == 2
+        db.session.commit()
+        assert [(job.status, job.error) for job in Job.query.order_by(Job.id)] == [
+            ('failed', 'Interrupted by a server restart'),
+            ('failed', 'Interrupted by a server restart'),
+            ('succeeded', None),
+            ('running', None),
+        ]
@@ -0,0 +1,163 @@
+"""Member CSV import (POST /api/players-import-csv)"""
+
+import io
+import json
+
+import pytest
+
+from db.models import db, Note, Player, TournamentPlayer
+from player_importer import FIELD_MAP
+from tests.helpers import add_tournament, wait_for_job
+
+CSV_COLUMNS = ['PNr', 'Funktion', 'Sex', 'bis'] + [csv_key for _, csv_key, _ in FIELD_MAP]
+
+MEMBERS = [
+    {'PNr': '101', 'Funktion': 'Stamm-Spieler', 'Sex': 'm', 'Vorname': 'hans', 'Nachname': 'MUSTER',
+     'elo': '1500', 'Gebdat': '20100502', 'Kategorie': 'U16', 'Verein': 'Schachklub Dornbirn', 'Staat': 'AUT'},
+    {'PNr': '102', 'Funktion': 'Stamm-Spieler', 'Sex': 'w', 'Vorname': 'Eva', 'Nachname': 'Berg',
+     'elo': '1400', 'FideNr': '1234567', 'Verein': 'Schachklub Dornbirn', 'Staat': 'AUT'},
+    # Only Stamm-Spieler rows are imported
+    {'PNr': '103', 'Funktion': 'Gastspieler', 'Sex': 'm', 'Vorname': 'Gast', 'Nachname': 'Spieler',
+     'elo': '1300', 'Verein': 'Schachklub Lustenau', 'Staat': 'AUT'},
+]
+
+
+def member_csv(members):
+    lines = [';'.join(CSV_COLUMNS)]
+    for member in members:
+        lines.append(';'.join(member.get(column, '') for column in CSV_COLUMNS))
+    return '\n'.join(lines).encode('utf-8')
+
+
+def upload(client, content, mode='default'):
+    """Import a CSV in the given mode; returns the final totals"""
+    data = {'file': (io.BytesIO(content), 'members.csv')}
+    if mode == 'default':
+        response = client.post('/api/players-import-csv', data=data)
+        assert response.status_code == 201
+        result = response.get_json()
+    elif mode == 'stream':
+        response = client.post('/api/players-import-csv?stream=true&chunk_size=1', data=data)
+        assert response.status_code == 201
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert lines[-1]['done'] is True
+        result = lines[-1]
+    else:
+        response = client.post('/api/players-import-csv?background=true&chunk_size=1', data=data)
+        assert response.status_code == 202
+        job = wait_for_job(client, response.get_json()['id'])
+        assert job['status'] == 'succeeded', job['error']
+        result = job['result']
+    # Imports creating players start a relinking job; let it finish before the next step
+    if 'relink_job_id' in result:
+        assert wait_for_job(client, result['relink_job_id'])['status'] == 'succeeded'
+    return result
+
+
+def test_new_and_changed_players_are_imported(app, client):
+    result = upload(client, member_csv(MEMBERS[:1] + MEMBERS[2:]))
+    assert (result['imported'], result['updated']) == (1, 0)
+    with app.app_context():
+        hans = Player.query.filter_by(p_number=101).one()
+        assert (hans.first_name, hans.last_name, hans.elo, hans.kat) == ('Hans', 'Muster', 1500, 'U16')
+        assert Player.query.filter_by(p_number=103).first() is None
+
+    changed = [dict(MEMBERS[0], elo='1550', Verein='Schachklub Lustenau'), MEMBERS[1]]
+    result = upload(client, member_csv(changed))
+    assert (result['imported'], result['updated']) == (1, 1)
+    with app.app_context():
+        hans = Player.query.filter_by(p_number=101).one()
+        assert (hans.elo, hans.club) == (1550, 'Schachklub Lustenau')
+        eva = Player.query.filter_by(p_number=102).one()
+        assert (eva.first_name, eva.female, eva.fide_number) == ('Eva', True, 1234567)
+        notes = [note.content for note in Note.query.filter_by(player_id=hans.id).order_by(Note.id)]
+        assert notes[0] == 'Importiert'
+        assert notes[1].startswith("Importiert: ELO: '1500' → '1550'")
+        assert "Verein: 'Schachklub Dornbirn' → 'Schachklub Lustenau'" in notes[1]
+        assert [note.content for note in Note.query.filter_by(player_id=eva.id)] == ['Importiert']
+
+
+def test_stream_mode_reports_chunk_progress(app, client):
+    data = {'file': (io.BytesIO(member_csv(MEMBERS)), 'members.csv')}
+    response = client.post('/api/players-import-csv?stream=true&chunk_size=2', data=data)
+    assert response.status_code == 201
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [(line['chunk'], line['rows'], line['imported']) for line in lines[:-1]] == [(1, 2, 2), (2, 3, 2)]
+    assert lines[-1]['done'] is True and lines[-1]['imported'] == 2
+    wait_for_job(client, lines[-1]['relink_job_id'])
+
+    # Both modes import the same players
+    with app.app_context():
+        streamed = [(p.p_number, p.first_name, p.elo, p.club) for p in Player.query.order_by(Player.p_number)]
+    assert upload(client, member_csv(MEMBERS))['imported'] == 0
+    with app.app_context():
+        assert [(p.p_number, p.first_name, p.elo, p.club) for p in Player.query.order_by(Player.p_number)] == streamed
+
+
+def test_background_import_reports_progress(app, client):
+    data = {'file': (io.BytesIO(member_csv(MEMBERS)), 'members.csv')}
+    response = client.post('/api/players-import-csv?background=true&chunk_size=2', data=data)
+    assert response.status_code == 202
+    job = wait_for_job(client, response.get_json()['id'])
+    assert job['status'] == 'succeeded', job['error']
+    assert (job['progress']['chunk'], job['progress']['rows']) == (2, 3)
+    assert job['result']['imported'] == 2
+    wait_for_job(client, job['result']['relink_job_id'])
+    with app.app_context():
+        assert Player.query.count() == 2
+
+
+@pytest.mark.parametrize('query', ['', '?stream=true', '?background=true'])
+def test_missing_headers_are_rejected(client, query):
+    data = {'file': (io.BytesIO(b'PNr;Vorname\n1;Hans\n'), 'members.csv')}
+    response = client.post(f'/api/players-import-csv{query}', data=data)
+    assert response.status_code == 400
+    assert 'Missing required headers' in response.get_json()['error']
+
+
+@pytest.mark.parametrize('mode', ['default', 'stream', 'background'])
+def test_unchanged_rows_are_skipped(app, client, mode):
+    result = upload(client, member_csv(MEMBERS), mode)
+    assert (result['imported'], result['updated'], result['unchanged']) == (2, 0, 0)
+    with app.app_context():
+        hans = Player.query.filter_by(p_number=101).one()
+        assert (hans.first_name, hans.last_name, hans.is_active) == ('Hans', 'Muster', False)
+        assert Player.query.filter_by(p_number=103).first() is None
+        assert Note.query.count() == 2
+        # A local edit is kept until the federation data of the player changes
+        hans.club = 'Local edit'
+        db.session.commit()
+
+    result = upload(client, member_csv(MEMBERS), mode)
+    assert (result['imported'], result['updated'], result['unchanged']) == (0, 0, 2)
+    with app.app_context():
+        assert Note.query.count() == 2
+        assert Player.query.filter_by(p_number=101).one().club == 'Local edit'
+
+    changed = [dict(MEMBERS[0], elo='1550'), MEMBERS[1], MEMBERS[2]]
+    result = upload(client, member_csv(changed), mode)
+    assert (result['imported'], result['updated'], result['unchanged']) == (0, 1, 1)
+    with app.app_context():
+        hans = Player.query.filter_by(p_number=101).one()
+        assert (hans.elo, hans.club) == (1550, 'Schachklub Dornbirn')
+        notes = [note.content for note in Note.query.filter_by(player_id=hans.id).order_by(Note.id)]
+        assert notes[0] == 'Importiert'
+        assert notes[1].startswith("Importiert: ELO: '1500' → '1550'")
+        assert Note.query.count() == 3
+
+
+@pytest.mark.parametrize('mode', ['default', 'stream', 'background'])
+def test_new_players_are_linked_to_participants(app, client, mode):
+    with app.app_context():
+        _, (tp,) = add_tournament('Open', [('Muster, Hans', None, 1)])
+        db.session.commit()
+        tp_id = tp.id
+    result = upload(client, member_csv(MEMBERS), mode)
+    assert 'relink_job_id' in result
+    with app.app_context():
+        hans = Player.query.filter_by(p_number=101).one()
+        assert db.session.get(TournamentPlayer, tp_id).player_id == hans.id
+
+    # Imports that only update players do not relink
+    assert 'relink_job_id' not in upload(client, member_csv([dict(MEMBERS[0], elo='1550')]), mode)
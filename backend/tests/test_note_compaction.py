@@ -0,0 +1,95 @@
+"""Compaction of automatic notes (note_compaction.py)"""
+
+from datetime import datetime, timedelta
+
+from db.models import db, ChangeLog, Note
+from jobs import run_job
+from note_compaction import HISTORY_HEADER, JOB_KIND, compact_notes
+from tests.helpers import add_player
+
+
+def add_note(player, content, days_ago, manual=False):
+    note = Note(player_id=player.id, content=content, manual=manual,
+                created_at=datetime.now() - timedelta(days=days_ago))
+    db.session.add(note)
+    db.session.flush()
+    return note
+
+
+def contents(player):
+    return [note.content for note in Note.query.filter_by(player_id=player.id).order_by(Note.created_at, Note.id)]
+
+
+def compact():
+    job = run_job(JOB_KIND, compact_notes)
+    assert job.status == 'succeeded', job.error
+    return job.result
+
+
+def test_first_run_checks_all_players(app):
+    with app.app_context():
+        hans = add_player('Hans', 'Muster', 1)
+        add_note(hans, "Geändert: ELO: '1500' → '1510'", 5)
+        add_note(hans, "Geändert: ELO: '1510' → '1520'", 4)
+        db.session.commit()
+        # Notes written before change_log existed are not in it
+        ChangeLog.query.delete()
+        db.session.commit()
+
+        assert compact()['merged_notes'] == 1
+        [history] = contents(hans)
+        assert history.startswith(HISTORY_HEADER + '\n')
+        assert history.endswith("Geändert: ELO: '1510' → '1520'")
+
+        # Later runs only check players whose notes changed since the last run
+        eva = add_player('Eva', 'Berg', 2)
+        add_note(eva, "Geändert: Verein: 'A' → 'B'", 3)
+        add_note(eva, "Geändert: Verein: 'B' → 'C'", 2)
+        db.session.commit()
+        assert compact()['merged_notes'] == 1
+        assert len(contents(eva)) == 1
+
+
+def test_merge_rules(app):
+    with app.app_context():
+        hans = add_player('Hans', 'Muster', 1)
+        add_note(hans, "Importiert: ELO: '1400' → '1500'", 10)
+        add_note(hans, 'Importiert', 9)  # Markers do not interrupt a run
+        add_note(hans, "Geändert: Verein: 'A' → 'B'", 8)
+        add_note(hans, 'Spielt nur Schnellschach', 7, manual=True)
+        add_note(hans, "Geändert: ELO: '1500' → '1510'", 6)
+        add_note(hans, 'Anderes Format', 5, manual=None)
+        add_note(hans, "Geändert: ELO: '1510' → '1520'", 4)
+        db.session.commit()
+
+        assert compact()['merged_notes'] == 1
+        notes = contents(hans)
+        assert notes[0] == 'Importiert'
+        assert notes[1].split('\n')[0] == HISTORY_HEADER
+        assert [line.split(' ', 1)[1] for line in notes[1].split('\n')[1:]] == [
+            "Importiert: ELO: '1400' → '1500'", "Geändert: Verein: 'A' → 'B'"
+        ]
+        assert notes[2:] == [
+            'Spielt nur Schnellschach', "Geändert: ELO: '1500' → '1510'",
+            'Anderes Format', "Geändert: ELO: '1510' → '1520'"
+        ]
+
+
+def test_expired_import_markers_are_deleted(app):
+    with app.app_context():
+        hans = add_player('Hans', 'Muster', 1)
+        add_note(hans, 'Importiert', 200)
+        add_note(hans, 'Importiert', 10)
+        add_note(hans, 'Importiert', 200, manual=True)
+        # Note ids are reused, so the oldest note does not need to have the lowest id
+        oldest = add_note(hans, 'Importiert', 400)
+        eva = add_player('Eva', 'Berg', 2)
+        add_note(eva, 'Importiert', 300)
+        db.session.commit()
+        oldest_id = oldest.id
+
+        assert compact()['deleted_markers'] == 1
+        assert [(note.id == oldest_id, note.manual) for note in Note.query.filter_by(player_id=hans.id).order_by(
+            Note.created_at, Note.id
+        )] == [(True, False), (False, True), (False, False)]
+        assert len(contents(eva)) == 1
@@ -0,0 +1,61 @@
+"""Cache of parsed tournament files (parse_cache.py)"""
+
+import os
+
+import parse_cache
+import tournament_importer
+from parse_cache import ParseCache
+from tournament_parser import PARSER_VERSION, parse_tournament_file
+from tests.helpers import write_tournament_file
+
+
+def test_parse_cache_hit_and_parser_version(app, tmp_path, monkeypatch):
+    path = write_tournament_file(tmp_path / 'open.xlsx', ['Hans Müller', 'Eva Berg'])
+    parses = []
+
+    def counting_parse(file_path, reader=None):
+        parses.append(file_path)
+        return parse_tournament_file(file_path, reader=reader)
+    monkeypatch.setattr(tournament_importer, 'parse_tournament_file', counting_parse)
+
+    with app.app_context():
+        first = tournament_importer.load_parsed_tournament(path)
+        assert tournament_importer.load_parsed_tournament(path) == first
+        assert len(parses) == 1
+        cache = ParseCache.from_config(app.config)
+        assert os.path.exists(cache.path(tournament_importer.file_checksum(path)))
+
+        # Entries of another parser version are never used
+        monkeypatch.setattr(parse_cache, 'PARSER_VERSION', PARSER_VERSION + 1)
+        assert tournament_importer.load_parsed_tournament(path) == first
+        assert len(parses) == 2
+        assert tournament_importer.load_parsed_tournament(path) == first
+        assert len(parses) == 2
+
+
+def test_parse_cache_discards_unreadable_entries(tmp_path):
+    cache = ParseCache(str(tmp_path), 1024 * 1024)
+    cache.put('abc', {'players': []})
+    assert cache.get('abc') == {'players': []}
+    with open(cache.path('abc'), 'wb') as f:
+        f.write(b'garbage')
+    assert cache.get('abc') is None
+    assert not os.path.exists(cache.path('abc'))
+
+
+def test_parse_cache_evicts_least_recently_used(tmp_path):
+    cache = ParseCache(str(tmp_path), 1024 * 1024)
+    payload = os.urandom(400 * 1024)
+    cache.put('old', payload)
+    cache.put('used', payload)
+    # Make 'old' the least recently used entry, no matter how coarse the mtime resolution is
+    os.utime(cache.path('old'), (0, 0))
+    cache.put('new', payload)
+    assert cache.get('old') is None
+    assert cache.get('used') == payload
+    assert cache.get('new') == payload
+
+
+def test_parse_cache_disabled_by_size_zero(app):
+    app.config['PARSE_CACHE_SIZE'] = 0
+    assert ParseCache.from_config(app.config) is None
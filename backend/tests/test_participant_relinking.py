@@ -0,0 +1,74 @@
+"""Relinking of unlinked tournament participants (participant_relinking.py)"""
+
+from datetime import date
+
+from db.models import db, MatchCandidate, PlayerStats, TournamentPlayer
+from tournament_importer import import_tournament_from_excel
+from tests.helpers import add_player, add_tournament, wait_for_job, write_tournament_file
+
+
+def relink(client):
+    response = client.post('/api/tournament-players/relink')
+    assert response.status_code == 202
+    job = wait_for_job(client, response.get_json()['id'])
+    assert job['status'] == 'succeeded', job['error']
+    return job['result']
+
+
+def test_relink_links_new_players(app, client):
+    with app.app_context():
+        tournament, (tp, other) = add_tournament('Open', [('Muster, Hans', None, 2), ('Nobody, Known', None, 1)])
+        db.session.commit()
+        tp_id = tp.id
+        hans = add_player('Hans', 'Muster', 1)
+        db.session.add(MatchCandidate(tournament_player_id=tp.id, player_id=hans.id, score=0.6))
+        db.session.commit()
+        hans_id = hans.id
+
+    assert relink(client) == {'unlinked_participants': 2, 'linked_participants': 1, 'linked_players': 1}
+    with app.app_context():
+        assert db.session.get(TournamentPlayer, tp_id).player_id == hans_id
+        assert MatchCandidate.query.count() == 0
+        assert db.session.get(PlayerStats, hans_id).total_points == 2
+
+
+def test_disassociated_participant_is_not_relinked(app, client):
+    with app.app_context():
+        hans = add_player('Hans', 'Muster', 1)
+        _, (tp,) = add_tournament('Open', [('Muster, Hans', hans, 1)])
+        db.session.commit()
+        hans_id, tp_id = hans.id, tp.id
+
+    assert client.put(f'/api/tournament-players/{tp_id}/disassociate').status_code == 200
+    assert relink(client)['linked_participants'] == 0
+    with app.app_context():
+        tp = db.session.get(TournamentPlayer, tp_id)
+        assert (tp.player_id, tp.rejected_player_id) == (None, hans_id)
+
+    # Choosing the player again lifts the rejection
+    response = client.put(f'/api/tournament-players/{tp_id}/associate', json={'player_id': hans_id})
+    assert response.status_code == 200
+    with app.app_context():
+        tp = db.session.get(TournamentPlayer, tp_id)
+        assert (tp.player_id, tp.rejected_player_id) == (hans_id, None)
+
+
+def test_rejected_match_is_skipped_by_later_imports(app, client, tmp_path):
+    with app.app_context():
+        hans = add_player('Hans', 'Muster', 1)
+        _, (tp,) = add_tournament('Open', [('Hans Muster', hans, 1)])
+        db.session.commit()
+        hans_id, tp_id = hans.id, tp.id
+    assert client.put(f'/api/tournament-players/{tp_id}/disassociate').status_code == 200
+
+    path = write_tournament_file(tmp_path / 'next.xlsx', ['Hans Muster', 'Eva Berg'])
+    with app.app_context():
+        result = import_tournament_from_excel(path, {'name': 'Next', 'date': date.today().isoformat()})
+        linked = dict(db.session.query(TournamentPlayer.name, TournamentPlayer.player_id).filter_by(
+            tournament_id=result['tournament_id']
+        ).all())
+        assert linked == {'Hans Muster': None, 'Eva Berg': None}
+        assert result['fuzzy_matched_players'] == 0
+    assert relink(client)['linked_participants'] == 0
+    with app.app_context():
+        assert TournamentPlayer.query.filter_by(player_id=hans_id).count() == 0
@@ -0,0 +1,139 @@
+"""Matching participant names to players (player_matching.py)"""
+
+import pytest
+
+from db.models import db, MatchCandidate, Player, PlayerAlias, TournamentPlayer
+from player_matching import PlayerNameIndex, TrigramIndex, alias_name_key, normalize_name, record_alias
+from tournament_importer import find_existing_player, import_tournament_from_excel, link_unmatched_participants
+from tests.helpers import add_player, add_tournament, write_tournament_file
+
+
+def test_normalize_name():
+    assert normalize_name('Dr. Jörg  MÜLLER') == 'joerg mueller'
+    assert normalize_name('Zoë Šimić') == 'zoe simic'
+    assert alias_name_key('Müller, Hans') == alias_name_key('hans mueller')
+
+
+def test_name_keys_follow_name_changes(app):
+    with app.app_context():
+        player = add_player('Jörg', 'Müller', 1)
+        db.session.commit()
+        assert (player.first_name_key, player.last_name_key) == ('joerg', 'mueller')
+        player.last_name = 'Maier'
+        db.session.commit()
+        assert player.last_name_key == 'maier'
+
+
+@pytest.mark.parametrize('name', [
+    'Müller, Hans', 'Hans Müller', 'Müller Hans', 'HANS MÜLLER', 'Hans Mueller', 'Dr. Hans Müller', 'Unknown Name', ''
+])
+def test_name_index_matches_like_queries(app, name):
+    with app.app_context():
+        hans = add_player('Hans', 'Müller', 1)
+        add_player('Hans', 'Müller', 2)  # Same name, the lower id wins
+        db.session.commit()
+        expected = find_existing_player(name)
+        assert find_existing_player(name, name_index=PlayerNameIndex.load()) == expected
+        if name and name != 'Unknown Name':
+            assert expected == hans
+
+
+def test_trigram_candidates(app):
+    with app.app_context():
+        schwarz = add_player('Johannes', 'Schwarzenberger', 1)
+        add_player('Katharina', 'Oberhauser', 2)
+        db.session.commit()
+        index = TrigramIndex.load()
+        candidates = index.candidates('Schwarzenberger, Johanes')
+        assert candidates[0][0] == schwarz.id
+        assert 0.85 <= candidates[0][1] < 1
+        assert index.candidates('Somebody Else') == []
+
+
+def test_fuzzy_link_without_alias(app):
+    with app.app_context():
+        katharina = add_player('Katharina', 'Oberhauser', 1)
+        tournament, (tp,) = add_tournament('Open', [('Oberhauser, Katarina', None, 1)])
+        assert link_unmatched_participants(tournament.id) == 1
+        db.session.commit()
+        assert tp.player_id == katharina.id
+        # Fuzzy links are guesses; they must not be trusted by later imports
+        assert PlayerAlias.query.count() == 0
+
+
+def test_player_is_fuzzy_linked_at_most_once_per_tournament(app):
+    with app.app_context():
+        schwarz = add_player('Johannes', 'Schwarzenberger', 1)
+        tournament, (first, second) = add_tournament('Open', [
+            ('Schwarzenberger, Johanes', None, 1),
+            ('Schwarzenberger, Johannnes', None, 1)
+        ])
+        assert link_unmatched_participants(tournament.id) == 0
+        db.session.commit()
+        assert first.player_id is None and second.player_id is None
+        candidates = {(c.tournament_player_id, c.player_id) for c in MatchCandidate.query}
+        assert candidates == {(first.id, schwarz.id), (second.id, schwarz.id)}
+
+
+def test_players_linked_in_the_tournament_are_no_candidates(app):
+    with app.app_context():
+        schwarz = add_player('Johannes', 'Schwarzenberger', 1)
+        tournament, (_, tp) = add_tournament('Open', [
+            ('Schwarzenberger, Johannes', schwarz, 1),
+            ('Schwarzenberger, Johanes', None, 1)
+        ])
+        assert link_unmatched_participants(tournament.id) == 0
+        db.session.commit()
+        assert tp.player_id is None
+        assert MatchCandidate.query.count() == 0
+
+
+def test_import_records_and_uses_aliases(app, tmp_path):
+    with app.app_context():
+        hans = add_player('Hans', 'Müller', 1)
+        eva = add_player('Eva', 'Berg', 2)
+        db.session.commit()
+
+        # Heuristic matches become aliases
+        path = write_tournament_file(tmp_path / 'first.xlsx', ['Hans Mueller', 'Eva Berg'])
+        import_tournament_from_excel(path, {'name': 'First', 'date': '2025-01-01'})
+        assert {(a.alias_key, a.player_id, a.source) for a in PlayerAlias.query} == {
+            (alias_name_key('Hans Mueller'), hans.id, 'import'),
+            (alias_name_key('Eva Berg'), eva.id, 'import')
+        }
+
+        # An admin confirmed that a name no heuristic resolves is Eva
+        record_alias(eva.id, 'Berg-Huber, Eva', source='manual')
+        db.session.commit()
+        path = write_tournament_file(tmp_path / 'second.xlsx', ['Eva Berg-Huber', 'Müller Hans'])
+        result = import_tournament_from_excel(path, {'name': 'Second', 'date': '2025-02-01'})
+        linked = dict(db.session.query(TournamentPlayer.name, TournamentPlayer.player_id).filter_by(
+            tournament_id=result['tournament_id']
+        ).all())
+        assert linked == {'Eva Berg-Huber': eva.id, 'Müller Hans': hans.id}
+
+
+def test_import_aliases_never_replace_manual_ones(app):
+    with app.app_context():
+        hans = add_player('Hans', 'Müller', 1)
+        other = add_player('Hans', 'Mueller', 2)
+        record_alias(hans.id, 'Hans Mueller', source='manual')
+        record_alias(other.id, 'Hans Mueller', source='import')
+        db.session.commit()
+        alias = PlayerAlias.query.filter_by(alias_key=alias_name_key('Hans Mueller')).one()
+        assert (alias.player_id, alias.source) == (hans.id, 'manual')
+
+
+def test_associate_records_manual_alias(app, client):
+    with app.app_context():
+        eva = add_player('Eva', 'Berg', 1)
+        _, (tp,) = add_tournament('Open', [('Huber, Eva', None, 1)])
+        db.session.commit()
+        eva_id, tp_id = eva.id, tp.id
+
+    response = client.put(f'/api/tournament-players/{tp_id}/associate', json={'player_id': eva_id})
+    assert response.status_code == 200
+    with app.app_context():
+        alias = PlayerAlias.query.one()
+        assert (alias.alias_key, alias.player_id, alias.source) == (alias_name_key('Huber, Eva'), eva_id, 'manual')
+        assert db.session.get(Player, eva_id).tournament_players[0].id == tp_id
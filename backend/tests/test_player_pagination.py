@@ -0,0 +1,56 @@
+"""Keyset pagination of GET /api/players?limit=&after="""
+
+from db.models import db
+from tests.helpers import add_player
+
+NAMES = [('Eva', 'Berg'), ('Hans', 'Muster'), ('Anna', 'Berg'), ('Hans', 'Muster'), ('Zoe', 'Albrecht'), ('Karl', 'Zeller')]
+
+
+def fetch_all_pages(client, query):
+    pages = []
+    after = ''
+    while True:
+        page = client.get(f'/api/players?{query}&after={after}').get_json()
+        pages.append(page)
+        if page['next_cursor'] is None:
+            return pages
+        after = page['next_cursor']
+
+
+def test_pages_cover_all_players_in_stable_order(app, client):
+    with app.app_context():
+        for i, (first_name, last_name) in enumerate(NAMES):
+            add_player(first_name, last_name, i + 1, is_active=i % 2 == 0)
+        db.session.commit()
+
+    pages = fetch_all_pages(client, 'limit=2&fields=first_name,last_name&embed=')
+    assert [len(page['players']) for page in pages] == [2, 2, 2]
+    names = [(p['last_name'], p['first_name'], p['id']) for page in pages for p in page['players']]
+    assert names == sorted(names)
+    assert len(set(p[2] for p in names)) == len(NAMES)
+
+    # Players inserted before the cursor do not shift the following pages
+    first = client.get('/api/players?limit=3').get_json()
+    with app.app_context():
+        add_player('Aaron', 'Aal', 99)
+        db.session.commit()
+    second = client.get(f"/api/players?limit=3&after={first['next_cursor']}").get_json()
+    assert [p['id'] for p in first['players'] + second['players']] == [p[2] for p in names]
+
+
+def test_pagination_with_active_filter(app, client):
+    with app.app_context():
+        for i, (first_name, last_name) in enumerate(NAMES):
+            add_player(first_name, last_name, i + 1, is_active=i % 2 == 0)
+        db.session.commit()
+    pages = fetch_all_pages(client, 'limit=2&active=true')
+    players = [p for page in pages for p in page['players']]
+    assert len(players) == 3 and all(p['is_active'] for p in players)
+
+
+def test_invalid_arguments(client):
+    assert client.get('/api/players?limit=abc').status_code == 400
+    assert client.get('/api/players?limit=10&after=not-a-cursor').status_code == 400
+    # The limit is clamped
+    assert client.get('/api/players?limit=0').get_json()['limit'] == 1
+    assert client.get('/api/players?limit=100000').get_json()['limit'] == 1000
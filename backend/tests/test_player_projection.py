@@ -0,0 +1,45 @@
+"""?fields= and ?embed= on the player endpoints (api/players.parse_player_projection)"""
+
+from db.models import db, Note
+from tests.helpers import add_player, add_tournament
+
+
+def add_hans():
+    hans = add_player('Hans', 'Muster', 1, club='SK Dornbirn')
+    db.session.add(Note(player_id=hans.id, content='Hello', manual=True))
+    add_tournament('Open', [('Muster, Hans', hans, 1)])
+    db.session.commit()
+    return hans.id
+
+
+def test_default_response_is_complete(app, client):
+    with app.app_context():
+        hans_id = add_hans()
+    player = client.get(f'/api/players/{hans_id}').get_json()
+    assert {'first_name', 'club', 'tags', 'tournament_stats', 'notes', 'tournaments'} <= set(player)
+    assert [note['content'] for note in player['notes']] == ['Hello']
+    assert [t['tournament']['name'] for t in player['tournaments']] == ['Open']
+    # Internal columns are never sent
+    assert 'import_row_hash' not in player and 'first_name_key' not in player
+
+
+def test_fields_and_embed_restrict_the_response(app, client):
+    with app.app_context():
+        hans_id = add_hans()
+    player = client.get(f'/api/players/{hans_id}?fields=first_name,last_name,tags&embed=notes').get_json()
+    assert set(player) == {'id', 'first_name', 'last_name', 'tags', 'notes'}
+
+    player = client.get(f'/api/players/{hans_id}?fields=club&embed=').get_json()
+    assert player == {'id': hans_id, 'club': 'SK Dornbirn'}
+
+    players = client.get('/api/players?fields=last_name&embed=tournaments').get_json()
+    assert [set(p) for p in players] == [{'id', 'last_name', 'tournaments'}]
+
+
+def test_unknown_names_are_rejected(app, client):
+    with app.app_context():
+        hans_id = add_hans()
+    response = client.get(f'/api/players/{hans_id}?fields=first_name,import_row_hash')
+    assert response.status_code == 400
+    assert 'import_row_hash' in response.get_json()['error']
+    assert client.get('/api/players?embed=games').status_code == 400
@@ -0,0 +1,62 @@
+"""Full-text player search (GET /api/players/search, db/search.py)"""
+
+from db.models import db, Player, Tag
+from db.search import fold_text
+from tests.helpers import add_player
+
+
+def add_players():
+    mueller = add_player('Jörg', 'Müller', 1, club='Schachklub Dornbirn', town='Bregenz', is_active=True)
+    add_player('Hans', 'Mueller', 2, club='SK Hohenems', is_active=False)
+    strauss = add_player('Anna', 'Strauß', 3, town='Feldkirch', is_active=True)
+    strauss.tags.append(Tag(name='Jugend'))
+    db.session.commit()
+    return mueller.id, strauss.id
+
+
+def search(client, query):
+    response = client.get(f'/api/players/search?{query}')
+    assert response.status_code == 200
+    return [(p['first_name'], p['last_name']) for p in response.get_json()]
+
+
+def test_fold_text():
+    assert fold_text('MÜLLER') == fold_text('Mueller') == fold_text('müller') == 'muller'
+    assert fold_text('Strauß') == fold_text('Strauss')
+
+
+def test_umlauts_and_transliterations_match(app, client):
+    with app.app_context():
+        add_players()
+    for query in ('mueller', 'Müller', 'MÜLL', 'muell'):
+        assert sorted(search(client, f'q={query}')) == [('Hans', 'Mueller'), ('Jörg', 'Müller')]
+    assert search(client, 'q=strauss') == [('Anna', 'Strauß')]
+    assert search(client, 'q=joerg mue') == [('Jörg', 'Müller')]
+    assert search(client, 'q=mueller&active=false') == [('Hans', 'Mueller')]
+    assert search(client, 'q=%20') == []
+
+
+def test_club_town_and_tags_are_searched(app, client):
+    with app.app_context():
+        _, strauss_id = add_players()
+    assert search(client, 'q=dornbirn') == [('Jörg', 'Müller')]
+    assert search(client, 'q=feldkirch') == [('Anna', 'Strauß')]
+    assert search(client, 'q=jugend') == [('Anna', 'Strauß')]
+
+    # The index follows later changes
+    with app.app_context():
+        Tag.query.filter_by(name='Jugend').one().name = 'Senioren'
+        db.session.get(Player, strauss_id).town = 'Bludenz'
+        db.session.commit()
+    assert search(client, 'q=jugend') == []
+    assert search(client, 'q=senioren bludenz') == [('Anna', 'Strauß')]
+
+
+def test_name_matches_rank_first_and_limit(app, client):
+    with app.app_context():
+        add_players()
+        add_player('Eva', 'Berg', 4, club='Müller Schach')
+        db.session.commit()
+    assert search(client, 'q=müller')[-1] == ('Eva', 'Berg')
+    assert len(search(client, 'q=müller&limit=1')) == 1
+    assert client.get('/api/players/search?q=x&limit=abc').status_code == 400
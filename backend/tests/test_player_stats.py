@@ -0,0 +1,81 @@
+"""player_stats stays current on every write path"""
+
+from datetime import date
+
+from db.models import db, Player, PlayerStats
+from player_stats import refresh_player_stats
+from tournament_importer import import_tournament_from_excel
+from tests.helpers import add_player, add_tournament, write_tournament_file
+
+
+def stats_of(player_id):
+    stats = db.session.get(PlayerStats, player_id, populate_existing=True)
+    return stats.to_dict() if stats else None
+
+
+def test_game_crud_refreshes_stats(app, client):
+    with app.app_context():
+        hans = add_player('Hans', 'Muster', 1)
+        eva = add_player('Eva', 'Berg', 2)
+        tournament, (tp_hans, tp_eva) = add_tournament('Open', [('Muster, Hans', hans, 1), ('Berg, Eva', eva, 0)])
+        db.session.commit()
+        hans_id, eva_id, tournament_id, tp_hans_id, tp_eva_id = hans.id, eva.id, tournament.id, tp_hans.id, tp_eva.id
+
+    response = client.post(f'/api/tournaments/{tournament_id}/games', json={
+        'player_id': tp_hans_id, 'opponent_id': tp_eva_id, 'player_color': 'w',
+        'result': '1', 'round_number': 1, 'pgn': None
+    })
+    assert response.status_code == 201
+    game_id = response.get_json()['id']
+    with app.app_context():
+        assert stats_of(hans_id) == {'total_points': 1, 'total_games': 1, 'total_points_rated': 0, 'total_games_rated': 0}
+
+    # Moving the game to the other participant updates both players
+    response = client.put(f'/api/tournaments/{tournament_id}/games/{game_id}', json={'player_id': tp_eva_id})
+    assert response.status_code == 200
+    with app.app_context():
+        assert stats_of(hans_id)['total_games'] == 0
+        assert stats_of(eva_id)['total_games'] == 1
+
+    response = client.delete(f'/api/tournaments/{tournament_id}/games/{game_id}')
+    assert response.status_code == 204
+    with app.app_context():
+        assert stats_of(eva_id)['total_games'] == 0
+
+
+def test_rated_tournaments_are_counted_separately(app):
+    with app.app_context():
+        hans = add_player('Hans', 'Muster', 1)
+        add_tournament('Rated', [('Muster, Hans', hans, 2.5)], elo_rating='ELO')
+        add_tournament('Unrated', [('Muster, Hans', hans, 1)])
+        # Outside of the stats window
+        add_tournament('Old', [('Muster, Hans', hans, 5)], days_ago=400)
+        refresh_player_stats([hans.id])
+        db.session.commit()
+        assert stats_of(hans.id) == {'total_points': 1, 'total_games': 0, 'total_points_rated': 2.5, 'total_games_rated': 0}
+
+
+def test_import_refreshes_stats(app, tmp_path):
+    path = write_tournament_file(tmp_path / 'open.xlsx', ['Hans Muster', 'Eva Berg', 'Anna Unknown'])
+    with app.app_context():
+        hans = add_player('Hans', 'Muster', 1)
+        db.session.commit()
+        result = import_tournament_from_excel(path, {'name': 'Open', 'date': date.today().isoformat()})
+        assert result['imported_games'] == 6
+        assert stats_of(hans.id) == {'total_points': 2, 'total_games': 2, 'total_points_rated': 0, 'total_games_rated': 0}
+
+
+def test_disassociate_refreshes_stats(app, client):
+    with app.app_context():
+        hans = add_player('Hans', 'Muster', 1)
+        _, (tp,) = add_tournament('Open', [('Muster, Hans', hans, 3)])
+        refresh_player_stats([hans.id])
+        db.session.commit()
+        hans_id, tp_id = hans.id, tp.id
+        assert stats_of(hans_id)['total_points'] == 3
+
+    response = client.put(f'/api/tournament-players/{tp_id}/disassociate')
+    assert response.status_code == 200
+    with app.app_context():
+        assert stats_of(hans_id)['total_points'] == 0
+        assert db.session.get(Player, hans_id).stats.total_points == 0
@@ -0,0 +1,45 @@
+"""Sheet readers (tournament_parser.read_sheet)"""
+
+from datetime import datetime
+
+import openpyxl
+import pytest
+
+from tournament_parser import parse_tournament_file, read_sheet_openpyxl, read_sheet_pandas
+from tests.helpers import write_tournament_file
+
+MIXED_ROWS = [
+    ['Title', None, None, None, None],
+    [],
+    ['Rk.', 'Name', 'Rtg', 'Pts.', 'Date'],
+    [1, 'Müller, Hans', 1500, 2.5, datetime(2025, 1, 2)],
+    [2, '  Berg Eva ', None, '½', None],
+    [3, 'NA', '1,5', 0, 'text'],
+    [None, None, None, None, None],
+    ['4', '#N/A', 12345678, 1e20, '=1+1'],
+]
+
+
+def write_workbook(path, rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for row_number, row in enumerate(rows, start=1):
+        for column, value in enumerate(row, start=1):
+            if value is not None:
+                sheet.cell(row=row_number, column=column, value=value)
+    workbook.save(path)
+    return str(path)
+
+
+@pytest.mark.parametrize('header, na', [(None, 'nan'), (0, '')])
+def test_readers_agree(tmp_path, header, na):
+    path = write_workbook(tmp_path / 'mixed.xlsx', MIXED_ROWS)
+    assert read_sheet_openpyxl(path, header=header, na=na) == read_sheet_pandas(path, header=header, na=na)
+
+
+def test_readers_parse_the_same_tournament(tmp_path):
+    path = write_tournament_file(tmp_path / 'open.xlsx', ['Hans Müller', 'Eva Berg', 'Anna Strauß', 'Dr. Jörg Maier'])
+    parsed = parse_tournament_file(path, reader='openpyxl')
+    assert parsed == parse_tournament_file(path, reader='pandas')
+    assert [p.name for p in parsed.players] == ['Hans Müller', 'Eva Berg', 'Anna Strauß', 'Dr. Jörg Maier']
+    assert len(parsed.games) == 12
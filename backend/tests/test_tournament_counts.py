@@ -0,0 +1,60 @@
+"""Stored games_played and total_players counts (tournament_importer.update_tournament_counts)"""
+
+from datetime import date
+
+from db.models import db, Tournament, TournamentPlayer
+from tournament_importer import import_tournament_from_excel
+from tests.helpers import add_player, add_tournament, write_tournament_file
+
+
+def test_import_stores_counts(app, tmp_path):
+    path = write_tournament_file(tmp_path / 'open.xlsx', ['Hans Muster', 'Eva Berg', 'Anna Unknown'])
+    with app.app_context():
+        add_player('Hans', 'Muster', 1)
+        db.session.commit()
+        result = import_tournament_from_excel(path, {'name': 'Open', 'date': date.today().isoformat()})
+        assert (result['imported_players'], result['imported_games']) == (3, 6)
+
+        assert db.session.get(Tournament, result['tournament_id']).total_players == 3
+        counts = {tp.name: tp.games_played for tp in TournamentPlayer.query}
+        assert counts == {'Hans Muster': 2, 'Eva Berg': 2, 'Anna Unknown': 2}
+
+
+def test_game_crud_updates_counts(app, client):
+    with app.app_context():
+        tournament, (first, second) = add_tournament('Open', [('Muster, Hans', None, 1), ('Berg, Eva', None, 0)])
+        db.session.commit()
+        tournament_id, first_id, second_id = tournament.id, first.id, second.id
+
+    response = client.post(f'/api/tournaments/{tournament_id}/games', json={
+        'player_id': first_id, 'opponent_id': second_id, 'player_color': 'w',
+        'result': '1', 'round_number': 1, 'pgn': None
+    })
+    assert response.status_code == 201
+    game_id = response.get_json()['id']
+    with app.app_context():
+        assert db.session.get(TournamentPlayer, first_id).games_played == 1
+
+    response = client.put(f'/api/tournaments/{tournament_id}/games/{game_id}', json={'player_id': second_id})
+    assert response.status_code == 200
+    with app.app_context():
+        assert db.session.get(TournamentPlayer, first_id).games_played == 0
+        assert db.session.get(TournamentPlayer, second_id).games_played == 1
+
+    assert client.delete(f'/api/tournaments/{tournament_id}/games/{game_id}').status_code == 204
+    with app.app_context():
+        assert db.session.get(TournamentPlayer, second_id).games_played == 0
+        assert db.session.get(Tournament, tournament_id).total_players == 2
+
+
+def test_player_tournaments_use_stored_counts(app, client):
+    with app.app_context():
+        hans = add_player('Hans', 'Muster', 1)
+        tournament, (tp, _) = add_tournament('Open', [('Muster, Hans', hans, 1), ('Berg, Eva', None, 0)])
+        tp.games_played = 5
+        tournament.total_players = 12
+        db.session.commit()
+        hans_id = hans.id
+
+    tournaments = client.get(f'/api/players/{hans_id}/tournaments').get_json()
+    assert [(t['games_played'], t['total_players']) for t in tournaments] == [(5, 12)]
@@ -1,37 +1,47 @@
 """
 Tournament Import Module
 
-This module handles the parsing and importing of tournament data from Excel files.
+This module handles the importing of tournament data from Excel files.
 Extracted from tournaments.py for better reusability with the chess-results crawler.
+
+Files are parsed into a ParsedTournament by tournament_parser.py without
+touching the database; persist_tournament then matches the participants to
+players and writes the tournament, its participants and games. Parsed files
+are kept in the parse cache (parse_cache.py), so re-imports of the same file
+skip parsing.
 """
 
 import hashlib
-import re
 import os
-import pandas as pd
-from datetime import datetime
+from collections import Counter
 from datetime import datetime
-from db.models import db, Player, Tournament, TournamentPlayer, Game
-
-
-def detect_round_columns(header):
-    """Detect which columns contain round results"""
-    round_columns = []
-    for col in header:
-        col_str = str(col).strip()
-        # Round columns patterns:
-        # - Pure numbers: 1, 2, 3, etc.
-        # - Rd/Round format: Rd 1, Round 1, etc.
-        # - German format: 1.Rd, 2.Rd, etc.
-        if (re.match(r'^\d+$', col_str) or 
-            re.match(r'^(Rd|Round)\s*\d+$', col_str, re.IGNORECASE) or
-            re.match(r'^\d+\.Rd$', col_str, re.IGNORECASE)):
-            round_columns.append(col)
-    return round_columns
-
-
-def find_existing_player(name, shuffling=False):
-    """Find an existing player in the database by name"""
+from flask import current_app
+from db.models import db, Player, Tournament, TournamentPlayer, Game, MatchCandidate
+from player_stats import refresh_player_stats
+from player_matching import (
+    PlayerNameIndex, TrigramIndex, auto_link_candidate, find_player_by_name,
+    load_name_aliases, load_fide_id_aliases, record_alias,
+    load_rejected_matches, is_rejected_match,
+    DEFAULT_FUZZY_AUTO_LINK_THRESHOLD, DEFAULT_FUZZY_REVIEW_THRESHOLD, FUZZY_MAX_CANDIDATES
+)
+from tournament_parser import read_sheet, parse_tournament_file
+from parse_cache import ParseCache
+
+
+def lookup_player_name(first, last, name_index=None):
+    """Look up a player by first and last name, case-insensitively"""
+    if name_index is not None:
+        return name_index.get(first, last)
+    return find_player_by_name(first, last)
+
+
+def find_existing_player(name, shuffling=False, name_index=None):
+    """
+    Find an existing player in the database by name
+
+    Pass a PlayerNameIndex (see player_matching.py) when looking up many
+    names; without one every name variant costs an indexed query.
+    """
     name = name.strip()
     if not name:
         return None
@@ -50,32 +60,26 @@ def find_existing_player(name, shuffling=False):
             last = ''
             
     # Lookup 1: Lastname Firstname
-    player = Player.query.filter(
-        db.func.lower(Player.first_name) == first.lower(),
-        db.func.lower(Player.last_name) == last.lower()
-    ).first()
+    player = lookup_player_name(first, last, name_index)
     if player:
         return player
         
     # Lookup 2: Firstname Lastname
-    player = Player.query.filter(
-        db.func.lower(Player.first_name) == last.lower(),
-        db.func.lower(Player.last_name) == first.lower()
-    ).first()
+    player = lookup_player_name(last, first, name_index)
     if player:
         return player
 
     # Replace common letter combinations with umlauts and try again
     name_with_umlauts = name.lower().replace('ae', 'ä').replace('oe', 'ö').replace('ue', 'ü').replace('sz', 'ß')
     if name_with_umlauts != name.lower():
-        player = find_existing_player(name_with_umlauts)
+        player = find_existing_player(name_with_umlauts, name_index=name_index)
         if player:
             return player
     
     # remove all name segments that have a dot in it (titles, initials)
     name_no_titles = ' '.join([part for part in name.split() if '.' not in part and part.lower != 'di'])
     if name_no_titles != name:
-        player = find_existing_player(name_no_titles)
+        player = find_existing_player(name_no_titles, name_index=name_index)
         if player:
             return player
 
@@ -84,59 +88,39 @@ def find_existing_player(name, shuffling=False):
         name_parts = name.split()
         for i in range(len(name_parts)):
             shuffled_name = ' '.join(name_parts[i:] + name_parts[:i])
-            player = find_existing_player(shuffled_name, shuffling=True)
+            player = find_existing_player(shuffled_name, shuffling=True, name_index=name_index)
             if player:
                 return player
 
     return None
 
-def find_header_row(df):
-    """Find the row containing column headers"""
-    for idx, row in df.iterrows():
-        values = [str(v).strip() for v in row]
-        if 'Name' in values:
-            return idx
-    raise ValueError("Header row not found")
-
-
-def detect_result_format(df, header, header_row_idx):
-    """Detect the format used for storing game results"""
-    # Check for team tournament indicators
-    for i in range(min(20, len(df))):  # Check first 20 rows
-        row = [str(v).strip() for v in df.iloc[i]]
-        for cell in row:
-            # Look for Captain/Kapitän indicators
-            if ('Captain:' in cell or 'Kapitän:' in cell or 
-                'Team-Composition' in cell or 
-                'with round-results' in cell):
-                return 'team'
-    
-    # Check if we have team names with ratings in parentheses like "Hörbranz 1 (RtgAvg:2062, TB1: 18 / TB2: 49,5)"
-    for i in range(header_row_idx):
-        row = [str(v).strip() for v in df.iloc[i]]
-        for cell in row:
-            if re.match(r'.*\(RtgAvg:\d+.*TB1:.*TB2:.*\)', cell):
-                return 'team'
-
-    round_columns = detect_round_columns(header)
-    for i in range(header_row_idx + 1, len(df)):
-        row = [str(v).strip() for v in df.iloc[i]]
-        if not row:
-            break
-        data = dict(zip(header, [str(v).strip() for v in row]))
-        if not data.get('Name', '') or data.get('Name', '') == "nan":
-            break
-
-        for r in round_columns:
-            round_result = data.get(r)
-            if round_result in ['*', '***']:
-                continue
-            if re.match(r'^\d+ \d+$', round_result):
-                return 'pair'
-            if re.match(r'^\d+[wsb][10½+]$', round_result):
-                return 'complex'
-
-    return 'simple'
+def match_participants(players, name_index=None):
+    """
+    Find the Player of each ParsedPlayer (None where there is no match).
+
+    Confirmed aliases (player_aliases) are looked up in bulk first; only
+    participants without one go through the name heuristics of
+    find_existing_player. Heuristic matches are recorded as aliases. Matches
+    an admin rejected (see player_matching.load_rejected_matches) are skipped.
+    """
+    fide_id_aliases = load_fide_id_aliases(p.fide_id for p in players)
+    name_aliases = load_name_aliases({p.name for p in players})
+    rejected_matches = load_rejected_matches()
+
+    player_ids = []
+    for parsed in players:
+        player_id = fide_id_aliases.get(parsed.fide_id) or name_aliases.get(parsed.name)
+        if player_id is not None and is_rejected_match(rejected_matches, parsed.name, player_id):
+            player_id = None
+        if player_id is None:
+            player = find_existing_player(parsed.name, name_index=name_index)
+            if player and not is_rejected_match(rejected_matches, parsed.name, player.id):
+                player_id = player.id
+                record_alias(player_id, parsed.name, parsed.fide_id)
+        player_ids.append(player_id)
+
+    found = {player.id: player for player in Player.query.filter(Player.id.in_({i for i in player_ids if i}))}
+    return [found.get(player_id) for player_id in player_ids]
 
 
 def set_player_active_if_youth(player):
@@ -146,563 +130,98 @@ def set_player_active_if_youth(player):
         db.session.add(player)
 
 
-def parse_team_players(df, tournament):
-    """Parse player data from team tournament Excel file"""
-    ranked_players = []
-    games_to_create = []  # Store game data to create after players are committed
-    player_count = 0  # Track number of players processed
-    
-    # Find all team sections by looking for team headers and player data
-    i = 0
-    while i < len(df):
-        row_data = [str(v).strip() if v is not None else '' for v in df.iloc[i]]
-        row_text = ' '.join(row_data).strip()
-        
-        # Look for team header (e.g., "1. Rankweil 1 (RtgAvg:2125, TB1: 18 / TB2: 48)")
-        if any(pattern in row_text for pattern in ['RtgAvg:', 'TB1:', 'TB2:']):
-            print(f"Found team header at row {i}: {row_text}")
-            i += 1
-            continue
-            
-        # Look for captain line
-        if row_text.startswith('Captain:'):
-            print(f"Found captain at row {i}: {row_text}")
-            i += 1
-            continue
-            
-        # Look for player data header (Bo., Name, Rtg, FED, etc.)
-        if 'Bo.' in row_text and 'Name' in row_text:
-            print(f"Found player header at row {i}: {row_text}")
-            # Parse the header
-            header = [str(v).strip() if v is not None else '' for v in df.iloc[i]]
-            header = [h for h in header if h]  # Remove empty columns
-            
-            # Find relevant columns
-            name_col = None
-            points_col = None
-            round_columns = []
-            
-            for idx, col in enumerate(header):
-                col_lower = col.lower()
-                if 'name' in col_lower:
-                    name_col = idx
-                elif any(p in col_lower for p in ['pts', 'punkte', 'points']):
-                    points_col = idx
-                elif col.isdigit() or any(r in col_lower for r in ['rd.', 'runde', 'round']):
-                    round_columns.append((idx, col))
-            
-            if name_col is None:
-                print(f"Warning: No name column found in header: {header}")
-                i += 1
-                continue
-                
-            print(f"Found round columns: {round_columns}")
-                
-            # Parse players in this team
-            i += 1
-            while i < len(df):
-                player_row = [str(v).strip() if v is not None else '' for v in df.iloc[i]]
-                
-                # Check if this is still player data
-                if not player_row or len(player_row) <= name_col or not player_row[name_col] or player_row[name_col] == 'nan':
-                    break
-                    
-                # Check if we hit the next team header
-                player_row_text = ' '.join(player_row).strip()
-                if any(pattern in player_row_text for pattern in ['RtgAvg:', 'TB1:', 'TB2:', 'Captain:']):
-                    break
-                
-                name = player_row[name_col].strip()
-                if not name or name == 'nan':
-                    break
-                    
-                # Parse points
-                try:
-                    points = float(player_row[points_col]) if points_col is not None and points_col < len(player_row) else 0
-                except (ValueError, TypeError, IndexError):
-                    points = 0
-                
-                # Find or note player
-                player = find_existing_player(name)
-                if player:
-                    set_player_active_if_youth(player)
-                else:
-                    print(f'Player not found: {name}')
-
-                tp = TournamentPlayer(
-                    tournament_id=tournament.id,
-                    player_id=player.id if player else None,
-                    name=name,
-                    ranking=None,  # No individual rankings in team tournaments
-                    points=points,
-                    tiebreak1=0,  # Not used for team tournaments
-                    tiebreak2=0   # Not used for team tournaments
-                )
-                ranked_players.append(tp)
-                db.session.add(tp)
-                
-                # Parse individual round results and store for later game creation
-                games_count = 0
-                for round_idx, round_col in round_columns:
-                    if round_idx < len(player_row):
-                        round_result = player_row[round_idx].strip()
-                        if round_result and round_result != 'nan' and round_result not in ['*', '***', '+', '-']:
-                            games_count += 1
-                            # Store game data to create after tp is committed
-                            games_to_create.append({
-                                'tournament_player': tp,
-                                'round_number': int(round_col) if round_col.isdigit() else games_count,
-                                'result': round_result
-                            })
-                
-                player_count += 1
-                print(f"Added player {player_count}: {name}, points: {points}, games: {games_count}")
-                
-                i += 1
-            continue
-        
-        i += 1
-    
-    if not ranked_players:
-        raise ValueError('No valid player data found in team tournament')
-
-    # Commit tournament players first so they get IDs
-    db.session.flush()
-    
-    # Now create games with proper tournament player IDs
-    from db.models import Game
-    for game_data in games_to_create:
-        tp = game_data['tournament_player']
-        game = Game(
-            tournament_id=tournament.id,
-            player_id=tp.id,
-            round_number=game_data['round_number'],
-            player_color=None,  # No color info available in team tournaments  
-            opponent_id=None,  # No opponent info in team tournaments
-            result=game_data['result']
-        )
-        db.session.add(game)
-
-    print(f"Total players imported: {len(ranked_players)}")
-    print(f"Total games created: {len(games_to_create)}")
-    return ranked_players, [], {}, len(games_to_create)  # Return games count for team tournaments
-
-
-def parse_players(df, header, header_row_idx, tournament, result_format):
-    """Parse player data from the Excel file"""
-    # Handle team tournaments differently
-    if result_format == 'team':
-        return parse_team_players(df, tournament)
-        
-    round_columns = detect_round_columns(header)
-    
-    # Find scoring columns (usually after round columns)
-    # Look for various patterns for scoring columns
-    wtg1_column = None
-    wtg2_column = None
-    wtg3_column = None
-    
-    # Common patterns for scoring columns
-    score_patterns = [
-        'wtg', 'pts', 'punkte', 'points', 'pkte', 'total', 'sum', 'erg', 'tb1'
-    ]
-    tiebreak_patterns = [
-        'buchh', 'buchhol', 'bh', 'sb', 'sonn', 'sonneborn', 'prog', 'progress', 'tb2', 'tb3'
-    ]
-    
-    # Special handling for TB1, TB2, TB3 pattern (common in chess-results.com)
-    tb1_col = None
-    tb2_col = None
-    tb3_col = None
-    pts_col = None
-    
-    for col in header:
-        col_str = str(col).upper().strip()
-        if col_str == 'TB1':
-            tb1_col = col
-        elif col_str == 'TB2':
-            tb2_col = col
-        elif col_str == 'TB3':
-            tb3_col = col
-        elif col_str in ['PTS', 'PKT', 'PTS.', 'PKT.', 'POINTS', 'POINTS.', 'PUNKTE', 'PUNKTE.']:
-            pts_col = col
-    
-    # If we found TB columns, check if there's also an explicit points column
-    if tb1_col:
-        if pts_col:
-            # If both TB1 and explicit points column exist, use points column for main score
-            wtg1_column = pts_col
-            wtg2_column = tb1_col  # TB1 becomes first tiebreak
-            wtg3_column = tb2_col  # TB2 becomes second tiebreak
-            print(f"Detected mixed pattern: Pts='{pts_col}', TB1='{tb1_col}', TB2='{tb2_col}', TB3='{tb3_col}'")
-        else:
-            # Only TB columns, assume TB1 contains main points (old behavior)
-            wtg1_column = tb1_col
-            wtg2_column = tb2_col
-            wtg3_column = tb3_col
-            print(f"Detected TB pattern: TB1='{tb1_col}', TB2='{tb2_col}', TB3='{tb3_col}'")
-    elif pts_col:
-        # No TB columns but we found an explicit points column
-        # Look for Wtg1/Wtg2/Wtg3 or other tiebreak columns
-        wtg1_column = pts_col
-        
-        # Find tiebreak columns after the points column
-        pts_idx = header.index(pts_col)
-        for i in range(pts_idx + 1, len(header)):
-            col_name = str(header[i]).strip()
-            if col_name and col_name != 'nan':
-                if not wtg2_column:
-                    wtg2_column = header[i]
-                elif not wtg3_column:
-                    wtg3_column = header[i]
-                    break
-        
-        print(f"Detected points pattern: Pts='{pts_col}', Wtg1='{wtg2_column}', Wtg2='{wtg3_column}'")
-    else:
-        # Find scoring columns with original logic
-        for i, col in enumerate(header):
-            col_lower = str(col).lower().strip()
-            
-            # First scoring column (main points)
-            if not wtg1_column:
-                for pattern in score_patterns:
-                    if pattern in col_lower:
-                        wtg1_column = col
-                        break
-            
-            # Second scoring column (first tiebreak)
-            elif not wtg2_column:
-                for pattern in tiebreak_patterns:
-                    if pattern in col_lower:
-                        wtg2_column = col
-                        break
-                # If no tiebreak pattern found, try next column after main score
-                if not wtg2_column and i > 0:
-                    prev_col = str(header[i-1]).lower().strip()
-                    for pattern in score_patterns:
-                        if pattern in prev_col:
-                            wtg2_column = col
-                            break
-            
-            # Third scoring column (second tiebreak)
-            elif not wtg3_column:
-                for pattern in tiebreak_patterns:
-                    if pattern in col_lower:
-                        wtg3_column = col
-                        break
-    
-    # If we still haven't found scoring columns, use positional logic
-    if not wtg1_column and round_columns:
-        last_round_idx = header.index(round_columns[-1])
-        # Look for numeric columns after the last round column
-        for i in range(last_round_idx + 1, len(header)):
-            col_name = str(header[i]).strip()
-            if col_name and col_name != 'nan':
-                if not wtg1_column:
-                    wtg1_column = header[i]
-                elif not wtg2_column:
-                    wtg2_column = header[i]
-                elif not wtg3_column:
-                    wtg3_column = header[i]
-                    break
-
-    print(f"Detected scoring columns: Wtg1='{wtg1_column}', Wtg2='{wtg2_column}', Wtg3='{wtg3_column}'")
-    
-    if not wtg1_column:
-        # Last resort: look for any numeric column that might contain scores
-        for col in header:
-            col_str = str(col).strip()
-            if col_str and col_str != 'nan' and col_str.lower() != 'name':
-                # Check if this column contains numeric data
-                try:
-                    test_data = []
-                    for i in range(header_row_idx + 1, min(header_row_idx + 6, len(df))):
-                        row = [str(v).strip() for v in df.iloc[i]]
-                        if len(row) > header.index(col):
-                            data = dict(zip(header, row))
-                            val = data.get(col, '')
-                            if val and val != 'nan':
-                                test_data.append(float(val))
-                    
-                    if len(test_data) > 0:  # Found numeric data
-                        wtg1_column = col
-                        print(f"Found numeric column for main score: '{wtg1_column}'")
-                        break
-                except (ValueError, IndexError):
-                    continue
-    
-    if not wtg1_column:
-        raise ValueError("No scoring column found. Available columns: " + ", ".join([str(c) for c in header]))
-
-    ranked_players = []
-    rank = 1
-
-    for i in range(header_row_idx + 1, len(df)):
-        row = [str(v).strip() for v in df.iloc[i]]
-        if not row:
-            break
-        data = dict(zip(header, [str(v).strip() for v in row]))
-        if not data.get('Name', '') or data.get('Name', '') == "nan":
-            break
-
-        name = data.get('Name', '').strip()
-        player = find_existing_player(name)
-        if player:
-            set_player_active_if_youth(player)
-        else:
-            print(f'Player not found: {name}')
-
-        # Parse rank from first column if available
-        if data.get(header[0]) != "nan":
-            try:
-                rank = int(data.get(header[0], 0))
-            except ValueError:
-                pass
-
-        # Parse scoring data
-        try:
-            points = float(data.get(wtg1_column, 0)) if wtg1_column else 0
-        except (ValueError, TypeError):
-            points = 0
-            
-        try:
-            tiebreak1 = float(data.get(wtg2_column, 0)) if wtg2_column else 0
-        except (ValueError, TypeError):
-            tiebreak1 = 0
-            
-        try:
-            tiebreak2 = float(data.get(wtg3_column, 0)) if wtg3_column else 0
-        except (ValueError, TypeError):
-            tiebreak2 = 0
-
-        tp = TournamentPlayer(
-            tournament_id=tournament.id,
-            player_id=player.id if player else None,
-            name=name,
-            ranking=rank,
-            points=points,
-            tiebreak1=tiebreak1,
-            tiebreak2=tiebreak2
-        )
-        ranked_players.append(tp)
-        db.session.add(tp)
-
-    if not ranked_players:
-        raise ValueError('No valid player data found')
-
-    rank_dict = {tp.ranking: tp for tp in ranked_players}
-    return ranked_players, round_columns, rank_dict, 0  # 0 games for non-team tournaments (parsed separately)
-
-
-def parse_games(df, header, header_row_idx, round_columns, ranked_players, tournament, result_format, rank_dict):
-    """Parse game results from the Excel file"""
-    imported_games = 0
-    rank = 0
-    
-    for i in range(header_row_idx + 1, len(df)):
-        row = [str(v).strip() for v in df.iloc[i]]
-        if not row:
-            break
-        data = dict(zip(header, [str(v).strip() for v in row]))
-        if not data.get('Name', '') or data.get('Name', '') == "nan":
-            break
-
-        rank += 1
-        if rank > len(ranked_players):
-            break
-            
-        player = ranked_players[rank - 1]
-        if not player:
-            continue  # Skip if no player at this rank
-
-        for r in range(len(round_columns)):
-            round_result = data.get(round_columns[r])
-            if round_result in ['*', '***', '+'] or not round_result:
-                continue
-
-            player_color = None
-            opponent = None
-            result = None
-
-            if result_format == 'simple':
-                if round_result in ['*', '***', '+']:
-                    continue
-                round_num = r + 1
-                opponent_rank = round_num
-                if opponent_rank not in rank_dict or opponent_rank == player.ranking:
-                    continue
-                opponent = rank_dict[opponent_rank]
-                result = round_result
-                
-            elif result_format == 'team':
-                if round_result not in ['1', '0', '½']:
-                    continue
-                # For team tournaments, no opponent, just record result but don't create Game
-                continue
-                
-            elif result_format == 'pair':
-                if round_result == '+':
-                    continue
-                parts = round_result.split()
-                if len(parts) != 2:
-                    print(f"DEBUG: Invalid pair format {round_result} for {player.name}")
-                    continue
-                try:
-                    opponent_nr = int(parts[0])
-                    result = parts[1]
-                except ValueError:
-                    print(f"DEBUG: Invalid numbers in {round_result} for {player.name}")
-                    continue
-                if opponent_nr < 1 or opponent_nr > len(ranked_players):
-                    print(f"DEBUG: Opponent number {opponent_nr} out of range for {player.name}")
-                    continue
-                opponent = ranked_players[opponent_nr - 1]
-                if opponent == player:
-                    print(f"DEBUG: Self opponent for {player.name}")
-                    continue
-                    
-            else:  # complex format
-                if round_result == '+':
-                    continue
-                
-                # Handle various result formats
-                opponent = None
-                result = None
-                player_color = None
-                
-                # Handle bye rounds and forfeit losses
-                if round_result in ['-1', '-½', '-0.5']:
-                    # Bye rounds: -1 (full point bye), -½ (half point bye)
-                    continue  # Skip creating game record for byes
-                elif round_result == '0':
-                    # Forfeit loss with no opponent specified
-                    continue  # Skip if no opponent info
-                
-                # Try standard complex format: "123w1" or "45b½"
-                m = re.match(r'^(\d+)([wsb])([10½+])$', round_result)
-                if m:
-                    opponent_nr = int(m.group(1))
-                    if opponent_nr < 1 or opponent_nr > len(ranked_players):
-                        continue
-                    opponent = ranked_players[opponent_nr - 1]
-                    result = m.group(3)
-                    color = m.group(2)
-                    if color == 'w':
-                        player_color = 'white'
-                    elif color in ['s', 'b']:
-                        player_color = 'black'
-                else:
-                    # Try withdrawal/forfeit formats: "123w-" or "45b-"
-                    m = re.match(r'^(\d+)([wsb])-$', round_result)
-                    if m:
-                        opponent_nr = int(m.group(1))
-                        if opponent_nr < 1 or opponent_nr > len(ranked_players):
-                            continue
-                        opponent = ranked_players[opponent_nr - 1]
-                        result = '1'  # Win by forfeit/withdrawal
-                        color = m.group(2)
-                        if color == 'w':
-                            player_color = 'white'
-                        elif color in ['s', 'b']:
-                            player_color = 'black'
-                    else:
-                        # Try half-point bye with opponent: "-½" alone already handled above
-                        print(f'Invalid round result, assuming skip: {round_result} for {player.name}')
-                        continue
-
-            # Create game record for non-team tournaments
-            if result_format != 'team' and opponent and result:
-                if player.id == opponent.id:
-                    print(f'Player cannot play against themselves: {player.name}')
-                    continue
-                    
-                game = Game(
-                    tournament_id=tournament.id,
-                    player_id=player.id,  # This is the TournamentPlayer.id
-                    player_color=player_color,
-                    opponent_id=opponent.id,  # This is the TournamentPlayer.id
-                    round_number=r + 1,
-                    result=result
-                )
-                db.session.add(game)
-                imported_games += 1
-
-    return imported_games
-
-
-def create_best_of_3_games(ranked_players, tournament, df):
+def link_unmatched_participants(tournament_id):
     """
-    Create game records for Best of 3 matches based on final scores.
-    
-    Args:
-        ranked_players: List of TournamentPlayer objects (should be 2 players)
-        tournament: Tournament object
-        df: DataFrame containing the tournament data
-        
-    Returns:
-        int: Number of games created
+    Fuzzy-match the participants of a tournament that find_existing_player
+    could not map.
+
+    All unmatched names are scored against one trigram index of all players.
+    A participant is linked if its best candidate reaches
+    FUZZY_MATCH_AUTO_LINK_THRESHOLD and clearly beats the runner-up; otherwise
+    candidates above FUZZY_MATCH_REVIEW_THRESHOLD are stored as MatchCandidate
+    rows for review. Players already linked in the tournament are no
+    candidates, and a player is linked to at most one participant: if it is
+    the best candidate of several, all of them go to review. Returns the
+    number of linked participants. Does not commit.
     """
-    if len(ranked_players) != 2:
+    unmatched = TournamentPlayer.query.filter_by(tournament_id=tournament_id, player_id=None).all()
+    if not unmatched:
         return 0
-        
-    player1, player2 = ranked_players[0], ranked_players[1]
-    
-    # Get scores from TB1 column (points/game-points in Best of 3)
-    # TB1 maps to the points field in the tournament player
-    player1_score = int(player1.points) if player1.points else 0
-    player2_score = int(player2.points) if player2.points else 0
-    
-    print(f"Creating Best of 3 games: {player1.name} {player1_score}-{player2_score} {player2.name}")
-    
-    imported_games = 0
-    
-    # Create individual game records based on the final score
-    total_games = player1_score + player2_score
-    
-    for round_num in range(1, total_games + 1):
-        # Determine result for this game
-        # For a 2-0 result: rounds 1 and 2 go to winner
-        # For a 2-1 result: rounds 1,2 to winner, round 3 to loser
-        if round_num <= player1_score:
-            # Player1 wins this game
-            player1_result = "1"
-            player2_result = "0"
-        else:
-            # Player2 wins this game  
-            player1_result = "0"
-            player2_result = "1"
-        
-        # Create game from player1's perspective
-        game1 = Game(
-            tournament_id=tournament.id,
-            round_number=round_num,
-            player_id=player1.id,
-            opponent_id=player2.id,
-            result=player1_result,
-            player_color="white" if round_num % 2 == 1 else "black"
-        )
-        
-        # Create game from player2's perspective
-        game2 = Game(
-            tournament_id=tournament.id,
-            round_number=round_num,
-            player_id=player2.id,
-            opponent_id=player1.id,
-            result=player2_result,
-            player_color="black" if round_num % 2 == 1 else "white"
+
+    taken = {
+        player_id for (player_id,) in db.session.query(TournamentPlayer.player_id).filter(
+            TournamentPlayer.tournament_id == tournament_id,
+            TournamentPlayer.player_id.isnot(None)
         )
-        
-        db.session.add(game1)
-        db.session.add(game2)
-        imported_games += 2
-        
-        print(f"   Round {round_num}: {player1.name} ({player1_result}) vs {player2.name} ({player2_result})")
-    
-    print(f"Created {imported_games} game records for Best of 3 match")
-    return imported_games
+    }
+    rejected_matches = load_rejected_matches()
+    auto_link_threshold = current_app.config.get('FUZZY_MATCH_AUTO_LINK_THRESHOLD', DEFAULT_FUZZY_AUTO_LINK_THRESHOLD)
+    review_threshold = current_app.config.get('FUZZY_MATCH_REVIEW_THRESHOLD', DEFAULT_FUZZY_REVIEW_THRESHOLD)
+    # Fetch enough candidates that FUZZY_MAX_CANDIDATES remain after dropping taken and rejected players
+    candidates_by_name = TrigramIndex.load().match_many(
+        (tp.name for tp in unmatched), min_score=review_threshold,
+        limit=FUZZY_MAX_CANDIDATES + len(taken) + len(rejected_matches)
+    )
+
+    candidates_by_tp = {}
+    best_by_tp = {}
+    for tp in unmatched:
+        candidates = [
+            candidate for candidate in candidates_by_name.get(tp.name, [])
+            if candidate[0] not in taken and not is_rejected_match(rejected_matches, tp.name, candidate[0])
+        ][:FUZZY_MAX_CANDIDATES]
+        candidates_by_tp[tp.id] = candidates
+        best_by_tp[tp.id] = auto_link_candidate(candidates, auto_link_threshold)
+    # Players that are the best candidate of several participants are not linked to any of them
+    best_counts = Counter(best[0] for best in best_by_tp.values() if best)
+
+    linked = 0
+    for tp in unmatched:
+        candidates = candidates_by_tp[tp.id]
+        best = best_by_tp[tp.id]
+        if best and best_counts[best[0]] == 1:
+            player = db.session.get(Player, best[0])
+            tp.player_id = player.id
+            set_player_active_if_youth(player)
+            # No alias: aliases are trusted before any other matching, fuzzy links are guesses
+            print(f'Fuzzy matched: {tp.name} -> {player.first_name} {player.last_name} ({best[1]:.2f})')
+            linked += 1
+        else:
+            for player_id, score in candidates:
+                db.session.add(MatchCandidate(tournament_player_id=tp.id, player_id=player_id, score=score))
+    db.session.flush()
+    return linked
 
 
-def parse_cross_table_games(cross_table_file, ranked_players, tournament):
+def update_tournament_counts(tournament_ids):
+    """Recalculate the stored games_played and total_players counts of the given tournaments"""
+    tournament_ids = list(tournament_ids)
+    if not tournament_ids:
+        return
+    db.session.flush()
+    db.session.execute(
+        TournamentPlayer.__table__.update()
+        .where(TournamentPlayer.tournament_id.in_(tournament_ids))
+        .values(games_played=db.select(db.func.count(Game.id))
+                .where(Game.player_id == TournamentPlayer.id)
+                .scalar_subquery())
+    )
+    db.session.execute(
+        Tournament.__table__.update()
+        .where(Tournament.id.in_(tournament_ids))
+        .values(total_players=db.select(db.func.count(TournamentPlayer.id))
+                .where(TournamentPlayer.tournament_id == Tournament.id)
+                .scalar_subquery())
+    )
+    # Objects loaded before the update still carry the old counts
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, Tournament) and obj.id in tournament_ids:
+            db.session.expire(obj, ['total_players'])
+        elif isinstance(obj, TournamentPlayer) and obj.tournament_id in tournament_ids:
+            db.session.expire(obj, ['games_played'])
+
+
+def parse_cross_table_games(cross_table_file, ranked_players, tournament, reader=None):
     """
     Parse cross table Excel file to extract round-by-round game results.
     
@@ -710,6 +229,7 @@ def parse_cross_table_games(cross_table_file, ranked_players, tournament):
         cross_table_file: Path to cross table Excel file
         ranked_players: List of TournamentPlayer objects
         tournament: Tournament object
+        reader: Sheet reader, see tournament_parser.read_sheet
         
     Returns:
         int: Number of games created
@@ -718,8 +238,7 @@ def parse_cross_table_games(cross_table_file, ranked_players, tournament):
         return 0
         
     try:
-        import pandas as pd
-        df = pd.read_excel(cross_table_file)
+        rows = read_sheet(cross_table_file, reader=reader, header=0, na='')
         
         # Create a mapping from player names to TournamentPlayer objects
         player_map = {}
@@ -734,14 +253,13 @@ def parse_cross_table_games(cross_table_file, ranked_players, tournament):
             for variant in name_variants:
                 player_map[variant] = tp
         
-        imported_games = 0
+        games = []
         current_round = 0
         
         print(f"Parsing cross table from {cross_table_file}")
         
         # Look for round headers and game results
-        for i, row in df.iterrows():
-            row_data = [str(v).strip() if pd.notna(v) else '' for v in row]
+        for row_data in rows:
             
             # Check if this is a round header
             for cell in row_data:
@@ -783,28 +301,23 @@ def parse_cross_table_games(cross_table_file, ranked_players, tournament):
                             if black_result == '½':
                                 black_result = '0.5'
                             
-                            # Create game records
-                            game1 = Game(
-                                tournament_id=tournament.id,
-                                round_number=current_round,
-                                player_id=white_player.id,
-                                opponent_id=black_player.id,
-                                result=white_result,
-                                player_color="white"
-                            )
-                            
-                            game2 = Game(
-                                tournament_id=tournament.id,
-                                round_number=current_round,
-                                player_id=black_player.id,
-                                opponent_id=white_player.id,
-                                result=black_result,
-                                player_color="black"
-                            )
-                            
-                            db.session.add(game1)
-                            db.session.add(game2)
-                            imported_games += 2
+                            # One game record per side, inserted together below
+                            games.append({
+                                'tournament_id': tournament.id,
+                                'round_number': current_round,
+                                'player_id': white_player.id,
+                                'opponent_id': black_player.id,
+                                'result': white_result,
+                                'player_color': "white"
+                            })
+                            games.append({
+                                'tournament_id': tournament.id,
+                                'round_number': current_round,
+                                'player_id': black_player.id,
+                                'opponent_id': white_player.id,
+                                'result': black_result,
+                                'player_color': "black"
+                            })
                             
                             print(f"   Round {current_round}: {white_name} ({white_result}) vs {black_name} ({black_result})")
                     else:
@@ -813,123 +326,174 @@ def parse_cross_table_games(cross_table_file, ranked_players, tournament):
                         if not black_player:
                             print(f"   Warning: Black player '{black_name}' not found in database")
         
-        print(f"Imported {imported_games} games from cross table")
-        return imported_games
+        if games:
+            db.session.execute(db.insert(Game), games)
+        print(f"Imported {len(games)} games from cross table")
+        return len(games)
         
     except Exception as e:
         print(f"Error parsing cross table: {e}")
         return 0
 
 
-def import_tournament_from_excel(file_path, tournament_details):
+def persist_tournament(parsed, tournament_details):
+    """
+    Write a ParsedTournament (see tournament_parser.py) to the database.
+
+    Matches the participants to players, creates the tournament with its
+    participants and games, fuzzy-links unmatched participants and updates
+    counts and player stats. Commits; returns the import summary.
+    """
+    # Every participant name is matched against all players; index them once
+    name_index = PlayerNameIndex.load()
+    players = match_participants(parsed.players, name_index)
+    for parsed_player, player in zip(parsed.players, players):
+        if player:
+            set_player_active_if_youth(player)
+        else:
+            print(f'Player not found: {parsed_player.name}')
+
+    # Only whether any player could be mapped is reported
+    mapped_players_count = 1 if any(players) else 0
+    if mapped_players_count == 0:
+        print(f"Warning: No players from this tournament could be mapped to existing players. Importing tournament anyway.")
+
+    # Convert date string to Python date object if needed
+    if 'date' in tournament_details and isinstance(tournament_details['date'], str):
+        try:
+            tournament_details['date'] = datetime.strptime(tournament_details['date'], '%Y-%m-%d').date()
+        except ValueError as e:
+            tournament_details['date'] = None
+
+    # Create tournament
+    print(f"Creating tournament: {tournament_details.get('name')}")
+    tournament = Tournament(
+        name=tournament_details.get('name'),
+        checksum=tournament_details.get('checksum'),
+        date=tournament_details.get('date'),
+        location=tournament_details.get('location'),
+        is_team=(parsed.result_format == 'team'),
+        chess_results_id=tournament_details.get('id'),
+        chess_results_url=tournament_details.get('tournament_url'),
+        elo_rating=tournament_details.get('elo_calculation'),
+        time_control=tournament_details.get('time_control'),
+        rounds=tournament_details.get('number_of_rounds'),
+        imported_at=datetime.now()
+    )
+    db.session.add(tournament)
+    db.session.flush()
+
+    # Participants and games are written with one executemany insert each
+    # instead of through the unit of work; RETURNING yields the participant
+    # ids in parameter order, so games can reference them by index
+    tp_ids = []
+    if parsed.players:
+        result = db.session.execute(
+            db.insert(TournamentPlayer).returning(TournamentPlayer.id, sort_by_parameter_order=True),
+            [{
+                'tournament_id': tournament.id,
+                'player_id': player.id if player else None,
+                'name': parsed_player.name,
+                'ranking': parsed_player.ranking,
+                'points': parsed_player.points,
+                'tiebreak1': parsed_player.tiebreak1,
+                'tiebreak2': parsed_player.tiebreak2
+            } for parsed_player, player in zip(parsed.players, players)]
+        )
+        tp_ids = [row.id for row in result]
+
+    if parsed.games:
+        db.session.execute(db.insert(Game), [{
+            'tournament_id': tournament.id,
+            'player_id': tp_ids[game.player],
+            'opponent_id': tp_ids[game.opponent] if game.opponent is not None else None,
+            'player_color': game.player_color,
+            'round_number': game.round_number,
+            'result': game.result
+        } for game in parsed.games])
+
+    # Participants without an exact name match: link near matches, keep candidates for the rest
+    fuzzy_matched_count = link_unmatched_participants(tournament.id)
+
+    # Player ids after fuzzy linking
+    player_ids = dict(db.session.query(TournamentPlayer.id, TournamentPlayer.player_id).filter(
+        TournamentPlayer.tournament_id == tournament.id
+    ).all())
+    for i, (parsed_player, tp_id) in enumerate(zip(parsed.players, tp_ids)):
+        if parsed.result_format == 'team':
+            print(f"Team Player {i+1}: {parsed_player.name} (ID: {player_ids[tp_id]}) - {parsed_player.points} pts")
+        else:
+            print(f"Ranked Player: {parsed_player.ranking} - {parsed_player.name} (ID: {player_ids[tp_id]})")
+
+    # Store game and field size counts so readers don't have to load all games
+    update_tournament_counts([tournament.id])
+
+    # Update the materialized stats of all mapped players
+    refresh_player_stats(player_ids.values())
+
+    db.session.commit()
+
+    return {
+        'success': True,
+        'tournament_id': tournament.id,
+        'tournament_name': tournament_details.get('name'),
+        'location': tournament_details.get('location'),
+        'date': tournament_details.get('date').isoformat() if tournament_details.get('date') else None,
+        'imported_games': len(parsed.games),
+        'imported_players': len(tp_ids),
+        'mapped_players': mapped_players_count,
+        'fuzzy_matched_players': fuzzy_matched_count
+    }
+
+
+def file_checksum(file_path):
+    """SHA-256 hex digest of a file"""
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(8192):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def load_parsed_tournament(file_path, checksum=None, reader=None):
+    """
+    The ParsedTournament of an Excel export, from the parse cache if the file
+    (identified by its checksum) was parsed before. Both sheet readers yield
+    the same result, so cache entries are shared between them.
+    """
+    cache = ParseCache.from_config(current_app.config)
+    if cache is None:
+        return parse_tournament_file(file_path, reader=reader)
+    checksum = checksum or file_checksum(file_path)
+    parsed = cache.get(checksum)
+    if parsed is None:
+        parsed = parse_tournament_file(file_path, reader=reader)
+        cache.put(checksum, parsed)
+    else:
+        print(f"Using cached parse of {file_path}")
+    return parsed
+
+
+def import_tournament_from_excel(file_path, tournament_details, reader=None):
+    """
+    Import a chess-results Excel export. reader selects the sheet reader
+    ('openpyxl' or 'pandas', see tournament_parser.read_sheet); by default
+    .xlsx files are streamed with openpyxl. Files parsed before are read from
+    the parse cache (see parse_cache.py).
+    """
     try:
-        # Load Excel file
-        df = pd.read_excel(file_path, header=None)
-        
-        # Generate checksum if not provided
+        checksum = file_checksum(file_path)
+        # Use the file checksum unless one was provided
         if not tournament_details.get('checksum'):
-            sha256 = hashlib.sha256()
-            with open(file_path, 'rb') as f:
-                while chunk := f.read(8192):
-                    sha256.update(chunk)
-            tournament_details['checksum'] = sha256.hexdigest()
+            tournament_details['checksum'] = checksum
 
         # Check if tournament already imported
         if Tournament.query.filter_by(checksum=tournament_details['checksum']).first():
             raise ValueError('Tournament already imported')
-        
-        # Find header row and parse structure
-        header_row_idx = find_header_row(df)
-        header = [str(v).strip() for v in df.iloc[header_row_idx]]
-        if not header:
-            raise ValueError("No valid header found")
-
-        # Detect result format
-        result_format = detect_result_format(df, header, header_row_idx)
-        print(f"Detected result format: {result_format}")
-
-        # Check if any players can be mapped before creating tournament
-        mapped_players_count = 0
-        for i in range(header_row_idx + 1, len(df)):
-            row = [str(v).strip() for v in df.iloc[i]]
-            if not row:
-                break
-            data = dict(zip(header, [str(v).strip() for v in row]))
-            if not data.get('Name', '') or data.get('Name', '') == "nan":
-                break
-            name = data.get('Name', '').strip()
-            player = find_existing_player(name)
-            if player:
-                mapped_players_count += 1
-                break  # We only need to find one mapped player
-
-        if mapped_players_count == 0:
-            print(f"Warning: No players from this tournament could be mapped to existing players. Importing tournament anyway.")
-
-        # Convert date string to Python date object if needed
-        if 'date' in tournament_details and isinstance(tournament_details['date'], str):
-            try:
-                from datetime import datetime
-                tournament_details['date'] = datetime.strptime(tournament_details['date'], '%Y-%m-%d').date()
-            except ValueError as e:
-                tournament_details['date'] = None
-        
-        # Create tournament
-        print(f"Creating tournament: {tournament_details.get('name')}")
-        tournament = Tournament(
-            name=tournament_details.get('name'), 
-            checksum=tournament_details.get('checksum'), 
-            date=tournament_details.get('date'), 
-            location=tournament_details.get('location'),
-            is_team=(result_format == 'team'),
-            chess_results_id=tournament_details.get('id'),
-            chess_results_url=tournament_details.get('tournament_url'),
-            elo_rating=tournament_details.get('elo_calculation'),
-            time_control=tournament_details.get('time_control'),
-            rounds=tournament_details.get('number_of_rounds'),
-            imported_at=datetime.now()
-        )
-        db.session.add(tournament)
-        db.session.flush()
-
-        # Parse players and games
-        ranked_players, round_columns, rank_dict, team_games_count = parse_players(df, header, header_row_idx, tournament, result_format)
-        db.session.flush()
-        
-        for i, p in enumerate(ranked_players):
-            if result_format == 'team':
-                print(f"Team Player {i+1}: {p.name} (ID: {p.player_id}) - {p.points} pts")
-            else:
-                print(f"Ranked Player: {p.ranking} - {p.name} (ID: {p.player_id})")
-
-        # For team tournaments, games are already created in parse_team_players
-        if result_format == 'team':
-            imported_games = team_games_count
-        else:
-            imported_games = parse_games(df, header, header_row_idx, round_columns, ranked_players, tournament, result_format, rank_dict)
 
-        # Special handling for Best of 3 matches (2 players, 0 games from normal parsing)
-        if len(ranked_players) == 2 and imported_games == 0:
-            imported_games = create_best_of_3_games(ranked_players, tournament, df)
-        
-        # Special handling for results-only tournaments (multiple players, final standings but no games)
-        elif len(ranked_players) > 2 and imported_games == 0:
-            print(f"Results-only tournament detected: {len(ranked_players)} players with final standings but no individual games")
-            print("This is typical for tournaments where only final results are published")
-            # No need to create artificial games - we have the final standings which is sufficient
-
-        db.session.commit()
-        
-        return {
-            'success': True,
-            'tournament_id': tournament.id,
-            'tournament_name': tournament_details.get('name'),
-            'location': tournament_details.get('location'),
-            'date': tournament_details.get('date').isoformat() if tournament_details.get('date') else None,
-            'imported_games': imported_games,
-            'imported_players': len(ranked_players),
-            'mapped_players': mapped_players_count
-        }
+        # Parsing does not touch the database; the write transaction starts in persist_tournament
+        parsed = load_parsed_tournament(file_path, checksum, reader=reader)
+        return persist_tournament(parsed, tournament_details)
 
     except Exception as e:
         db.session.rollback()
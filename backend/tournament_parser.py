@@ -0,0 +1,771 @@
+"""
+Tournament Parser Module
+
+Parses chess-results.com Excel exports into a ParsedTournament: a plain,
+database-free representation of the detected result format, the
+participants with their scores and raw round results, and the games derived
+from them. Writing it to the database is done separately by
+tournament_importer.persist_tournament.
+
+The sheet is read into a string matrix once (read_sheet) and the participant
+rows are read in a single pass; format and scoring column detection and game
+parsing work on the collected participants.
+
+Sheets are read with one of two readers:
+
+- 'openpyxl' streams the rows of an .xlsx workbook with openpyxl's read-only
+  iterator straight into the matrix, without pandas. Cells are converted the
+  way pd.read_excel converts them, so both readers yield the same matrix.
+- 'pandas' reads the sheet with pd.read_excel and normalizes the DataFrame
+  (normalize_sheet). Needed for legacy .xls files.
+
+pandas and openpyxl are imported on first use, so importing this module stays
+cheap for processes that never read a sheet.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+# Headers of the FIDE id column in chess-results exports
+FIDE_ID_HEADERS = ['FideID', 'FIDE-ID', 'FIDE ID', 'Fide-ID', 'FIDE-Nr.']
+
+# Version of the parsing logic; bump it whenever a change alters the
+# ParsedTournament of any file, so parse_cache entries are not reused
+PARSER_VERSION = 1
+
+SHEET_READERS = ('openpyxl', 'pandas')
+
+# Extensions the openpyxl reader can read; anything else goes through pandas
+OPENPYXL_EXTENSIONS = ('.xlsx', '.xlsm')
+
+# Cell texts pd.read_excel reads as missing values (its default na_values)
+PANDAS_NA_VALUES = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+])
+
+
+@dataclass
+class ParsedPlayer:
+    """A participant as listed in the sheet"""
+    name: str
+    ranking: Optional[int]
+    points: float
+    tiebreak1: float = 0
+    tiebreak2: float = 0
+    fide_id: Optional[str] = None
+    round_results: List[str] = field(default_factory=list)  # Raw cells of the round columns
+
+
+@dataclass
+class ParsedGame:
+    """A game from the perspective of one participant; players are indexes into ParsedTournament.players"""
+    player: int
+    opponent: Optional[int]
+    round_number: int
+    player_color: Optional[str]
+    result: str
+
+
+@dataclass
+class ParsedTournament:
+    result_format: str  # 'simple', 'pair', 'complex' or 'team'
+    header: List[str]
+    round_columns: List[str]
+    title: List[str]  # Text lines above the header (tournament name, last update, ...)
+    players: List[ParsedPlayer]
+    games: List[ParsedGame]
+
+
+def normalize_sheet(df, na='nan'):
+    """
+    Convert a sheet into a matrix (list of rows) of stripped strings.
+
+    Done once per file with vectorized operations; all parsing stages read
+    from the matrix instead of stringifying cells through df.iloc. Cells are
+    converted with str(), so empty cells become 'nan' (or na).
+    """
+    import numpy as np
+    import pandas as pd
+    values = df.to_numpy(dtype=object)
+    if na != 'nan':
+        values = np.where(pd.isna(values), na, values)
+    return np.char.strip(values.astype(str)).tolist()
+
+
+def _excel_cell_value(cell):
+    """Value of an openpyxl cell as pandas' openpyxl reader returns it; error cells are None"""
+    if cell.value is None:
+        return ''
+    if cell.data_type == 'e':
+        return None
+    if cell.data_type == 'n':
+        # Whole numbers are ints, so 5.0 reads as 5
+        value = int(cell.value)
+        return value if value == cell.value else float(cell.value)
+    return cell.value
+
+
+def _numeric_value(value):
+    """value as a number if pandas would parse it as one, else None"""
+    if isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str) and '_' not in value:
+        for cast in (int, float):
+            try:
+                return cast(value)
+            except ValueError:
+                pass
+    return None
+
+
+def _column_strings(values, na):
+    """
+    The cells of a column (None for missing values) as strings, with the
+    column type pd.read_excel would infer: all numeric becomes int or, with
+    any float or missing value, float (5 -> '5.0'); otherwise cells are
+    kept as they are.
+    """
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, bool) for value in present) and len(present) == len(values):
+        return [str(value) for value in values]
+    if present and all(isinstance(value, datetime) for value in present):
+        # Date columns become datetime64, where missing values print as NaT
+        return [str(value) if value is not None else na if na != 'nan' else 'NaT' for value in values]
+    numbers = [_numeric_value(value) for value in present]
+    if any(number is None for number in numbers):
+        return [na if value is None else str(value) for value in values]
+    if len(present) < len(values) or any(isinstance(number, float) for number in numbers):
+        numbers = iter(numbers)
+        return [na if value is None else str(float(next(numbers))) for value in values]
+    numbers = iter(numbers)
+    return [str(int(next(numbers))) for value in values]
+
+
+def read_sheet_openpyxl(file_path, header=None, na='nan'):
+    """
+    Read the first worksheet into a matrix of stripped strings, like
+    normalize_sheet(pd.read_excel(file_path, header=header), na).
+
+    Rows are streamed with openpyxl's read-only iterator; no DataFrame is
+    built. With header=0 the first row is taken as column names and dropped.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[0]
+        # Exports often carry wrong dimensions; read all rows that exist
+        sheet.reset_dimensions()
+        rows = []
+        last_row_with_data = -1
+        for row_number, row in enumerate(sheet.rows):
+            values = [_excel_cell_value(cell) for cell in row]
+            while values and values[-1] == '':
+                values.pop()
+            if values:
+                last_row_with_data = row_number
+            rows.append(values)
+    finally:
+        workbook.close()
+
+    rows = rows[:last_row_with_data + 1]
+    width = max((len(row) for row in rows), default=0)
+    if header is not None:
+        rows = rows[header + 1:]
+    columns = [
+        _column_strings([
+            row[i] if i < len(row) and not (isinstance(row[i], str) and row[i] in PANDAS_NA_VALUES) else None
+            for row in rows
+        ], na)
+        for i in range(width)
+    ]
+    return [[column[row_idx].strip() for column in columns] for row_idx in range(len(rows))]
+
+
+def read_sheet_pandas(file_path, header=None, na='nan'):
+    """Read the first worksheet with pd.read_excel into a matrix of stripped strings"""
+    import pandas as pd
+    return normalize_sheet(pd.read_excel(file_path, header=header), na=na)
+
+
+def default_sheet_reader(file_path):
+    """openpyxl for .xlsx files, pandas for anything else (e.g. legacy .xls)"""
+    return 'openpyxl' if os.path.splitext(file_path)[1].lower() in OPENPYXL_EXTENSIONS else 'pandas'
+
+
+def read_sheet(file_path, reader=None, header=None, na='nan'):
+    """
+    Read the first worksheet into a matrix of stripped strings with the given
+    reader (one of SHEET_READERS, default_sheet_reader(file_path) if None)
+    """
+    reader = reader or default_sheet_reader(file_path)
+    if reader == 'openpyxl':
+        return read_sheet_openpyxl(file_path, header=header, na=na)
+    if reader == 'pandas':
+        return read_sheet_pandas(file_path, header=header, na=na)
+    raise ValueError(f"Unknown sheet reader: {reader}")
+
+
+def detect_round_columns(header):
+    """Detect which columns contain round results"""
+    round_columns = []
+    for col in header:
+        col_str = str(col).strip()
+        # Round columns patterns:
+        # - Pure numbers: 1, 2, 3, etc.
+        # - Rd/Round format: Rd 1, Round 1, etc.
+        # - German format: 1.Rd, 2.Rd, etc.
+        if (re.match(r'^\d+$', col_str) or
+            re.match(r'^(Rd|Round)\s*\d+$', col_str, re.IGNORECASE) or
+            re.match(r'^\d+\.Rd$', col_str, re.IGNORECASE)):
+            round_columns.append(col)
+    return round_columns
+
+
+def participant_fide_id(data):
+    """The FIDE id of a participant row (dict of header -> value), or None"""
+    for header in FIDE_ID_HEADERS:
+        value = data.get(header, '').strip()
+        if value.endswith('.0'):
+            value = value[:-2]
+        if value.isdigit() and int(value) > 0:
+            return value
+    return None
+
+
+def participant_rows(rows, header, header_row_idx):
+    """The participant rows below the header as dicts (header -> cell), up to the first row without a name"""
+    participants = []
+    for row in rows[header_row_idx + 1:]:
+        data = dict(zip(header, row))
+        if not data.get('Name', '') or data.get('Name', '') == "nan":
+            break
+        participants.append(data)
+    return participants
+
+
+def find_header_row(rows):
+    """Find the row containing column headers"""
+    for idx, row in enumerate(rows):
+        if 'Name' in row:
+            return idx
+    raise ValueError("Header row not found")
+
+
+def is_team_sheet(rows, header_row_idx):
+    """Whether the sheet is a team tournament (team composition with round results)"""
+    # Check for team tournament indicators
+    for row in rows[:20]:  # Check first 20 rows
+        for cell in row:
+            # Look for Captain/Kapitän indicators
+            if ('Captain:' in cell or 'Kapitän:' in cell or
+                'Team-Composition' in cell or
+                'with round-results' in cell):
+                return True
+
+    # Check if we have team names with ratings in parentheses like "Hörbranz 1 (RtgAvg:2062, TB1: 18 / TB2: 49,5)"
+    for row in rows[:header_row_idx]:
+        for cell in row:
+            if re.match(r'.*\(RtgAvg:\d+.*TB1:.*TB2:.*\)', cell):
+                return True
+    return False
+
+
+def detect_result_format(players):
+    """Detect the format used for storing game results from the round results of the participants"""
+    for player in players:
+        for round_result in player.round_results:
+            if round_result in ['*', '***']:
+                continue
+            if re.match(r'^\d+ \d+$', round_result):
+                return 'pair'
+            if re.match(r'^\d+[wsb][10½+]$', round_result):
+                return 'complex'
+
+    return 'simple'
+
+
+def detect_scoring_columns(header, round_columns, sample_rows):
+    """
+    The columns holding points, first and second tiebreak.
+
+    sample_rows are the first rows below the header, used as a last resort
+    to find a numeric column. Raises ValueError if no points column is found.
+    """
+    wtg1_column = None
+    wtg2_column = None
+    wtg3_column = None
+
+    # Common patterns for scoring columns
+    score_patterns = [
+        'wtg', 'pts', 'punkte', 'points', 'pkte', 'total', 'sum', 'erg', 'tb1'
+    ]
+    tiebreak_patterns = [
+        'buchh', 'buchhol', 'bh', 'sb', 'sonn', 'sonneborn', 'prog', 'progress', 'tb2', 'tb3'
+    ]
+
+    # Special handling for TB1, TB2, TB3 pattern (common in chess-results.com)
+    tb1_col = None
+    tb2_col = None
+    tb3_col = None
+    pts_col = None
+
+    for col in header:
+        col_str = str(col).upper().strip()
+        if col_str == 'TB1':
+            tb1_col = col
+        elif col_str == 'TB2':
+            tb2_col = col
+        elif col_str == 'TB3':
+            tb3_col = col
+        elif col_str in ['PTS', 'PKT', 'PTS.', 'PKT.', 'POINTS', 'POINTS.', 'PUNKTE', 'PUNKTE.']:
+            pts_col = col
+
+    # If we found TB columns, check if there's also an explicit points column
+    if tb1_col:
+        if pts_col:
+            # If both TB1 and explicit points column exist, use points column for main score
+            wtg1_column = pts_col
+            wtg2_column = tb1_col  # TB1 becomes first tiebreak
+            wtg3_column = tb2_col  # TB2 becomes second tiebreak
+            print(f"Detected mixed pattern: Pts='{pts_col}', TB1='{tb1_col}', TB2='{tb2_col}', TB3='{tb3_col}'")
+        else:
+            # Only TB columns, assume TB1 contains main points (old behavior)
+            wtg1_column = tb1_col
+            wtg2_column = tb2_col
+            wtg3_column = tb3_col
+            print(f"Detected TB pattern: TB1='{tb1_col}', TB2='{tb2_col}', TB3='{tb3_col}'")
+    elif pts_col:
+        # No TB columns but we found an explicit points column
+        # Look for Wtg1/Wtg2/Wtg3 or other tiebreak columns
+        wtg1_column = pts_col
+
+        # Find tiebreak columns after the points column
+        pts_idx = header.index(pts_col)
+        for i in range(pts_idx + 1, len(header)):
+            col_name = str(header[i]).strip()
+            if col_name and col_name != 'nan':
+                if not wtg2_column:
+                    wtg2_column = header[i]
+                elif not wtg3_column:
+                    wtg3_column = header[i]
+                    break
+
+        print(f"Detected points pattern: Pts='{pts_col}', Wtg1='{wtg2_column}', Wtg2='{wtg3_column}'")
+    else:
+        # Find scoring columns with original logic
+        for i, col in enumerate(header):
+            col_lower = str(col).lower().strip()
+
+            # First scoring column (main points)
+            if not wtg1_column:
+                for pattern in score_patterns:
+                    if pattern in col_lower:
+                        wtg1_column = col
+                        break
+
+            # Second scoring column (first tiebreak)
+            elif not wtg2_column:
+                for pattern in tiebreak_patterns:
+                    if pattern in col_lower:
+                        wtg2_column = col
+                        break
+                # If no tiebreak pattern found, try next column after main score
+                if not wtg2_column and i > 0:
+                    prev_col = str(header[i-1]).lower().strip()
+                    for pattern in score_patterns:
+                        if pattern in prev_col:
+                            wtg2_column = col
+                            break
+
+            # Third scoring column (second tiebreak)
+            elif not wtg3_column:
+                for pattern in tiebreak_patterns:
+                    if pattern in col_lower:
+                        wtg3_column = col
+                        break
+
+    # If we still haven't found scoring columns, use positional logic
+    if not wtg1_column and round_columns:
+        last_round_idx = header.index(round_columns[-1])
+        # Look for numeric columns after the last round column
+        for i in range(last_round_idx + 1, len(header)):
+            col_name = str(header[i]).strip()
+            if col_name and col_name != 'nan':
+                if not wtg1_column:
+                    wtg1_column = header[i]
+                elif not wtg2_column:
+                    wtg2_column = header[i]
+                elif not wtg3_column:
+                    wtg3_column = header[i]
+                    break
+
+    print(f"Detected scoring columns: Wtg1='{wtg1_column}', Wtg2='{wtg2_column}', Wtg3='{wtg3_column}'")
+
+    if not wtg1_column:
+        # Last resort: look for any numeric column that might contain scores
+        for col in header:
+            col_str = str(col).strip()
+            if col_str and col_str != 'nan' and col_str.lower() != 'name':
+                # Check if this column contains numeric data
+                try:
+                    test_data = []
+                    for row in sample_rows:
+                        if len(row) > header.index(col):
+                            data = dict(zip(header, row))
+                            val = data.get(col, '')
+                            if val and val != 'nan':
+                                test_data.append(float(val))
+
+                    if len(test_data) > 0:  # Found numeric data
+                        wtg1_column = col
+                        print(f"Found numeric column for main score: '{wtg1_column}'")
+                        break
+                except (ValueError, IndexError):
+                    continue
+
+    if not wtg1_column:
+        raise ValueError("No scoring column found. Available columns: " + ", ".join([str(c) for c in header]))
+
+    return wtg1_column, wtg2_column, wtg3_column
+
+
+def parse_float(data, column):
+    """The value of a column as float, 0 if there is no such column or no number"""
+    try:
+        return float(data.get(column, 0)) if column else 0
+    except (ValueError, TypeError):
+        return 0
+
+
+def parse_players(participants, header, round_columns, scoring_columns):
+    """Parse the participants (see participant_rows) into ParsedPlayers"""
+    wtg1_column, wtg2_column, wtg3_column = scoring_columns
+    players = []
+    rank = 1
+
+    for data in participants:
+        name = data.get('Name', '').strip()
+
+        # Parse rank from first column if available
+        if data.get(header[0]) != "nan":
+            try:
+                rank = int(data.get(header[0], 0))
+            except ValueError:
+                pass
+
+        players.append(ParsedPlayer(
+            name=name,
+            ranking=rank,
+            points=parse_float(data, wtg1_column),
+            tiebreak1=parse_float(data, wtg2_column),
+            tiebreak2=parse_float(data, wtg3_column),
+            fide_id=participant_fide_id(data),
+            round_results=[data.get(col) for col in round_columns]
+        ))
+
+    if not players:
+        raise ValueError('No valid player data found')
+    return players
+
+
+def parse_team_players(rows):
+    """Parse the players and their round results from a team tournament sheet"""
+    players = []
+    games = []
+
+    # Find all team sections by looking for team headers and player data
+    i = 0
+    while i < len(rows):
+        row_data = rows[i]
+        row_text = ' '.join(row_data).strip()
+
+        # Look for team header (e.g., "1. Rankweil 1 (RtgAvg:2125, TB1: 18 / TB2: 48)")
+        if any(pattern in row_text for pattern in ['RtgAvg:', 'TB1:', 'TB2:']):
+            print(f"Found team header at row {i}: {row_text}")
+            i += 1
+            continue
+
+        # Look for captain line
+        if row_text.startswith('Captain:'):
+            print(f"Found captain at row {i}: {row_text}")
+            i += 1
+            continue
+
+        # Look for player data header (Bo., Name, Rtg, FED, etc.)
+        if 'Bo.' in row_text and 'Name' in row_text:
+            print(f"Found player header at row {i}: {row_text}")
+            # Parse the header
+            header = [h for h in rows[i] if h]  # Remove empty columns
+
+            # Find relevant columns
+            name_col = None
+            points_col = None
+            round_columns = []
+
+            for idx, col in enumerate(header):
+                col_lower = col.lower()
+                if 'name' in col_lower:
+                    name_col = idx
+                elif any(p in col_lower for p in ['pts', 'punkte', 'points']):
+                    points_col = idx
+                elif col.isdigit() or any(r in col_lower for r in ['rd.', 'runde', 'round']):
+                    round_columns.append((idx, col))
+
+            if name_col is None:
+                print(f"Warning: No name column found in header: {header}")
+                i += 1
+                continue
+
+            print(f"Found round columns: {round_columns}")
+
+            # Parse players in this team
+            i += 1
+            while i < len(rows):
+                player_row = rows[i]
+
+                # Check if this is still player data
+                if not player_row or len(player_row) <= name_col or not player_row[name_col] or player_row[name_col] == 'nan':
+                    break
+
+                # Check if we hit the next team header
+                player_row_text = ' '.join(player_row).strip()
+                if any(pattern in player_row_text for pattern in ['RtgAvg:', 'TB1:', 'TB2:', 'Captain:']):
+                    break
+
+                name = player_row[name_col].strip()
+                if not name or name == 'nan':
+                    break
+
+                # Parse points
+                try:
+                    points = float(player_row[points_col]) if points_col is not None and points_col < len(player_row) else 0
+                except (ValueError, TypeError, IndexError):
+                    points = 0
+
+                round_results = [player_row[round_idx] for round_idx, _ in round_columns if round_idx < len(player_row)]
+                players.append(ParsedPlayer(
+                    name=name,
+                    ranking=None,  # No individual rankings in team tournaments
+                    points=points,
+                    round_results=round_results
+                ))
+                player_index = len(players) - 1
+
+                # Parse individual round results; there is no opponent information
+                games_count = 0
+                for round_idx, round_col in round_columns:
+                    if round_idx < len(player_row):
+                        round_result = player_row[round_idx].strip()
+                        if round_result and round_result != 'nan' and round_result not in ['*', '***', '+', '-']:
+                            games_count += 1
+                            games.append(ParsedGame(
+                                player=player_index,
+                                opponent=None,
+                                round_number=int(round_col) if round_col.isdigit() else games_count,
+                                player_color=None,  # No color info available in team tournaments
+                                result=round_result
+                            ))
+
+                print(f"Added player {len(players)}: {name}, points: {points}, games: {games_count}")
+
+                i += 1
+            continue
+
+        i += 1
+
+    if not players:
+        raise ValueError('No valid player data found in team tournament')
+
+    print(f"Total players imported: {len(players)}")
+    print(f"Total games created: {len(games)}")
+    return players, games
+
+
+def parse_games(players, result_format):
+    """Derive the games of an individual tournament from the round results of its players"""
+    games = []
+    # Last participant wins for duplicate rankings
+    rank_dict = {player.ranking: index for index, player in enumerate(players)}
+
+    for index, player in enumerate(players):
+        for r, round_result in enumerate(player.round_results):
+            if round_result in ['*', '***', '+'] or not round_result:
+                continue
+
+            player_color = None
+            opponent = None
+            result = None
+
+            if result_format == 'simple':
+                round_num = r + 1
+                opponent_rank = round_num
+                if opponent_rank not in rank_dict or opponent_rank == player.ranking:
+                    continue
+                opponent = rank_dict[opponent_rank]
+                result = round_result
+
+            elif result_format == 'pair':
+                parts = round_result.split()
+                if len(parts) != 2:
+                    print(f"DEBUG: Invalid pair format {round_result} for {player.name}")
+                    continue
+                try:
+                    opponent_nr = int(parts[0])
+                    result = parts[1]
+                except ValueError:
+                    print(f"DEBUG: Invalid numbers in {round_result} for {player.name}")
+                    continue
+                if opponent_nr < 1 or opponent_nr > len(players):
+                    print(f"DEBUG: Opponent number {opponent_nr} out of range for {player.name}")
+                    continue
+                opponent = opponent_nr - 1
+                if opponent == index:
+                    print(f"DEBUG: Self opponent for {player.name}")
+                    continue
+
+            else:  # complex format
+                # Handle bye rounds and forfeit losses
+                if round_result in ['-1', '-½', '-0.5']:
+                    # Bye rounds: -1 (full point bye), -½ (half point bye)
+                    continue  # Skip creating game record for byes
+                elif round_result == '0':
+                    # Forfeit loss with no opponent specified
+                    continue  # Skip if no opponent info
+
+                # Try standard complex format: "123w1" or "45b½"
+                m = re.match(r'^(\d+)([wsb])([10½+])$', round_result)
+                if m:
+                    opponent_nr = int(m.group(1))
+                    if opponent_nr < 1 or opponent_nr > len(players):
+                        continue
+                    opponent = opponent_nr - 1
+                    result = m.group(3)
+                    color = m.group(2)
+                    if color == 'w':
+                        player_color = 'white'
+                    elif color in ['s', 'b']:
+                        player_color = 'black'
+                else:
+                    # Try withdrawal/forfeit formats: "123w-" or "45b-"
+                    m = re.match(r'^(\d+)([wsb])-$', round_result)
+                    if m:
+                        opponent_nr = int(m.group(1))
+                        if opponent_nr < 1 or opponent_nr > len(players):
+                            continue
+                        opponent = opponent_nr - 1
+                        result = '1'  # Win by forfeit/withdrawal
+                        color = m.group(2)
+                        if color == 'w':
+                            player_color = 'white'
+                        elif color in ['s', 'b']:
+                            player_color = 'black'
+                    else:
+                        # Try half-point bye with opponent: "-½" alone already handled above
+                        print(f'Invalid round result, assuming skip: {round_result} for {player.name}')
+                        continue
+
+            if opponent is not None and result:
+                if opponent == index:
+                    print(f'Player cannot play against themselves: {player.name}')
+                    continue
+                games.append(ParsedGame(
+                    player=index,
+                    opponent=opponent,
+                    round_number=r + 1,
+                    player_color=player_color,
+                    result=result
+                ))
+
+    return games
+
+
+def best_of_3_games(players):
+    """
+    Games of a Best of 3 match, reconstructed from the final scores
+    (TB1, stored as points) of its two players.
+    """
+    if len(players) != 2:
+        return []
+
+    player1, player2 = players
+    player1_score = int(player1.points) if player1.points else 0
+    player2_score = int(player2.points) if player2.points else 0
+
+    print(f"Creating Best of 3 games: {player1.name} {player1_score}-{player2_score} {player2.name}")
+
+    games = []
+    total_games = player1_score + player2_score
+
+    for round_num in range(1, total_games + 1):
+        # Determine result for this game
+        # For a 2-0 result: rounds 1 and 2 go to winner
+        # For a 2-1 result: rounds 1,2 to winner, round 3 to loser
+        if round_num <= player1_score:
+            # Player1 wins this game
+            player1_result = "1"
+            player2_result = "0"
+        else:
+            # Player2 wins this game
+            player1_result = "0"
+            player2_result = "1"
+
+        games.append(ParsedGame(0, 1, round_num, "white" if round_num % 2 == 1 else "black", player1_result))
+        games.append(ParsedGame(1, 0, round_num, "black" if round_num % 2 == 1 else "white", player2_result))
+
+        print(f"   Round {round_num}: {player1.name} ({player1_result}) vs {player2.name} ({player2_result})")
+
+    print(f"Created {len(games)} game records for Best of 3 match")
+    return games
+
+
+def parse_tournament_sheet(rows):
+    """Parse a normalized sheet (see normalize_sheet) into a ParsedTournament"""
+    # Find header row and parse structure
+    header_row_idx = find_header_row(rows)
+    header = rows[header_row_idx]
+    if not header:
+        raise ValueError("No valid header found")
+    title = [row[0] for row in rows[:header_row_idx] if row and row[0] != 'nan']
+
+    if is_team_sheet(rows, header_row_idx):
+        print("Detected result format: team")
+        players, games = parse_team_players(rows)
+        round_columns = []
+        result_format = 'team'
+    else:
+        round_columns = detect_round_columns(header)
+        participants = participant_rows(rows, header, header_row_idx)
+        scoring_columns = detect_scoring_columns(header, round_columns, rows[header_row_idx + 1:header_row_idx + 6])
+        players = parse_players(participants, header, round_columns, scoring_columns)
+        result_format = detect_result_format(players)
+        print(f"Detected result format: {result_format}")
+        games = parse_games(players, result_format)
+
+    # Special handling for Best of 3 matches (2 players, 0 games from normal parsing)
+    if len(players) == 2 and not games:
+        games = best_of_3_games(players)
+
+    # Special handling for results-only tournaments (multiple players, final standings but no games)
+    elif len(players) > 2 and not games:
+        print(f"Results-only tournament detected: {len(players)} players with final standings but no individual games")
+        print("This is typical for tournaments where only final results are published")
+        # No need to create artificial games - we have the final standings which is sufficient
+
+    return ParsedTournament(
+        result_format=result_format,
+        header=header,
+        round_columns=round_columns,
+        title=title,
+        players=players,
+        games=games
+    )
+
+
+def parse_tournament_file(file_path, reader=None):
+    """Parse a chess-results Excel export into a ParsedTournament, reading it with reader (see read_sheet)"""
+    return parse_tournament_sheet(read_sheet(file_path, reader=reader))
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Nightly job that rolls the 360-day player statistics window forward.
+
+Tournaments that fell out of the window since the last run are removed from the
+materialized player_stats of their participants. Run once a day via cron,
+e.g. through player-stats-cronjob.sh.
+"""
+
+import sys
+import os
+import logging
+from datetime import datetime
+
+# Add the backend directory to Python path
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, backend_dir)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+def main():
+    logger.info(f"Rolling player stats window at {datetime.now()}")
+
+    try:
+        # Import here to avoid issues with Flask app context
+        from app import create_app
+        from player_stats import roll_stats_window
+
+        app = create_app()
+
+        with app.app_context():
+            refreshed = roll_stats_window()
+            logger.info(f"Player stats window rolled forward. Recalculated {refreshed} players")
+
+    except Exception as e:
+        logger.error(f"Error rolling player stats window: {str(e)}", exc_info=True)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,20 @@
 import React, { useState } from 'react';
 import { Dialog, DialogTitle, DialogContent, DialogActions, Button, Box, Typography } from '@mui/material';
 import ImportExportIcon from '@mui/icons-material/ImportExport';
-import { apiFetch } from './api';
+import { apiFetch, waitForJob } from './api';
 
 export default function ImportDialog({ open, onClose, onImported }) {
   const [file, setFile] = useState(null);
   const [error, setError] = useState('');
   const [uploading, setUploading] = useState(false);
   const [importResult, setImportResult] = useState(null);
+  const [progress, setProgress] = useState(null);
 
   const handleClose = () => {
     setFile(null);
     setError('');
     setImportResult(null);
+    setProgress(null);
     onClose();
   };
 
@@ -31,16 +33,19 @@ export default function ImportDialog({ open, onClose, onImported }) {
     const formData = new FormData();
     formData.append('file', file);
     try {
-      const result = await apiFetch('/players-import-csv', {
+      // Runs as a background job; poll it until the import is done
+      const job = await apiFetch('/players-import-csv?background=true', {
         method: 'POST',
         body: formData
       });
-  setImportResult(result.imported);
+      const result = await waitForJob(job, setProgress);
+      setImportResult(result.imported);
   if (onImported) onImported();
     } catch (err) {
       setError(err.message || 'Upload fehlgeschlagen.');
     } finally {
       setUploading(false);
+      setProgress(null);
     }
   };
 
@@ -84,7 +89,9 @@ export default function ImportDialog({ open, onClose, onImported }) {
         <DialogActions>
           <Button onClick={handleClose} disabled={uploading}>Abbrechen</Button>
           <Button onClick={handleUpload} disabled={uploading || !file} variant="contained" color="primary">
-            {uploading ? 'Importiere...' : 'Importieren'}
+            {uploading
+              ? (progress ? `Importiere... (${progress.rows} Zeilen)` : 'Importiere...')
+              : 'Importieren'}
           </Button>
         </DialogActions>
       </Dialog>
@@ -99,9 +99,9 @@ export default function PlayerNotes({ playerId, initialNotes = null }) {
           <Box key={note.id} sx={{ mb: 1, display: 'flex', alignItems: 'center' }}>
             <Box sx={{ flex: 1 }}>
               <Typography variant="body2" color="text.secondary">
-                {note.manual === true && note.updated_at ? `Geändert: ${new Date(note.updated_at).toLocaleString('de-DE')}` : note.created_at}
+                {note.manual === true && note.updated_at ? `Geändert: ${new Date(note.updated_at).toLocaleString('de-DE')}` : note.created_at?.replace('T', ' ')}
               </Typography>
-              <Typography>{note.content}</Typography>
+              <Typography sx={{ whiteSpace: 'pre-line' }}>{note.content}</Typography>
             </Box>
             {note.manual === true && (
               <>
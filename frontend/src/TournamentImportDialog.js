@@ -12,7 +12,7 @@ import {
   CircularProgress
 } from '@mui/material';
 import { ImportExport, Link } from '@mui/icons-material';
-import { apiFetch } from './api';
+import { apiFetch, waitForJob } from './api';
 
 export default function TournamentImportDialog({ open, onClose, onImported }) {
   const [url, setUrl] = useState('');
@@ -42,7 +42,8 @@ export default function TournamentImportDialog({ open, onClose, onImported }) {
     setError('');
 
     try {
-      const result = await apiFetch('/tournaments/import', {
+      // Runs as a background job; poll it until the import is done
+      const job = await apiFetch('/tournaments/import?background=true', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -50,6 +51,13 @@ export default function TournamentImportDialog({ open, onClose, onImported }) {
         body: JSON.stringify({ url: url.trim() })
       });
 
+      let result;
+      try {
+        result = { ...(await waitForJob(job)), message: 'Tournament imported successfully' };
+      } catch (jobError) {
+        result = { success: false, message: jobError.message };
+      }
+
       setImportResult(result);
       if (result.success && onImported) {
         onImported();
@@ -307,6 +307,30 @@ export async function apiFetch(endpoint, options = {}) {
   }
 }
 
+// Poll a background job (see /api/jobs) until it has finished.
+// Resolves with the job result, rejects with the job error if it failed or was cancelled.
+export async function waitForJob(job, onProgress, interval = 1000) {
+  while (!['succeeded', 'failed', 'cancelled'].includes(job.status)) {
+    await new Promise(resolve => setTimeout(resolve, interval));
+    // Bypass apiFetch: job status must never come from the cache
+    const res = await fetch(`${API_URL}/jobs/${job.id}`, { credentials: 'include' });
+    if (!res.ok) {
+      throw new Error('Jobstatus konnte nicht abgefragt werden');
+    }
+    job = await res.json();
+    if (onProgress && job.progress) {
+      onProgress(job.progress);
+    }
+  }
+  if (job.status === 'failed') {
+    throw new Error(job.error || 'Job fehlgeschlagen');
+  }
+  if (job.status === 'cancelled') {
+    throw new Error('Job wurde abgebrochen');
+  }
+  return job.result;
+}
+
 // Background function to fetch and update cache
 const fetchAndUpdateCache = async (endpoint, options, cacheKey) => {
   try {